@@ -0,0 +1,163 @@
+"""
+End-to-end benchmark: representative SpotiScrape workloads against the local MockSpotify.
+
+Workloads:
+    playlist-export   page through a playlist with get_playlist_info
+    playlist-stream   the same export with iter_playlist_items (typed models)
+    track-enrichment  get_track_info for many tracks, concurrently
+    stream-resolution get_streams (metadata, seektable, storage-resolve) for many tracks, concurrently
+    library-checks    are_tracks_in_library in batches of 50
+
+Each workload reports throughput, p50/p99 latency of its calls and, in a second pass
+under tracemalloc, its peak Python memory.
+
+Usage:
+    python benchmarks/end_to_end.py [--latency 0.02] [--jitter 0.01] [--throttle-rate 0.01]
+        [--padding 0] [--playlist-size 5000] [--tracks 500] [--workers 16] [--workloads ...] [--json results.json]
+"""
+import argparse, concurrent.futures, json, os, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from spotiscrape import SpotiScrape, RateLimiter
+from mock_spotify import MockSpotify, MockTransport, fake_id
+
+
+PLAYLIST_URL = 'https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M'
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def timed_call(latencies, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    latencies.append(time.perf_counter() - started)
+    return result
+
+
+def run_concurrently(fn, inputs, workers):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(fn, inputs):
+            pass
+
+
+def playlist_export(spotify, options, latencies):
+    offset, items = 0, 0
+    while True:
+        content = timed_call(latencies, spotify.get_playlist_info, PLAYLIST_URL, offset, 100)['content']
+        items += len(content['items'])
+        offset += 100
+        if offset >= content['totalCount']:
+            return items
+
+
+def playlist_stream(spotify, options, latencies):
+    offset, items = 0, 0
+    while offset < options.playlist_size:
+        started = time.perf_counter()
+        items += sum(1 for _ in spotify.iter_playlist_items(PLAYLIST_URL, offset, 100, typed=True))
+        latencies.append(time.perf_counter() - started)
+        offset += 100
+    return items
+
+
+def track_enrichment(spotify, options, latencies):
+    tracks = [fake_id('enrich', index) for index in range(options.tracks)]
+    run_concurrently(lambda trackID: timed_call(latencies, spotify.get_track_info, trackID), tracks, options.workers)
+    return len(tracks)
+
+
+def stream_resolution(spotify, options, latencies):
+    tracks = [fake_id('stream', index) for index in range(options.tracks)]
+    run_concurrently(lambda trackID: timed_call(latencies, spotify.get_streams, trackID), tracks, options.workers)
+    return len(tracks)
+
+
+def library_checks(spotify, options, latencies):
+    uris = ['spotify:track:' + fake_id('library', index) for index in range(options.tracks)]
+    batches = [uris[index:index + 50] for index in range(0, len(uris), 50)]
+    run_concurrently(lambda batch: timed_call(latencies, spotify.are_tracks_in_library, batch), batches, options.workers)
+    return len(uris)
+
+
+WORKLOADS = {
+    'playlist-export': playlist_export,
+    'playlist-stream': playlist_stream,
+    'track-enrichment': track_enrichment,
+    'stream-resolution': stream_resolution,
+    'library-checks': library_checks,
+}
+
+
+def client(server, options):
+    limiter = RateLimiter() if options.throttle_rate else None
+    return SpotiScrape('mock-sp-dc', transport=MockTransport(server.url, pool_maxsize=options.workers), rate_limiter=limiter)
+
+
+def run(name, server, options):
+    workload = WORKLOADS[name]
+
+    spotify = client(server, options)
+    latencies = []
+    started = time.perf_counter()
+    count = workload(spotify, options, latencies)
+    elapsed = time.perf_counter() - started
+    spotify.session.close()
+
+    peak = None
+    if not options.skip_memory:
+        spotify = client(server, options)
+        tracemalloc.start()
+        workload(spotify, options, [])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        spotify.session.close()
+
+    return {
+        'workload': name,
+        'items': count,
+        'calls': len(latencies),
+        'seconds': round(elapsed, 4),
+        'items_per_second': round(count / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'peak_mib': round(peak / 2 ** 20, 2) if peak is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every mock response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay of up to this many seconds')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--padding', type=int, default=0, help='extra bytes per track name / response')
+    parser.add_argument('--playlist-size', type=int, default=2000)
+    parser.add_argument('--tracks', type=int, default=300, help='tracks per enrichment / stream / library workload')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--workloads', nargs='+', choices=sorted(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--skip-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--json', help='also write the results to this file')
+    options = parser.parse_args()
+
+    results = []
+    with MockSpotify(latency=options.latency, jitter=options.jitter, padding=options.padding,
+                     playlist_size=options.playlist_size, throttle_rate=options.throttle_rate) as server:
+        print("{:<18} {:>7} {:>6} {:>8} {:>10} {:>8} {:>8} {:>9}".format(
+            'workload', 'items', 'calls', 'seconds', 'items/s', 'p50 ms', 'p99 ms', 'peak MiB'))
+        for name in options.workloads:
+            result = run(name, server, options)
+            results.append(result)
+            print("{workload:<18} {items:>7} {calls:>6} {seconds:>8.3f} {items_per_second:>10.1f} {p50_ms:>8.2f} {p99_ms:>8.2f} {peak:>9}".format(
+                peak='-' if result['peak_mib'] is None else '{:.2f}'.format(result['peak_mib']), **result))
+        print("\nmock server requests:", server.stats())
+
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as fh:
+            json.dump({'options': vars(options), 'results': results}, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
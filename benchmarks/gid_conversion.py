@@ -0,0 +1,57 @@
+"""
+Micro-benchmark: per-id base62 conversion (utils.uri_to_gid / gid_to_uri) against the
+table-driven batch functions in spotiscrape.gid, plus the memory of a GidSet against a set of ids.
+
+Usage:
+    python benchmarks/gid_conversion.py [count]
+"""
+import os, random, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from spotiscrape.utils import uri_to_gid, gid_to_uri
+from spotiscrape.gid import ids_to_gids, gids_to_ids, GidSet, int_to_id
+
+
+def timed(label, fn, count):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print("{:<36} {:>8.3f} s  {:>7.2f} us/id".format(label, elapsed, elapsed / count * 1e6))
+    return result
+
+
+def traced(label, fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("{:<36} {:>8.1f} MiB".format(label, size / 2 ** 20))
+    return result
+
+
+def main(count):
+    rng = random.Random(0)
+    ids = [int_to_id(rng.getrandbits(128)) for _ in range(count)]
+
+    hex_gids = timed("uri_to_gid (base62, per id)", lambda: [uri_to_gid(id) for id in ids], count)
+    timed("gid_to_uri (base62, per id)", lambda: [gid_to_uri(gid) for gid in hex_gids], count)
+
+    packed = timed("ids_to_gids (batch)", lambda: ids_to_gids(ids), count)
+    decoded = timed("gids_to_ids (batch)", lambda: gids_to_ids(packed), count)
+
+    assert packed.hex() == ''.join(hex_gids)
+    assert decoded == ids
+
+    print()
+    id_set = traced("set of id strings", lambda: set(gids_to_ids(packed)))
+    gid_set = traced("GidSet", lambda: GidSet.from_gids(packed))
+    assert len(id_set) == len(gid_set)
+
+    probes = ids[::10]
+    timed("'id in set' (set of ids)", lambda: [id in id_set for id in probes], len(probes))
+    timed("'id in GidSet'", lambda: [id in gid_set for id in probes], len(probes))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,67 @@
+"""
+Startup benchmark: cost of importing spotiscrape in a fresh interpreter, and the modules
+that take the most time according to `python -X importtime`.
+
+Every statement runs in a new subprocess that times it with perf_counter, so interpreter
+startup is left out; the median of the runs is reported.
+
+Usage:
+    python benchmarks/import_time.py [runs]
+"""
+import os, statistics, subprocess, sys
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+STATEMENTS = (
+    'import spotiscrape',
+    'import spotiscrape.gid',
+    'from spotiscrape import GidSet, Track',
+    'from spotiscrape import SpotiScrape',
+)
+
+
+TIMED = 'import time; started = time.perf_counter(); {}; print(time.perf_counter() - started)'
+
+
+def run(statement, *flags):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, *flags, '-c', TIMED.format(statement)], env=env, cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, universal_newlines=True)
+    return float(result.stdout), result.stderr
+
+
+def median_time(statement, runs):
+    return statistics.median(run(statement)[0] for _ in range(runs))
+
+
+def top_imports(statement, limit=12):
+    """
+    Returns (cumulative microseconds, module) of the slowest top-level imports of statement.
+    """
+    rows = []
+    for line in run(statement, '-X', 'importtime')[1].splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # top-level imports are indented by one space
+        if name.startswith(' ') and not name.startswith('  '):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    run('import spotiscrape')    # warm the bytecode cache
+
+    print("{:<40} {:>10}".format('statement', 'ms'))
+    for statement in STATEMENTS:
+        print("{:<40} {:>10.1f}".format(statement, median_time(statement, runs) * 1000))
+
+    print("\nslowest imports of `from spotiscrape import SpotiScrape` (cumulative):")
+    for cumulative, name in top_imports('from spotiscrape import SpotiScrape'):
+        print("  {:<38} {:>8.1f} ms".format(name, cumulative / 1000))
+
+
+if __name__ == '__main__':
+    main()
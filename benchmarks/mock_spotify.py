@@ -0,0 +1,329 @@
+"""
+A local stand-in for the Spotify endpoints spotiscrape/api.py talks to, for benchmarks.
+
+MockSpotify serves /get_access_token, /v1/clienttoken, pathfinder /v1/query (by
+operationName), /v1/tracks, /metadata/4/track, storage-resolve, seektables,
+connect-state and user-profile-view playlists from a background thread, with configurable latency, payload size,
+playlist length (paginated) and 429 injection. MockTransport is mounted on a client's
+session so its requests to the real hosts are sent to the stand-in instead.
+
+Usage:
+    with MockSpotify(latency=0.02, playlist_size=5000, throttle_rate=0.01) as server:
+        spotify = SpotiScrape("sp_dc", transport=MockTransport(server.url))
+        spotify.get_playlist_info("37i9dQZF1DXcBWIGoYBM5M", limit=100)
+"""
+import collections, hashlib, json, os, random, re, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit, parse_qs
+
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from spotiscrape.gid import int_to_id, gid_to_id
+
+
+def fake_id(*parts):
+    """
+    A stable 22-character Spotify id derived from parts.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).digest()
+    return int_to_id(int.from_bytes(digest, 'big'))
+
+
+def artist(index):
+    artistID = fake_id('artist', index)
+    return {'uri': 'spotify:artist:' + artistID, 'profile': {'name': 'Artist {}'.format(index)}}
+
+
+def playlist_item(playlistID, index, padding):
+    trackID = fake_id('track', playlistID, index)
+    return {
+        'uid': '{:016x}'.format(index),
+        'addedAt': {'isoString': '2023-01-01T00:00:00Z'},
+        'addedBy': {'data': {'username': 'mock'}},
+        'itemV2': {'data': {
+            '__typename': 'Track',
+            'uri': 'spotify:track:' + trackID,
+            'name': 'Track {} {}'.format(index, padding),
+            'trackDuration': {'totalMilliseconds': 180000 + index},
+            'contentRating': {'label': 'NONE'},
+            'artists': {'items': [artist(index % 97), artist(index % 31)]},
+            'albumOfTrack': {
+                'uri': 'spotify:album:' + fake_id('album', index // 12),
+                'name': 'Album {}'.format(index // 12),
+                'coverArt': {'sources': [{'url': 'https://i.scdn.co/image/{:040x}'.format(index), 'width': 640}]},
+                'artists': {'items': [artist(index % 97)]},
+            },
+        }},
+    }
+
+
+def web_track(trackID, padding):
+    return {
+        'id': trackID,
+        'uri': 'spotify:track:' + trackID,
+        'name': 'Track {} {}'.format(trackID[:6], padding),
+        'duration_ms': 200000,
+        'explicit': False,
+        'popularity': 50,
+        'artists': [{'id': fake_id('artist', trackID), 'name': 'Artist', 'uri': 'spotify:artist:' + fake_id('artist', trackID)}],
+        'album': {'id': fake_id('album', trackID), 'name': 'Album', 'images': [{'url': 'https://i.scdn.co/image/x', 'width': 640}],
+                  'artists': []},
+    }
+
+
+class MockSpotify:
+    """
+    Args:
+        latency (float, optional): Seconds every response is delayed. Default is 0.
+        jitter (float, optional): Extra random delay of up to this many seconds. Default is 0.
+        padding (int, optional): Extra bytes added to every track name and response, to scale payloads. Default is 0.
+        playlist_size (int, optional): Number of items of every playlist. Default is 1000.
+        throttle_rate (float, optional): Fraction of requests answered with 429. Default is 0.
+        retry_after (float, optional): Retry-After of injected 429s, in seconds. Default is 0.05.
+        seed (int, optional): Seed for jitter and 429 injection. Default is 0.
+        artists (int, optional): Size of the artist graph; artist(index) ids are its nodes, each related to 5 others. Default is 1000.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, padding=0, playlist_size=1000, throttle_rate=0.0, retry_after=0.05, seed=0,
+                 artists=1000):
+        self.latency = latency
+        self.jitter = jitter
+        self.padding = 'x' * padding
+        self.playlist_size = playlist_size
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = collections.Counter()
+        self.artists = artists
+        self.artist_index = None
+        self.server = None
+        self.url = None
+
+    def start(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                mock.handle(self, 'GET')
+
+            def do_POST(self):
+                mock.handle(self, 'POST')
+
+            def do_PUT(self):
+                mock.handle(self, 'PUT')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        threading.Thread(target=self.server.serve_forever, name='mock-spotify', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def handle(self, handler, method):
+        parts = urlsplit(handler.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+
+        route, payload = self.route(method, parts.path, query, body)
+
+        with self.lock:
+            self.counts[route] += 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            throttled = self.throttle_rate and self.random.random() < self.throttle_rate
+            if throttled:
+                self.counts['429'] += 1
+
+        if delay:
+            time.sleep(delay)
+
+        if throttled:
+            status, payload, headers = 429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}}, {'Retry-After': str(self.retry_after)}
+        elif payload is None:
+            status, payload, headers = 404, {'error': {'status': 404, 'message': 'Not found'}}, {}
+        else:
+            status, headers = 200, {}
+
+        data = json.dumps(payload, separators=(',', ':')).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def route(self, method, path, query, body):
+        if path == '/get_access_token':
+            return 'get_access_token', {'accessToken': 'mock-access-token', 'clientId': 'mock-client-id', 'isAnonymous': False}
+
+        if path == '/v1/clienttoken':
+            return 'clienttoken', {'response_type': 'RESPONSE_GRANTED_TOKEN_RESPONSE', 'granted_token': {'token': 'mock-client-token'}}
+
+        if path == '/pathfinder/v1/query':
+            if method == 'GET':
+                name, variables = query.get('operationName'), json.loads(query.get('variables') or '{}')
+            else:
+                name, variables = body.get('operationName'), body.get('variables') or {}
+            return name, self.pathfinder(name, variables)
+
+        if path == '/v1/tracks':
+            return 'tracks', {'tracks': [web_track(trackID, self.padding) for trackID in query.get('ids', '').split(',')]}
+
+        match = re.match(r'/metadata/4/track/([0-9a-f]{32})$', path)
+        if match:
+            trackID = gid_to_id(bytes.fromhex(match.group(1)))
+            files = [{'file_id': hashlib.sha1((trackID + format).encode()).hexdigest(), 'format': format}
+                     for format in ('OGG_VORBIS_96', 'OGG_VORBIS_160', 'OGG_VORBIS_320', 'MP4_128', 'MP4_256')]
+            return 'metadata', {'gid': match.group(1), 'name': 'Track ' + self.padding, 'file': files}
+
+        match = re.match(r'/storage-resolve/v2/files/audio/interactive/10/([0-9a-f]+)$', path)
+        if match:
+            return 'storage-resolve', {'result': 'CDN', 'fileid': match.group(1), 'ttl': 86400, 'cdnurl': [
+                'https://audio-ak-spotify-com.akamaized.net/audio/{}?__token__=exp=0~hmac=mock'.format(match.group(1))]}
+
+        match = re.match(r'/seektable/([0-9a-f]+)\.json$', path)
+        if match:
+            return 'seektable', {'pssh': 'AAAAU3Bzc2g' + match.group(1), 'timescale': 44100, 'offset': 1000,
+                                 'segments': [[i, 4096] for i in range(200)], 'padding': self.padding}
+
+        if path.startswith('/connect-state/v1/devices/'):
+            return 'devices', {
+                'active_device_id': 'mock-computer',
+                'devices': {
+                    'mock-computer': {'device_type': 'COMPUTER', 'name': 'Mock computer'},
+                    'mock-phone': {'device_type': 'SMARTPHONE', 'name': 'Mock phone'},
+                },
+                'player_state': {'track': {'uri': 'spotify:track:' + fake_id('track', 'current')}},
+            }
+
+        if path.startswith('/connect-state/v1/player/command/'):
+            return 'command', {'ack_id': 'mock'}
+
+        match = re.match(r'/user-profile-view/v3/profile/([^/]+)/playlists$', path)
+        if match:
+            offset, limit = int(query.get('offset', 0)), int(query.get('limit', 200))
+            total = self.playlist_size // 100
+            return 'public_playlists', {
+                'total_public_playlists_count': total,
+                'public_playlists': [{'uri': 'spotify:playlist:' + fake_id('playlist', match.group(1), index),
+                                      'name': 'Playlist {}'.format(index)}
+                                     for index in range(offset, min(offset + limit, total))],
+            }
+
+        return path, None
+
+    def pathfinder(self, name, variables):
+        if name == 'fetchPlaylist':
+            playlistID = variables.get('uri', '').rsplit(':', 1)[-1]
+            offset = int(variables.get('offset', 0))
+            limit = int(variables.get('limit', 25))
+            items = [playlist_item(playlistID, index, self.padding)
+                     for index in range(offset, min(offset + limit, self.playlist_size))]
+            return {'data': {'playlistV2': {
+                '__typename': 'Playlist',
+                'uri': 'spotify:playlist:' + playlistID,
+                'name': 'Mock playlist',
+                'ownerV2': {'data': {'username': 'mock'}},
+                'content': {
+                    'totalCount': self.playlist_size,
+                    'pagingInfo': {'offset': offset, 'limit': limit},
+                    'items': items,
+                },
+            }}}
+
+        if name in ('areTracksInLibrary', 'areArtistsInLibrary'):
+            key = 'tracks' if name == 'areTracksInLibrary' else 'artists'
+            uris = variables.get('uris') or []
+            return {'data': {key: [{'__typename': key[:-1].title(), 'uri': uri, 'saved': sum(uri.encode()) % 2 == 0} for uri in uris]}}
+
+        if name == 'queryArtistDiscographyAll':
+            artistID = variables.get('uri', '').rsplit(':', 1)[-1]
+            offset, limit = int(variables.get('offset', 0)), int(variables.get('limit', 50))
+            total = self.playlist_size // 10
+            return {'data': {'artistUnion': {'discography': {'all': {
+                'totalCount': total,
+                'items': [{'releases': {'items': [{'id': fake_id('release', artistID, index), 'name': 'Release {}'.format(index)}]}}
+                          for index in range(offset, min(offset + limit, total))],
+            }}}}}
+
+        if name == 'queryArtistOverview':
+            index = self.find_artist(variables.get('uri', '').rsplit(':', 1)[-1])
+            if index is None:
+                return None
+            related = [(index * 7 + step * 13 + 1) % self.artists for step in range(5)]
+            return {'data': {'artistUnion': dict(artist(index),
+                id=fake_id('artist', index),
+                relatedContent={'relatedArtists': {'totalCount': 5, 'items': [artist(other) for other in related]}},
+                discography={'topTracks': {'items': [
+                    {'track': {'uri': 'spotify:track:' + fake_id('top', index, rank), 'name': 'Top {}'.format(rank)}}
+                    for rank in range(3)]}},
+            )}}
+
+        if name == 'internalLinkRecommenderTrack':
+            seed = sum(variables.get('uri', '').encode())
+            return {'data': {'seoRecommended': {'items': [
+                {'data': {'__typename': 'Track', 'uri': 'spotify:track:' + fake_id('rec', seed, rank),
+                          'artists': {'items': [artist((seed + rank * 31) % self.artists)]}}}
+                for rank in range(5)]}}}
+
+        if name == 'getTrack':
+            trackID = variables.get('uri', '').rsplit(':', 1)[-1]
+            return {'data': {'trackUnion': dict(playlist_item('track', 0, self.padding)['itemV2']['data'],
+                                                uri='spotify:track:' + trackID)}}
+
+        return {'data': {}}
+
+    def find_artist(self, artistID):
+        with self.lock:
+            if self.artist_index is None:
+                self.artist_index = {fake_id('artist', index): index for index in range(self.artists)}
+        return self.artist_index.get(artistID)
+
+
+class MockTransport(HTTPAdapter):
+    """
+    Sends every request to the MockSpotify at base_url, whatever host it was meant for.
+    """
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base = urlsplit(base_url)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.headers['X-Original-Host'] = parts.netloc
+        request.url = urlunsplit((self.base.scheme, self.base.netloc, parts.path, parts.query, ''))
+        return super().send(request, **kwargs)
+
+
+if __name__ == '__main__':
+    with MockSpotify(playlist_size=int(sys.argv[1]) if len(sys.argv) > 1 else 1000) as server:
+        print("Mock Spotify listening on", server.url)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
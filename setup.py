@@ -22,9 +22,15 @@ setuptools.setup(
     install_requires=[
         "requests",
         "pybase62",
-        "pytz",
-        "termcolor"
     ],
+    extras_require={
+        "fast": ["orjson"],
+        "otel": ["opentelemetry-api"],
+        "cassettes": ["zstandard"],
+    },
     packages=setuptools.find_packages(),
-    python_requires=">=3.6",
+    entry_points={
+        "console_scripts": ["spotiscrape=spotiscrape.cli:main"],
+    },
+    python_requires=">=3.7",
 )
\ No newline at end of file
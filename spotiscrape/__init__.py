@@ -1 +1,47 @@
-from .api import SpotiScrape
\ No newline at end of file
+# Public names are imported from their module on first access (PEP 562), so that
+# `import spotiscrape` stays cheap and requests is only loaded with the client.
+_EXPORTS = {
+    'api': ('SpotiScrape',),
+    'ratelimit': ('RateLimiter',),
+    'retry': ('RetryPolicy',),
+    'hedge': ('HedgePolicy',),
+    'breaker': ('CircuitBreakers',),
+    'deadline': ('Deadline',),
+    'errors': ('SpotiScrapeError', 'CircuitOpenError', 'DeadlineExceededError', 'RequestCancelledError',
+               'ResponseError', 'AuthenticationError', 'NotFoundError', 'RateLimitedError', 'ServerError', 'CassetteMissError'),
+    'decoder': ('set_json_decoder',),
+    'models': ('Artist', 'Album', 'Track', 'PlaylistItem'),
+    'gid': ('id_to_gid', 'gid_to_id', 'ids_to_gids', 'gids_to_ids', 'GidSet', 'BloomFilter'),
+    'utils': ('normalize_id', 'normalize_ids'),
+    'operations': ('OPERATIONS', 'Operation', 'OperationRegistry'),
+    'cache': ('TTLCache',),
+    'index': ('SearchIndex',),
+    'typeahead': ('Typeahead',),
+    'metrics': ('Metrics', 'RequestSample'),
+    'tracing': ('Tracer', 'Span', 'JSONFileExporter', 'MemoryExporter', 'OpenTelemetryExporter'),
+    'reporting': ('set_error_reporting',),
+    'cassette': ('Cassette', 'RecordingTransport', 'ReplayTransport'),
+    'profiling': ('Profiler',),
+    'jobs': ('CrawlJob', 'JobStore', 'Stage', 'PublicPlaylists', 'PlaylistItems', 'Discography'),
+    'graph': ('ArtistGraphCrawler', 'Edge'),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    import importlib
+
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
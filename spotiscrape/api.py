@@ -1,7 +1,26 @@
-import requests
-from .utils import extract_id, get_timeTag, get_current_timezone, uri_to_gid, find_device_id, time_to_seconds, handle_exception
+import concurrent.futures, contextvars, hashlib
+from .session import Session, DEFAULT_TIMEOUT
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .cache import TTLCache
+from .deadline import Deadline
+from .calls import api_call
+from .decoder import decode_json, decode_path
+from .streaming import iter_items
+from .models import Track, PlaylistItem
+from .gid import id_to_gid
+from .utils import extract_id, normalize_query, get_timeTag, get_current_timezone, find_device_id, time_to_seconds, handle_exception
 from .errors import SpotiScrapeError
-import json
+from .operations import OPERATIONS, PATHFINDER_HOST, PATHFINDER_URL
+from .metrics import RequestSample, HIT, MISS, cache_result
+
+
+POSTER_URL_PATH = ('albumOfTrack', 'coverArt', 'sources', -1, 'url')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# search() section holding each entity type
+SEARCH_SECTIONS = {'track': 'tracksV2', 'artist': 'artists', 'album': 'albums', 'playlist': 'playlists'}
 
 
 class GetStreams:
@@ -82,18 +101,142 @@ class SpotiScrape:
     A class for scraping data from the Spotify WEB-API.
     """
 
-    def __init__(self, sp_dc):
+    def __init__(self, sp_dc, rate_limiter=None, retry_policy=None, hedge_policy=None, circuit_breakers=None,
+                 timeout=DEFAULT_TIMEOUT, call_timeout=None, operation_hashes=None, search_cache=None, local_index=None,
+                 metrics=None, tracer=None, transport=None):
         """
         Initializes a new instance of SpotiScrape.
 
         Args:
             sp_dc (str): The Spotify sp_dc value for authentication.
-        """
-        self.session = requests.Session()
+            rate_limiter (RateLimiter, optional): Adaptive per-host / per-account rate limiter shared by all requests. Default is None.
+            retry_policy (RetryPolicy, optional): Backoff policy for transient failures. Default is RetryPolicy(); pass RetryPolicy(max_attempts=1) to disable retries.
+            hedge_policy (HedgePolicy, optional): Sends a duplicate of slow idempotent reads to cut tail latency. Default is None.
+            circuit_breakers (CircuitBreakers, optional): Fails fast with CircuitOpenError while a host/operation is degraded. Default is None.
+            timeout (float or tuple, optional): requests timeout (seconds, or a (connect, read) tuple) for every HTTP request. Default is (10, 30).
+            call_timeout (float, optional): Overall budget in seconds for each public method call, shared by all of its sub-requests and retries. Default is None.
+            operation_hashes (dict, optional): {operationName: sha256Hash} overrides for this client's persisted queries. Default is None.
+            search_cache (TTLCache, optional): Cache used by search_many(). Default is TTLCache(maxsize=4096, ttl=600).
+            local_index (SearchIndex, optional): Index fed with fetched tracks, artists, albums and playlists, used by search_local(). Default is None.
+            metrics (Metrics, optional): Records latency, status, size and retries of every request, and search cache hits. Default is None.
+            tracer (Tracer, optional): Records a span for every public method call with child spans for its HTTP requests. Default is None.
+            transport (requests.adapters.BaseAdapter, optional): Adapter mounted for every URL before authenticating, e.g. RecordingTransport or ReplayTransport. Default is None.
+        """
+        account = hashlib.sha1(sp_dc.encode()).hexdigest()[:16]
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.session = Session(rate_limiter=rate_limiter, retry_policy=self.retry_policy, hedge_policy=hedge_policy,
+                               circuit_breakers=circuit_breakers, account=account, timeout=timeout, metrics=metrics, tracer=tracer)
+        self.metrics = metrics
+        self.tracer = tracer
+        self.profiler = None
+        if transport is not None:
+            self.session.mount('https://', transport)
+            self.session.mount('http://', transport)
+        self.call_timeout = call_timeout
+        self.flights = SingleFlight()
+        self.operations = OPERATIONS
+        if operation_hashes:
+            self.operations = OPERATIONS.copy()
+            self.operations.update_hashes(operation_hashes)
+        self.search_cache = search_cache if search_cache is not None else TTLCache()
+        self.local_index = local_index
         self.sp_dc = sp_dc
         self.setup_headers()
 
 
+    def deadline(self, timeout=None):
+        """
+        Creates a Deadline for the calls made inside its with-block.
+
+        Args:
+            timeout (float, optional): Overall budget in seconds. Default is None (no time limit, cancellation only).
+
+        Returns:
+            Deadline: The deadline; call its cancel() method from another thread or task to abort the calls.
+
+        Example:
+            with spotify.deadline(2.5) as call:
+                spotify.get_streams(trackURL)
+        """
+        return Deadline(timeout)
+
+    def profile(self, cprofile=False, memory=False):
+        """
+        Creates a Profiler for the calls made inside its with-block.
+
+        Args:
+            cprofile (bool, optional): Also run cProfile in the calling thread. Default is False.
+            memory (bool, optional): Trace the memory each method retains with tracemalloc. Default is False.
+
+        Returns:
+            Profiler: Call print_summary(), summary(), dump_stats() or print_allocations() after the block.
+
+        Example:
+            with spotify.profile() as profiler:
+                spotify.get_streams(trackURL)
+            profiler.print_summary()
+        """
+        from .profiling import Profiler
+
+        return Profiler(self, cprofile=cprofile, memory=memory)
+
+    def crawl(self, path, name='crawl', stages=None, max_attempts=3):
+        """
+        Creates a resumable crawl job checkpointed in the SQLite database at path; see CrawlJob.
+
+        Args:
+            path (str): The database file. Running a job again resumes it where it stopped.
+            name (str, optional): Name of the job within the database. Default is "crawl".
+            stages (iterable, optional): Stage instances. Default is public playlists, playlist items and discography.
+            max_attempts (int, optional): Attempts per page before its task is marked failed. Default is 3.
+
+        Returns:
+            CrawlJob: Call add(stage, keys), then run(workers).
+        """
+        from .jobs import CrawlJob
+
+        return CrawlJob(self, path, name=name, stages=stages, max_attempts=max_attempts)
+
+    def artist_graph(self, max_depth=2, recommendations=0, workers=8, max_nodes=None, bloom_capacity=None, directory=None):
+        """
+        Creates a breadth-first crawler of the artist similarity graph; see ArtistGraphCrawler.
+
+        Args:
+            max_depth (int, optional): Levels to expand from the seeds. Default is 2.
+            recommendations (int, optional): Top tracks per artist whose recommended tracks add edges. Default is 0.
+            workers (int, optional): Artists fetched concurrently. Default is 8.
+            max_nodes (int, optional): Stop after fetching this many artists. Default is no limit.
+            bloom_capacity (int, optional): Track visited artists in a Bloom filter of this capacity instead of a GidSet. Default is None.
+            directory (str, optional): Directory of the on-disk frontier. Default is a temporary directory.
+
+        Returns:
+            ArtistGraphCrawler: Iterate crawl(seeds) for the edges.
+        """
+        from .graph import ArtistGraphCrawler
+
+        return ArtistGraphCrawler(self, max_depth=max_depth, recommendations=recommendations, workers=workers,
+                                  max_nodes=max_nodes, bloom_capacity=bloom_capacity, directory=directory)
+
+    def query(self, operation, stream=False, **variables):
+        """
+        Sends a persisted pathfinder query.
+
+        Args:
+            operation (Operation): The operation, e.g. self.operations['fetchPlaylist'].
+            stream (bool, optional): Whether to stream the response body. Default is False.
+            **variables: Variables merged over the operation's fixed variables.
+
+        Returns:
+            requests.Response: The response.
+        """
+        return self.session.get(PATHFINDER_URL, params=operation.params(**variables), stream=stream)
+
+    def mutate(self, operation, **variables):
+        """
+        Sends a persisted pathfinder mutation.
+        """
+        return self.session.post(PATHFINDER_URL, json=operation.body(**variables))
+
     def setup_headers(self):
         self.access_token, self.client_id = self.get_access_token()
         self.client_token = self.get_authorization()
@@ -115,6 +258,7 @@ class SpotiScrape:
             'sec-fetch-site': 'same-site',
         })
 
+    @api_call
     def get_authorization(self):
         """
         Sets up the HTTP headers for the session.
@@ -159,12 +303,13 @@ class SpotiScrape:
             },
         }
 
-        response = requests.post(
-            'https://clienttoken.spotify.com/v1/clienttoken', headers=headers, json=json_data
-        ).json()
+        response = decode_json(self.session.post(
+            'https://clienttoken.spotify.com/v1/clienttoken', headers=headers, json=json_data, anonymous=True
+        ))
 
         return response['granted_token']['token']
 
+    @api_call
     def get_access_token(self):
         """
         Retrieves the access token and client ID for the session.
@@ -211,24 +356,27 @@ class SpotiScrape:
             'productType': 'web_player',
         }
 
-        response = self.session.get(
+        response = decode_json(self.session.get(
             'https://open.spotify.com/get_access_token', params=params, headers=headers
-        ).json()
+        ))
 
         if "error" in response:
             raise SpotiScrapeError("Unauthorized. Check sp_dc cookie value")
 
         return response['accessToken'], response['clientId']
 
-    def get_track_info(self, trackURL):
+    @api_call
+    def get_track_info(self, trackURL, typed=False, keep_raw=False):
         """
         Retrieves information about a track from its URL.
 
         Args:
             trackURL (str): The URL of the track.
+            typed (bool, optional): Return a compact Track model instead of a dict. Default is False.
+            keep_raw (bool, optional): With typed, also keep the track's JSON for Track.raw. Default is False.
 
         Returns:
-            dict: Information about the track.
+            dict or Track: Information about the track.
 
         Raises:
             SpotiScrapeError: If there's an issue with retrieving track information or the track URL is invalid.
@@ -241,23 +389,31 @@ class SpotiScrape:
             'market': 'from_token',
         }
 
-        response = self.session.get(
+        response = decode_json(self.session.get(
             'https://api.spotify.com/v1/tracks', params=params
-        ).json()
+        ))
 
-        if not len(response['tracks']) < 0:
+        if not response.get('tracks') or response['tracks'][0] is None:
             raise SpotiScrapeError("Error Retriving Track Info. Check Track URL")
 
+        self.index_entities(response['tracks'][0])
+
+        if typed:
+            return Track.parse(response['tracks'][0], keep_raw)
+
         return response['tracks'][0]
 
 
-    def search(self, query, filter=None):
+    @api_call
+    def search(self, query, filter=None, offset=0, limit=10):
         """
         Searches for content on Spotify based on the provided query.
 
         Args:
             query (str): The search query.
             filter (str, optional): The type of filter to apply to the search results. Default is None.
+            offset (int, optional): The offset for pagination. Default is 0.
+            limit (int, optional): The number of results per section. Default is 10.
 
         Returns:
             dict or list: Search results based on the provided filter.
@@ -265,22 +421,17 @@ class SpotiScrape:
         Raises:
             SpotiScrapeError: If there's an issue with the search or the specified filter is not found.
         """
-        params = {
-            'operationName': 'searchDesktop',
-            'variables': '{{"searchTerm":"{}","offset":0,"limit":10,"numberOfTopResults":5,"includeAudiobooks":true}}'.format(query),
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"130115162add6f3499d2f88ead8a37a7cad1d4d2314f3a206377035e7d26b74c"}}',
-        }
+        operation = self.operations['searchDesktop']
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params).json()
+        response = decode_path(self.query(operation, searchTerm=query, offset=int(offset), limit=int(limit)), operation.path)
 
-        del response['data']['searchV2']['chipOrder']
+        del response['chipOrder']
 
         if filter:
-            if filter in response['data']['searchV2']:
+            if filter in response:
 
                 filtered_dict = {
-                    filter: response['data']['searchV2'][filter]
+                    filter: response[filter]
                 }
                 return filtered_dict
 
@@ -288,9 +439,197 @@ class SpotiScrape:
                 raise SpotiScrapeError("Filter {} not Found. Available Filters - {}".format(
                     filter, "topResults, albums, artists, episodes, genres, playlists, podcasts, audiobooks, users"))
         else:
-            return response['data']['searchV2']['topResults']['itemsV2']
+            return response['topResults']['itemsV2']
+
+    @api_call
+    def search_top_results(self, query, limit=5):
+        """
+        A small search request returning only the top results, meant for autocomplete.
+
+        Args:
+            query (str): The search query.
+            limit (int, optional): Number of top results (and of results per section). Default is 5.
+
+        Returns:
+            list: The topResults items.
+        """
+        operation = self.operations['searchDesktop']
+
+        response = self.query(operation, searchTerm=query, limit=int(limit), numberOfTopResults=int(limit), includeAudiobooks=False)
+
+        try:
+            return decode_path(response, operation.path + ('topResults', 'itemsV2'))
+
+        except Exception as e:
 
+            handle_exception(response, e, "Error retrieving search suggestions. Check response format.")
 
+    def typeahead(self, limit=5, debounce=0.15, ttl=300):
+        """
+        Creates a Typeahead (autocomplete) session; see Typeahead.suggest().
+
+        Args:
+            limit (int, optional): Number of top results per query. Default is 5.
+            debounce (float, optional): Seconds to wait for further keystrokes before sending a request. Default is 0.15.
+            ttl (float, optional): Seconds cached results stay fresh. Default is 300.
+
+        Returns:
+            Typeahead: The typeahead session.
+        """
+        from .typeahead import Typeahead
+
+        return Typeahead(self, limit=limit, debounce=debounce, ttl=ttl)
+
+    def cached_search(self, query, filter=None, offset=0, limit=10):
+        """
+        search() through the search cache; concurrent identical searches share one request.
+
+        The normalized query is only the cache key: the query is sent as given, so searches
+        differing only in case or whitespace share the result of whichever was sent first.
+        """
+        key = ('searchDesktop', normalize_query(query), filter, int(offset), int(limit))
+
+        result = self.search_cache.get(key)
+        if self.metrics is not None:
+            self.metrics.record_cache('search', result is not None)
+            if result is not None:
+                self.metrics.record_request(RequestSample(PATHFINDER_HOST, 'searchDesktop', 'GET', 200, 0.0, 0, 0, 0, None, HIT))
+        if result is None:
+            with cache_result(MISS):
+                result = self.flights.do(key, self.search, query, filter, offset, limit)
+            self.search_cache.set(key, result)
+
+        return result
+
+    def search_many(self, queries, filter=None, limit=10, max_workers=8, return_exceptions=False):
+        """
+        Runs many searches concurrently.
+
+        Queries are normalized (case, Unicode form and whitespace) and each distinct one is
+        searched only once. Results are cached for the lifetime of search_cache, so repeats
+        across calls are free too. An active deadline (spotify.deadline()) covers the whole
+        batch; otherwise every search gets its own call_timeout.
+
+        Args:
+            queries (iterable): Search queries, e.g. "artist - title" strings.
+            filter (str, optional): The filter applied to every search (see search()). Default is None.
+            limit (int, optional): The number of results per section. Default is 10.
+            max_workers (int, optional): Maximum number of searches in flight. Default is 8.
+            return_exceptions (bool, optional): Put the exception of a failed search in its slot instead of raising. Default is False.
+
+        Returns:
+            list: The results, in the order of queries.
+
+        Example:
+            results = spotify.search_many(["Ed Sheeran - Shape of You", "Adele - Hello"], filter="tracksV2", limit=5)
+        """
+        queries = list(queries)
+        keys = [normalize_query(query) for query in queries]
+        # the first spelling of each normalized query is the one sent
+        first = {}
+        for key, query in zip(keys, queries):
+            first.setdefault(key, query)
+        results = {}
+        pending = set()
+
+        def collect(done):
+            for future in done:
+                try:
+                    results[future.key] = future.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[future.key] = e
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for key, query in first.items():
+                if len(pending) >= max_workers * 2:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+
+                future = pool.submit(contextvars.copy_context().run, self.cached_search, query, filter, 0, limit)
+                future.key = key
+                pending.add(future)
+
+            collect(concurrent.futures.wait(pending).done)
+
+        return [results[key] for key in keys]
+
+    @api_call
+    def search_local(self, query, filter=None, limit=10, min_score=0.8, fallback=True):
+        """
+        Searches the local index, going to Spotify only when no local match is good enough.
+
+        A match's score is the share of the query's trigrams found in the entity's name and
+        artists. When the best score is below min_score, the query is searched remotely, the
+        results are added to the index and the index is searched again.
+
+        Args:
+            query (str): The search query.
+            filter (str, optional): Only return entities of this type (track, artist, album, playlist). Default is None.
+            limit (int, optional): Maximum number of matches. Default is 10.
+            min_score (float, optional): Lowest best score answered locally. Default is 0.8.
+            fallback (bool, optional): Whether to search remotely on low confidence. Default is True.
+
+        Returns:
+            list: Matches as dicts with type, uri, id, name, artists and score, best first.
+
+        Raises:
+            SpotiScrapeError: If the client was created without a local_index.
+        """
+        if self.local_index is None:
+            raise SpotiScrapeError("search_local() needs a local index: SpotiScrape(sp_dc, local_index=SearchIndex())")
+
+        matches = self.local_index.search(query, filter, limit)
+
+        if fallback and (not matches or matches[0]['score'] < min_score):
+            self.index_entities(self.search(query, SEARCH_SECTIONS.get(filter)))
+            matches = self.local_index.search(query, filter, limit)
+
+        return matches
+
+    def index_entities(self, data):
+        """
+        Adds the catalog entities found in a response to the local index, if there is one.
+        """
+        if self.local_index is not None:
+            self.local_index.add_many(data)
+
+    def iter_search(self, query, filter='tracksV2', page_size=50, max_results=None):
+        """
+        Pages through one section of the search results.
+
+        Every page is a search() call, with its own call_timeout and span.
+
+        Args:
+            query (str): The search query.
+            filter (str, optional): The section to page through, e.g. tracksV2, albums, artists or playlists. Default is tracksV2.
+            page_size (int, optional): Number of results requested per page. Default is 50.
+            max_results (int, optional): Stop after this many results. Default is None (all).
+
+        Returns:
+            generator: The items of the section, page after page.
+        """
+        offset = 0
+        count = 0
+
+        while True:
+            section = self.search(query, filter, offset, page_size)[filter]
+            items = section.get('items') or section.get('itemsV2') or []
+
+            for item in items:
+                yield item
+                count += 1
+                if max_results is not None and count >= max_results:
+                    return
+
+            offset += len(items)
+            total = section.get('totalCount')
+            if len(items) < page_size or (total is not None and offset >= total):
+                return
+
+
+    @api_call
     def get_poster_url(self, trackURL):
         """
         Retrieves the poster URL for a track.
@@ -306,18 +645,11 @@ class SpotiScrape:
         """
 
         trackID = extract_id(trackURL)
-        params = {
-            'operationName': 'getTrack',
-            'variables': '{{"uri":"spotify:track:{}"}}'.format(trackID),
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"e101aead6d78faa11d75bec5e36385a07b2f1c4a0420932d374d89ee17c70dd6"}}',
-        }
+        operation = self.operations['getTrack']
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, uri='spotify:track:{}'.format(trackID))
         try:
-            response = response.json()
-            posterURL = response['data']['trackUnion']['albumOfTrack']['coverArt']['sources'][-1]['url']
-            return posterURL
+            return decode_path(response, operation.path + POSTER_URL_PATH)
         
         except Exception as e:
 
@@ -325,6 +657,7 @@ class SpotiScrape:
         
         
 
+    @api_call
     def get_lyrics(self, trackURL, format=None):
         """
         Retrieves lyrics for a track.
@@ -361,7 +694,7 @@ class SpotiScrape:
         if format == "lrc":
 
             try:
-                response = response.json()
+                response = decode_json(response)
 
                 new_lines = []
 
@@ -381,8 +714,9 @@ class SpotiScrape:
                 handle_exception(response, e, "Error parsing lyrics format. Check Track URL or response format.")
 
         else:
-            return response.json()
+            return decode_json(response)
 
+    @api_call
     def get_recommended_tracks(self, trackURL):
         """
         Retrieves recommended tracks based on the given track URL.
@@ -398,18 +732,12 @@ class SpotiScrape:
         """
 
         trackID = extract_id(trackURL)
-        params = {
-            'operationName': 'internalLinkRecommenderTrack',
-            'variables': '{{"uri":"spotify:track:{}","strategy":"ORGANIC_TRAFFIC"}}'.format(trackID),
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"97f52864d50ba62ab761a7bff47f1a9921d9e357316f7d60ad84ae3788eea4cf"}}',
-        }
+        operation = self.operations['internalLinkRecommenderTrack']
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, uri='spotify:track:{}'.format(trackID))
         
         try:
-            response = response.json()
-            return response['data']['seoRecommended']['items']
+            return decode_path(response, operation.path)
         except Exception as e:
 
             handle_exception(response, e, "Error retrieving recommended tracks. Check track URL or response format.")
@@ -418,6 +746,7 @@ class SpotiScrape:
 
 
         
+    @api_call
     def get_track_credits(self, trackURL):
         """
         Retrieves credits information for a track.
@@ -439,7 +768,7 @@ class SpotiScrape:
             f'https://spclient.wg.spotify.com/track-credits-view/v0/experimental/{trackID}/credits')
         
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         except Exception as e:
             handle_exception(response, e, "Error retrieving recommended tracks. Check track URL or response format.")
@@ -447,6 +776,7 @@ class SpotiScrape:
    
 
 
+    @api_call
     def get_artist_info(self, artistURL, filter=None, topTracks=None):
         """
         Retrieves artist information for the given artist URL.
@@ -464,36 +794,58 @@ class SpotiScrape:
         """
         artistID = extract_id(artistURL)
 
-        params = {
-            'operationName': 'queryArtistOverview',
-            'variables': '{{"uri":"spotify:artist:{}","locale":"","includePrerelease":false}}'.format(artistID),
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"35648a112beb1794e39ab931365f6ae4a8d45e65396d641eeda94e4003d41497"}}',
-        }
+        response = self.flights.do(('queryArtistOverview', artistID), self.query_artist_overview, artistID)
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
-        
-        try:
+        return self.filter_artist_info(response, filter, topTracks)
 
-            response = response.json()
+    @api_call
+    async def get_artist_info_async(self, artistURL, filter=None, topTracks=None):
+        """
+        Async version of get_artist_info. Concurrent calls for the same artist share one request.
+
+        Args:
+            artistURL (str): The URL of the artist.
+            filter (str, optional): Filter to narrow down the artist information. Default is None.
+            topTracks (bool, optional): Whether to retrieve the artist's top tracks. Default is None.
+
+        Returns:
+            dict or list: Artist information based on the provided options.
+        """
+        artistID = extract_id(artistURL)
+
+        response = await self.flights.do_async(('queryArtistOverview', artistID), self.query_artist_overview, artistID)
+
+        return self.filter_artist_info(response, filter, topTracks)
+
+    @api_call
+    def query_artist_overview(self, artistID):
+        operation = self.operations['queryArtistOverview']
+
+        response = self.query(operation, uri='spotify:artist:{}'.format(artistID))
+
+        try:
+            artist = decode_path(response, operation.path)
+            self.index_entities(artist)
+            return artist
 
-            if filter:
-                if filter in response['data']['artistUnion']:
-                    return response['data']['artistUnion'][filter]
-                else:
-                    raise SpotiScrapeError("Filter not Found in Response")
-            elif topTracks == True:
-                return response['data']['artistUnion']['discography']['topTracks']
-            else:
-                return response['data']['artistUnion']
-            
         except Exception as e:
-            
+
             handle_exception(response, e, "Error retrieving artist information. Check artist URL or response format.")
-            
-        
+
+    def filter_artist_info(self, artist, filter=None, topTracks=None):
+        if filter:
+            if filter in artist:
+                return artist[filter]
+            else:
+                raise SpotiScrapeError("Filter not Found in Response")
+        elif topTracks == True:
+            return artist['discography']['topTracks']
+        else:
+            return artist
+
 
 
+    @api_call
     def get_home_page_info(self):
         """
         Retrieves information about the user's home page.
@@ -508,25 +860,20 @@ class SpotiScrape:
 
         time_zone = get_current_timezone()
 
-        params = {
-            'operationName': 'home',
-            'variables': '{{"timeZone":"{}"}}'.format(time_zone),
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"3099d0901548aa93509318763519c57acd1a0bb533a9793ff57732fe8b91504a"}}',
-        }
+        operation = self.operations['home']
 
         data = {
 
         }
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, timeZone=time_zone)
         
         try:
 
-            response = response.json()
+            home = decode_path(response, operation.path)
 
-            data['greeting'] = response['data']['home']['greeting']
-            data['sections'] = response['data']['home']['sectionContainer']['sections']
+            data['greeting'] = home['greeting']
+            data['sections'] = home['sectionContainer']['sections']
 
         except Exception as e:
             handle_exception(response, e, "Error retrieving home page information. Check response format.")
@@ -535,6 +882,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def get_user_details(self):
         """
         Retrieves details of the authenticated user.
@@ -550,7 +898,7 @@ class SpotiScrape:
         response = self.session.get('https://api.spotify.com/v1/me')
 
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -560,6 +908,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def get_recently_played(self, offset=0, limit=50):
         """
         Retrieves recently played tracks for the authenticated user.
@@ -584,7 +933,7 @@ class SpotiScrape:
             'market': 'from_token',
         }
 
-        if offset and limit:
+        if offset is not None and limit is not None:
             params['offset'] = str(offset)
             params['limit'] = str(limit)
 
@@ -594,7 +943,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
 
             response = self.session.get(
                 f'https://spclient.wg.spotify.com/recently-played/v3/user/{userID}/recently-played',
@@ -606,6 +955,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def get_liked_songs(self, offset=0, limit=25):
         """
         Retrieves liked songs (library tracks) for the authenticated user.
@@ -622,23 +972,12 @@ class SpotiScrape:
         """
         self.session.headers.update({'app-platform': 'WebPlayer'})
 
-        params = {
-            'operationName': 'fetchLibraryTracks',
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"8474ec383b530ce3e54611fca2d8e3da57ef5612877838b8dbf00bd9fc692dfb"}}',
-        }
-
-        if offset and limit:
-            params['variables'] = '{{"offset":{},"limit":{}}}'.format(
-                offset, limit)
-
+        operation = self.operations['fetchLibraryTracks']
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, offset=int(offset), limit=int(limit))
         
         try:
-            response = response.json()
-
-            return response['data']['me']['library']['tracks']
+            return decode_path(response, operation.path)
         
         except Exception as e:
 
@@ -646,6 +985,27 @@ class SpotiScrape:
 
 
 
+    @api_call
+    def iter_liked_songs(self, offset=0, limit=25):
+        """
+        Streams liked songs (library tracks) one at a time while the response is still being read.
+
+        Args:
+            offset (int, optional): The offset for pagination. Default is 0.
+            limit (int, optional): The number of tracks to retrieve. Default is 25.
+
+        Returns:
+            generator: Liked songs (the entries of library.tracks.items), parsed one by one.
+        """
+        self.session.headers.update({'app-platform': 'WebPlayer'})
+
+        operation = self.operations['fetchLibraryTracks']
+
+        response = self.query(operation, stream=True, offset=int(offset), limit=int(limit))
+
+        return self.stream_items(response, operation.path + ('items',), "Error retrieving liked songs. Check response format.")
+
+    @api_call
     def get_playlist_info(self, playlistURL, offset=0, limit=25):
         """
         Retrieves playlist information for the given playlist URL.
@@ -665,22 +1025,14 @@ class SpotiScrape:
 
         self.session.headers.update({'app-platform': 'WebPlayer'})
 
-        params = {
-            'operationName': 'fetchPlaylist',
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"5534e86cc2181b9e70be86ae26d514abd8d828be2ee56e5f8b7882dd70204c62"}}',
-        }
-
-        if offset and limit:
-            params['variables'] = '{{"uri":"spotify:playlist:{}","offset":{},"limit":{}}}'.format(
-                playlistID, offset, limit)
+        operation = self.operations['fetchPlaylist']
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, uri='spotify:playlist:{}'.format(playlistID), offset=int(offset), limit=int(limit))
         
         try:
-            response = response.json()
-
-            return response['data']['playlistV2']
+            playlist = decode_path(response, operation.path)
+            self.index_entities(playlist)
+            return playlist
 
         except Exception as e:
 
@@ -688,6 +1040,64 @@ class SpotiScrape:
 
 
 
+    @api_call
+    def iter_playlist_items(self, playlistURL, offset=0, limit=25, typed=False, keep_raw=False):
+        """
+        Streams the items of a playlist page one at a time while the response is still being read.
+
+        Args:
+            playlistURL (str): URL of the playlist.
+            offset (int, optional): The offset for pagination. Default is 0.
+            limit (int, optional): The number of tracks to retrieve. Default is 25.
+            typed (bool, optional): Yield compact PlaylistItem models instead of dicts. Default is False.
+            keep_raw (bool, optional): With typed, also keep each item's JSON for PlaylistItem.raw, which takes about five times the memory. Default is False.
+
+        Returns:
+            generator: Playlist items (the entries of content.items), parsed one by one.
+
+        Raises:
+            SpotiScrapeError: If there's an issue retrieving playlist information or if the response format is unexpected.
+        """
+        playlistID = extract_id(playlistURL)
+
+        self.session.headers.update({'app-platform': 'WebPlayer'})
+
+        operation = self.operations['fetchPlaylist']
+
+        response = self.query(operation, stream=True, uri='spotify:playlist:{}'.format(playlistID), offset=int(offset), limit=int(limit))
+
+        items = self.stream_items(response, operation.path + ('content', 'items'), "Error retrieving playlist information. Check response format.")
+
+        if self.local_index is not None:
+            items = self.indexed(items)
+
+        if typed:
+            return (PlaylistItem.parse(item, keep_raw) for item in items)
+
+        return items
+
+    def indexed(self, items):
+        """
+        Passes items through, adding the entities they contain to the local index.
+        """
+        for item in items:
+            self.local_index.add_many(item)
+            yield item
+
+    def stream_items(self, response, path, error_message):
+        """
+        Yields the array elements at path from a streamed response, closing it once done.
+        """
+        if response.status_code != 200:
+            handle_exception(response, SpotiScrapeError("HTTP {}".format(response.status_code)), error_message)
+
+        try:
+            for item in iter_items(response.iter_content(STREAM_CHUNK_SIZE), path):
+                yield item
+        finally:
+            response.close()
+
+    @api_call
     def get_user_profile_details(self, userURL=None, limit=10):
         """
         Retrieves profile details for the given user URL or authenticated user.
@@ -726,13 +1136,14 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
 
         except Exception as e:
             handle_exception(response, e, "Error retrieving user profile details. Check response format.")
     
 
+    @api_call
     def get_top(self, type="tracks", offset=0, limit=10):
         """
         Retrieves the user's top tracks or artists.
@@ -769,7 +1180,7 @@ class SpotiScrape:
         
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -778,6 +1189,7 @@ class SpotiScrape:
    
 
 
+    @api_call
     def get_top_artists(self, offset=0, limit=10):
         """
         Retrieves the user's top artists.
@@ -794,6 +1206,7 @@ class SpotiScrape:
         """
         return self.get_top(type="artists", offset=offset, limit=limit)
 
+    @api_call
     def get_top_tracks(self, offset=0, limit=10):
         """
         Retrieves the user's top tracks.
@@ -810,6 +1223,7 @@ class SpotiScrape:
         """
         return self.get_top(type="tracks", offset=offset, limit=limit)
 
+    @api_call
     def get_connections(self, userURL=None, type=None):
         """
         Retrieves user's connections (followings or followers).
@@ -847,7 +1261,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -855,6 +1269,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error retrieving user's connections. Check track URL or response format.")
 
 
+    @api_call
     def artist_operation(self, artistURL, operation_name):
         """
         Perform a specific operation on an artist.
@@ -874,26 +1289,12 @@ class SpotiScrape:
 
         artistID = extract_id(artistURL)
 
-        json_data = {
-            'variables': {
-                'uris': [
-                    'spotify:artist:{}'.format(artistID),
-                ],
-            },
-            'operationName': operation_name,
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': '656c491c3f65d9d08d259be6632f4ef1931540ebcf766488ed17f76bb9156d15' if operation_name == "addToLibrary" else "1103bfd4b9d80275950bff95ef6d41a02cec3357e8f7ecd8974528043739677c",
-                },
-            },
-        }
+        operation = self.operations['addToLibrary' if operation_name == "addToLibrary" else 'removeFromLibrary']
 
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        response = self.mutate(operation, uris=['spotify:artist:{}'.format(artistID)])
         
         try:
-            response = response.json()
+            response = decode_json(response)
 
             return response
         
@@ -901,6 +1302,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error Performing Artist Operation. Check track URL or response format.")
 
 
+    @api_call
     def follow_artist(self, artistURL):
         """
         Follow an artist.
@@ -927,6 +1329,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def unfollow_artist(self, artistURL):
         """
         Unfollow an artist.
@@ -949,6 +1352,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error UnFollowing Artist. Check Artist URL or response format.")
 
 
+    @api_call
     def devices(self):
         """
         Get Devices Connected with the Authenticated Account.
@@ -984,7 +1388,7 @@ class SpotiScrape:
         )
 
         try:
-            response = response.json()
+            response = decode_json(response)
 
             return DeviceInfo(response)
         
@@ -994,6 +1398,7 @@ class SpotiScrape:
 
       
 
+    @api_call
     def get_artist_discography_all(self, artistURL, limit=0, offset=50):
         """
         Get the complete discography of an artist.
@@ -1013,29 +1418,21 @@ class SpotiScrape:
 
         artistID = extract_id(artistURL)
 
-        params = {
-            'operationName': 'queryArtistDiscographyAll',
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"35a699e12a728c1a02f5bf67121a50f87341e65054e13126c03b7697fbd26692"}}',
-        }
+        operation = self.operations['queryArtistDiscographyAll']
 
-        if offset and limit:
-            params['variables'] = '{{"uri":"spotify:artist:{}","offset":{},"limit":{}}}'.format(
-                artistID, offset, limit)
+        # a limit alone is enough: offset 0 is the first page, not "unset"
+        if limit:
+            response = self.query(operation, uri='spotify:artist:{}'.format(artistID), offset=int(offset or 0), limit=int(limit))
         else:
-            params['variables'] = '{{"uri":"spotify:artist:{}","offset":0,"limit":50}}'.format(
-                artistID)
-
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+            response = self.query(operation, uri='spotify:artist:{}'.format(artistID))
         
         try:
-            response = response.json()
-
-            return response['data']['artistUnion']['discography']
+            return decode_path(response, operation.path)
         
         except Exception as e:
             handle_exception(response, e, "Error retrieving artist discography. Check artist URL or response format.")
 
+    @api_call
     def get_track_metadata(self, trackURL):
         """
         Retrieve metadata for a specific track.
@@ -1049,15 +1446,34 @@ class SpotiScrape:
         Raises:
             SpotiScrapeError: If there's an error while retrieving track metadata.
         """
-        self.session.headers.update({'accept': 'application/json'})
+        trackID = extract_id(trackURL)
+
+        return self.flights.do(('metadata', trackID), self.query_track_metadata, trackID)
+
+    @api_call
+    async def get_track_metadata_async(self, trackURL):
+        """
+        Async version of get_track_metadata. Concurrent calls for the same track share one request.
+
+        Args:
+            trackURL (str): The URL of the track on Spotify.
 
+        Returns:
+            dict: A dictionary containing metadata information about the track.
+        """
         trackID = extract_id(trackURL)
 
+        return await self.flights.do_async(('metadata', trackID), self.query_track_metadata, trackID)
+
+    @api_call
+    def query_track_metadata(self, trackID):
+        self.session.headers.update({'accept': 'application/json'})
+
         params = {
             'market': 'from_token',
         }
 
-        gid = uri_to_gid(trackID)
+        gid = id_to_gid(trackID).hex()
 
         response = self.session.get(
             f'https://spclient.wg.spotify.com/metadata/4/track/{gid}',
@@ -1066,7 +1482,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -1074,6 +1490,7 @@ class SpotiScrape:
 
     
 
+    @api_call
     def get_cdnURL(self, fileID):
         """
         Retrieve the CDN URL for a given file ID.
@@ -1097,8 +1514,7 @@ class SpotiScrape:
         )
 
         try:
-            response = response.json()
-            return response['cdnurl'][-1]
+            return decode_path(response, ('cdnurl', -1))
         
         except Exception as e:
 
@@ -1107,6 +1523,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def get_file_id(self, trackURL, format=None):
         """
         Retrieve the file ID for a track's audio file.
@@ -1131,6 +1548,7 @@ class SpotiScrape:
         return fileID
 
 
+    @api_call
     def get_pssh(self, fileID):
         """
         Retrieve the PSSH data for a given file ID.
@@ -1144,19 +1562,18 @@ class SpotiScrape:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36',
         }
-        response = requests.get(
-            f'https://seektables.scdn.co/seektable/{fileID}.json', headers=headers)
+        response = self.session.get(
+            f'https://seektables.scdn.co/seektable/{fileID}.json', headers=headers, anonymous=True)
         
         try:
-            response = response.json()
-
-            return response['pssh']
+            return decode_path(response, ('pssh',))
         
         except Exception as e:
 
             handle_exception(response, e, "Error retrieving PSSH. Check track URL or response format.")
 
 
+    @api_call
     def get_streams(self, trackURL, format=None):
         """
         Get audio stream information for a track.
@@ -1173,6 +1590,7 @@ class SpotiScrape:
         cdnURL = self.get_cdnURL(fileID)
         return GetStreams(pssh, fileID, cdnURL)
 
+    @api_call
     def add_to_queue(self, trackURL):
 
         """
@@ -1210,13 +1628,14 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
 
             handle_exception(response, e, "Error Adding Track to Queue. Check track URL or response format.")
         
+    @api_call
     def move_items_in_playlist(self, playlistURL, trackURL, newPosition):
         """
         Move a track within a playlist to a new position.
@@ -1251,38 +1670,26 @@ class SpotiScrape:
 
         # print(new_position_uid)
 
-        json_data = {
-            'variables': {
-                'playlistUri': 'spotify:playlist:{}'.format(playlistID),
-                'uids': [
-                    track_to_move_uid,
-                ],
-                'newPosition': {
-                    'moveType': 'BEFORE_UID',
-                    'fromUid': new_position_uid,
-                },
-            },
-            'operationName': 'moveItemsInPlaylist',
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': '06f8c6722ac42c1669ba2cf19e44e9bc2caf303255a3ceeed758d4366c76742f',
-                },
+        response = self.mutate(
+            self.operations['moveItemsInPlaylist'],
+            playlistUri='spotify:playlist:{}'.format(playlistID),
+            uids=[track_to_move_uid],
+            newPosition={
+                'moveType': 'BEFORE_UID',
+                'fromUid': new_position_uid,
             },
-        }
-
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        )
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
             handle_exception(response, e, "Error Moving Track to New Position. Check track URL, playlistURL or response format.")
   
 
+    @api_call
     def reorder_items_in_playlist(self, playlistURL, oldPosition, newPosition):
 
         """
@@ -1310,31 +1717,18 @@ class SpotiScrape:
 
         # print(new_position_uid)
 
-        json_data = {
-            'variables': {
-                'playlistUri': 'spotify:playlist:{}'.format(playlistID),
-                'uids': [
-                    old_position_uid,
-                ],
-                'newPosition': {
-                    'moveType': 'BEFORE_UID',
-                    'fromUid': new_position_uid,
-                },
+        response = self.mutate(
+            self.operations['moveItemsInPlaylist'],
+            playlistUri='spotify:playlist:{}'.format(playlistID),
+            uids=[old_position_uid],
+            newPosition={
+                'moveType': 'BEFORE_UID',
+                'fromUid': new_position_uid,
             },
-            'operationName': 'moveItemsInPlaylist',
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': '06f8c6722ac42c1669ba2cf19e44e9bc2caf303255a3ceeed758d4366c76742f',
-                },
-            },
-        }
-
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        )
         
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -1343,6 +1737,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def liked_songs_operation(self, trackURL, operation_name):
 
         """
@@ -1360,26 +1755,12 @@ class SpotiScrape:
 
         #operation_name = addToLibrary or removeFromLibrary
 
-        json_data = {
-            'variables': {
-                'uris': [
-                    'spotify:track:{}'.format(trackID),
-                ],
-            },
-            'operationName': operation_name,
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': '1103bfd4b9d80275950bff95ef6d41a02cec3357e8f7ecd8974528043739677c' if operation_name == "removeFromLibrary" else "656c491c3f65d9d08d259be6632f4ef1931540ebcf766488ed17f76bb9156d15",
-                },
-            },
-        }
+        operation = self.operations['removeFromLibrary' if operation_name == "removeFromLibrary" else 'addToLibrary']
 
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        response = self.mutate(operation, uris=['spotify:track:{}'.format(trackID)])
         
         try:
-            response = response.json()
+            response = decode_json(response)
 
         except Exception as e:
 
@@ -1388,6 +1769,7 @@ class SpotiScrape:
         return response
 
 
+    @api_call
     def like_song(self, trackURL):
         """
         Like a song by adding it to your library.
@@ -1402,6 +1784,7 @@ class SpotiScrape:
 
         return res
 
+    @api_call
     def unlike_song(self, trackURL):
         """
         Unlike a song by removing it from your library.
@@ -1416,6 +1799,7 @@ class SpotiScrape:
 
         return res
 
+    @api_call
     def remove_track_from_playlist(self, trackURL, playlistURL):
         """
         Remove a track from a playlist.
@@ -1445,28 +1829,15 @@ class SpotiScrape:
                 track_to_remove_uid += track['uid']
                 break
 
-        json_data = {
-            'variables': {
-                'playlistUri': 'spotify:playlist:{}'.format(playlistID),
-                'uids': [
-                    track_to_remove_uid,
-                ],
-            },
-            'operationName': "removeFromPlaylist",
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': "c0202852f3743f013eb453bfa15637c9da2d52a437c528960f4d10a15f6dfb49",
-                },
-            },
-        }
-
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        response = self.mutate(
+            self.operations['removeFromPlaylist'],
+            playlistUri='spotify:playlist:{}'.format(playlistID),
+            uids=[track_to_remove_uid],
+        )
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -1474,6 +1845,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error Removing Track From Playlist. Check playlist URL or response format.")
 
 
+    @api_call
     def add_track_to_playlist(self, trackURL, playlistURL, positon=None):
 
         """
@@ -1500,38 +1872,25 @@ class SpotiScrape:
         playlistID = extract_id(playlistURL)
         trackID = extract_id(trackURL)
 
-        json_data = {
-            'variables': {
-                'uris': [
-                    'spotify:track:{}'.format(trackID),
-                ],
-                'playlistUri': 'spotify:playlist:{}'.format(playlistID),
-                'newPosition': {
-                    'moveType': '{}_OF_PLAYLIST'.format(position_suffix),
-                    'fromUid': None,
-                },
+        response = self.mutate(
+            self.operations['addToPlaylist'],
+            uris=['spotify:track:{}'.format(trackID)],
+            playlistUri='spotify:playlist:{}'.format(playlistID),
+            newPosition={
+                'moveType': '{}_OF_PLAYLIST'.format(position_suffix),
+                'fromUid': None,
             },
-            'operationName': 'addToPlaylist',
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': '200b7618afd05364c4aafb95e2070249ed87ee3f08fc4d2f1d5d04fdf1a516d9',
-                },
-            },
-        }
-
-
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        )
         
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
 
         except Exception as e:
 
             handle_exception(response, e, "Error Adding Track to Playlist. Check track URL or response format.")
 
+    @api_call
     def edit_playlist_details(self, playlistURL, newTitle, newDescription=None):
 
         """
@@ -1585,13 +1944,14 @@ class SpotiScrape:
         )
 
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
         
             handle_exception(response, e, "Error Editing Playlist Details. Check playlist URL or response format.")
 
+    @api_call
     def manage_player(self, trackURL, operation_name):
         """
         Manage the player's state (play or pause).
@@ -1634,7 +1994,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
 
         except Exception as e:
@@ -1644,6 +2004,7 @@ class SpotiScrape:
 
      
 
+    @api_call
     def play_song(self):
         """
         Play a song on the player.
@@ -1659,6 +2020,7 @@ class SpotiScrape:
 
         return res
 
+    @api_call
     def pause_song(self):
         """
         Pause a song on the player.
@@ -1674,6 +2036,7 @@ class SpotiScrape:
 
         return res
 
+    @api_call
     def pin_playlist(self, playlistURL):
         """
         Pin a playlist to your library.
@@ -1688,24 +2051,10 @@ class SpotiScrape:
 
         playlistID = extract_id(playlistURL)
 
-        json_data = {
-            'variables': {
-                'uri': 'spotify:playlist:{}'.format(playlistID),
-            },
-            'operationName': 'pinLibraryItem',
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': 'b90ca9015c5e9928a5a14d74fb5fd528255905c8aa607db449097332725caa8b',
-                },
-            },
-        }
-
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        response = self.mutate(self.operations['pinLibraryItem'], uri='spotify:playlist:{}'.format(playlistID))
         
         try:
-            response = response.json()
+            response = decode_json(response)
 
         except Exception as e:
             
@@ -1713,6 +2062,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def unpin_playlist(self, playlistURL):
 
         """
@@ -1729,24 +2079,10 @@ class SpotiScrape:
 
         playlistID = extract_id(playlistURL)
 
-        json_data = {
-            'variables': {
-                'uri': 'spotify:playlist:{}'.format(playlistID),
-            },
-            'operationName': 'unpinLibraryItem',
-            'extensions': {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': 'bb5cefe831e624d7d5daa76cf9c2d3bfebb2998a329ce595003cf59740ebd0d4',
-                },
-            },
-        }
-
-        response = self.session.post(
-            'https://api-partner.spotify.com/pathfinder/v1/query', json=json_data)
+        response = self.mutate(self.operations['unpinLibraryItem'], uri='spotify:playlist:{}'.format(playlistID))
         
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -1755,6 +2091,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def seek_player(self, seek_to):
         seek_to_sec = time_to_seconds(seek_to)
         json_data = {
@@ -1764,13 +2101,14 @@ class SpotiScrape:
             },
         }
 
-        response = self.session.post(
+        response = decode_json(self.session.post(
             'https://gae2-spclient.spotify.com/connect-state/v1/player/command/from/14bcc06b67c73b7e662e652c9d74875a606887e1/to/14bcc06b67c73b7e662e652c9d74875a606887e1',
             json=json_data,
-        ).json()
+        ))
 
         return response
 
+    @api_call
     def enable_repeat(self):
         """
         Enable repeating of the current context (album, playlist, etc.).
@@ -1796,7 +2134,7 @@ class SpotiScrape:
         )
         try:
 
-            response = response.json()
+            response = decode_json(response)
 
             return response
         
@@ -1806,6 +2144,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def enable_repeat_one(self):
         """
         Enable repeating of the current track.
@@ -1832,7 +2171,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
 
             return response
         
@@ -1841,6 +2180,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error Enabling Repeat of the current track on Player. Check response format.")
 
 
+    @api_call
     def disable_repeat(self):
         """
         Disable repeating of both context and track.
@@ -1867,7 +2207,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
 
             return response
         
@@ -1877,6 +2217,7 @@ class SpotiScrape:
 
 
 
+    @api_call
     def enable_shuffle(self):
         """
         Enable shuffling of the current context.
@@ -1902,7 +2243,7 @@ class SpotiScrape:
         
         try:
 
-            response = response.json()
+            response = decode_json(response)
 
             return response
         
@@ -1910,6 +2251,7 @@ class SpotiScrape:
 
             handle_exception(response, e, "Error Enabling Shuffle on Player. Check response format.")
     
+    @api_call
     def disable_shuffle(self):
         """
         Disable shuffling of the current context.
@@ -1935,7 +2277,7 @@ class SpotiScrape:
 
         try:
 
-            response = response.json()
+            response = decode_json(response)
 
             return response
         
@@ -1944,6 +2286,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error Disabling Shuffle on Player. Check response format.")
             
 
+    @api_call
     def get_public_playlists(self, userURL=None, offset=0, limit=200):
         """
         Get public playlists of a user.
@@ -1968,7 +2311,7 @@ class SpotiScrape:
             'market': 'from_token',
         }
 
-        if offset and limit:
+        if offset is not None and limit is not None:
             params['offset'] = str(offset)
             params['limit'] = str(limit)
 
@@ -1982,12 +2325,13 @@ class SpotiScrape:
         )
 
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
             handle_exception(response, e, "Error Getting Public Playlist of USER. Check user URL or response format.")
 
+    @api_call
     def get_account_info(self):
 
         self.session.headers.update({'app-platform': 'WebPlayer'})
@@ -2001,7 +2345,7 @@ class SpotiScrape:
         
         try:
 
-            response = response.json()
+            response = decode_json(response)
             return response
         
         except Exception as e:
@@ -2009,6 +2353,7 @@ class SpotiScrape:
             handle_exception(response, e, "Error retrieving Account Info of Authenticated. Check response format.")
 
 
+    @api_call
     def get_library(self, offset=0, limit=50):
 
         """
@@ -2023,32 +2368,42 @@ class SpotiScrape:
 
         self.session.headers.update({'app-platform': 'WebPlayer'})
 
-        params = {
-            'operationName': 'libraryV2',
-            'variables': '{"filters":[],"order":"Creator","textFilter":"","features":["LIKED_SONGS","YOUR_EPISODES"],"limit":50,"offset":0,"flatten":false,"expandedFolders":[],"folderUri":null,"includeFoldersWhenFlattening":true}',
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"93662a816ebf38ab32f6028512e584c53c4b71d6aad920ce6039a4a62236574e"}}',
-        }
+        operation = self.operations['libraryV2']
 
         if limit and offset:
-            variables_dict = json.loads(params['variables'])
-            variables_dict['limit'] = int(limit)
-            variables_dict['offset'] = int(offset)
-
-            updated_variables_json = json.dumps(variables_dict)
-
-            params['variables'] = updated_variables_json
-
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+            response = self.query(operation, limit=int(limit), offset=int(offset))
+        else:
+            response = self.query(operation)
         
         try:
-            response = response.json()
+            response = decode_json(response)
             return response
         except Exception as e:
             handle_exception(response, e, "Error retrieving Libraray Data of the autheticated user's account. Check response format.")
 
 
 
+    @api_call
+    def iter_library(self, offset=0, limit=50):
+        """
+        Streams the library items of the authenticated user one at a time while the response is still being read.
+
+        Args:
+            offset (int, optional): The offset for pagination. Default is 0.
+            limit (int, optional): The number of items to retrieve. Default is 50.
+
+        Returns:
+            generator: Library items (the entries of libraryV2.items), parsed one by one.
+        """
+        self.session.headers.update({'app-platform': 'WebPlayer'})
+
+        operation = self.operations['libraryV2']
+
+        response = self.query(operation, stream=True, limit=int(limit), offset=int(offset))
+
+        return self.stream_items(response, operation.path + ('items',), "Error retrieving Libraray Data of the autheticated user's account. Check response format.")
+
+    @api_call
     def are_artists_in_library(self, artistURLs):
         """
         Check if artists are in the user's library.
@@ -2060,35 +2415,23 @@ class SpotiScrape:
             dict: The JSON response indicating whether the tracks are in the library.
         """
 
-        params = {
-            'operationName': 'areArtistsInLibrary',
-            'variables': '{"uris":[]}',
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"bb7f6d46598f5a2d0148a6418ff148d8613112af87a55c4cb6df33d69acc3038"}}',
-        }
-
-        variables_dict = json.loads(params['variables'])
+        operation = self.operations['areArtistsInLibrary']
 
         if isinstance(artistURLs, str):
             artistURLs = artistURLs.split("+")
 
-        additional_uris = artistURLs
-        variables_dict['uris'].extend(additional_uris)
-        updated_variables_json = json.dumps(variables_dict)
-        params['variables'] = updated_variables_json
-
         data = {
             'data': []
         }
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, uris=list(artistURLs))
 
         try:
-            response = response.json()
-            for index in range(len(response['data']['artists'])):
+            artists = decode_path(response, operation.path)
+            for index in range(len(artists)):
                 artist_entry = {
                     '__typename': "Artist",
-                    'saved': response['data']['artists'][index]['saved'],
+                    'saved': artists[index]['saved'],
                     'id': extract_id(artistURLs[index])
                 }
                 data['data'].append(artist_entry)
@@ -2099,6 +2442,7 @@ class SpotiScrape:
 
             handle_exception(response, e, "Error Checking If Artists are in Library. Check artist URLs or response format.")
 
+    @api_call
     def are_tracks_in_library(self, trackURLs):
 
         """
@@ -2111,36 +2455,24 @@ class SpotiScrape:
             dict: The JSON response indicating whether the tracks are in the library.
         """
 
-        params = {
-            'operationName': 'areTracksInLibrary',
-            'variables': '{"uris":[]}',
-            'extensions': '{"persistedQuery":{"version":1,"sha256Hash":"2b51d510cac8d1262d8ed3d44af70e45a41b3c4d94c454483e779dcae6dc890e"}}',
-        }
-
-        variables_dict = json.loads(params['variables'])
+        operation = self.operations['areTracksInLibrary']
 
         if isinstance(trackURLs, str):
             trackURLs = trackURLs.split("+")
 
-        additional_uris = trackURLs
-        variables_dict['uris'].extend(additional_uris)
-        updated_variables_json = json.dumps(variables_dict)
-        params['variables'] = updated_variables_json
-
         data = {
             'data': []
         }
 
-        response = self.session.get(
-            'https://api-partner.spotify.com/pathfinder/v1/query', params=params)
+        response = self.query(operation, uris=list(trackURLs))
 
         try:
 
-            response = response.json()
-            for index in range(len(response['data']['tracks'])):
+            tracks = decode_path(response, operation.path)
+            for index in range(len(tracks)):
                 artist_entry = {
                     '__typename': "Track",
-                    'saved': response['data']['tracks'][index]['saved'],
+                    'saved': tracks[index]['saved'],
                     'id': extract_id(trackURLs[index])
                 }
                 data['data'].append(artist_entry)
@@ -0,0 +1,128 @@
+import collections, threading, time
+from .errors import CircuitOpenError
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks the recent outcomes of one host/operation pair and fails fast when too many of them failed.
+
+    Attributes:
+        state (str): "closed", "open" or "half_open".
+    """
+
+    def __init__(self, host, operation, error_rate=0.5, min_requests=10, window=20, open_timeout=30.0, half_open_requests=1):
+        self.host = host
+        self.operation = operation
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.open_timeout = open_timeout
+        self.half_open_requests = half_open_requests
+        self.outcomes = collections.deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        Raises CircuitOpenError if a request must not be sent right now.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return
+
+            now = time.monotonic()
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.open_timeout - now
+                if retry_in > 0:
+                    raise CircuitOpenError(self.host, self.operation, retry_in)
+                self.state = HALF_OPEN
+                self.probes = 0
+
+            if self.probes >= self.half_open_requests:
+                raise CircuitOpenError(self.host, self.operation, 0.0)
+            self.probes += 1
+
+    def release(self):
+        """
+        Gives back the probe taken by allow() for a request that was never sent, e.g. because it was cancelled.
+        """
+        with self.lock:
+            if self.state == HALF_OPEN and self.probes > 0:
+                self.probes -= 1
+
+    def record(self, success):
+        with self.lock:
+            if self.state == HALF_OPEN:
+                if success:
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                else:
+                    self.trip()
+                return
+
+            self.outcomes.append(success)
+            if len(self.outcomes) >= self.min_requests:
+                failures = self.outcomes.count(False)
+                if failures / len(self.outcomes) >= self.error_rate:
+                    self.trip()
+
+    def trip(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+
+
+class CircuitBreakers:
+    """
+    Keeps one CircuitBreaker per (host, operation) so a degraded endpoint family fails fast
+    without blocking requests to the others.
+
+    A request counts as failed when it raises a connection error or timeout, or returns a
+    5xx status. While a breaker is open, requests raise CircuitOpenError immediately; after
+    open_timeout a limited number of probe requests are let through to decide whether it closes.
+
+    Args:
+        error_rate (float, optional): Fraction of failures in the window that opens a breaker. Default is 0.5.
+        min_requests (int, optional): Requests needed in the window before the rate is evaluated. Default is 10.
+        window (int, optional): Number of most recent outcomes considered. Default is 20.
+        open_timeout (float, optional): Seconds a breaker stays open before probing. Default is 30.
+        half_open_requests (int, optional): Probe requests allowed while half-open. Default is 1.
+
+    Example:
+        breakers = CircuitBreakers(error_rate=0.3, open_timeout=10)
+        spotify = SpotiScrape(sp_dc, circuit_breakers=breakers)
+        breakers.states()  # {('spclient.wg.spotify.com', 'color-lyrics'): 'open'}
+    """
+
+    def __init__(self, error_rate=0.5, min_requests=10, window=20, open_timeout=30.0, half_open_requests=1):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.open_timeout = open_timeout
+        self.half_open_requests = half_open_requests
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, host, operation):
+        key = (host, operation)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.get(key)
+                if breaker is None:
+                    breaker = CircuitBreaker(host, operation, self.error_rate, self.min_requests, self.window,
+                                             self.open_timeout, self.half_open_requests)
+                    self.breakers[key] = breaker
+        return breaker
+
+    def states(self):
+        """
+        Returns the state of every breaker, keyed by (host, operation).
+        """
+        return {key: breaker.state for key, breaker in list(self.breakers.items())}
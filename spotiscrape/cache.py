@@ -0,0 +1,62 @@
+import collections, threading, time
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries expire after a fixed time.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries; the least recently used are evicted first. Default is 4096.
+        ttl (float, optional): Seconds an entry stays valid. Default is 600.
+
+    Note:
+        Cached values are shared between callers and must be treated as read-only.
+
+    Example:
+        cache = TTLCache(maxsize=100000, ttl=3600)
+        spotify = SpotiScrape(sp_dc, search_cache=cache)
+    """
+
+    def __init__(self, maxsize=4096, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if it is missing or expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        with self.lock:
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
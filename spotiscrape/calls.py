@@ -0,0 +1,61 @@
+import contextlib, functools
+from .deadline import Deadline, current_deadline
+
+
+# inspect.CO_GENERATOR and CO_COROUTINE; checked directly so neither asyncio nor inspect is imported
+CO_GENERATOR = 0x20
+CO_COROUTINE = 0x80
+
+
+def traced(client, method):
+    if client.tracer is None and client.profiler is None:
+        return contextlib.nullcontext()
+    return observed(client, method)
+
+
+@contextlib.contextmanager
+def observed(client, method):
+    with contextlib.ExitStack() as stack:
+        if client.tracer is not None:
+            stack.enter_context(client.tracer.span(method.__qualname__))
+        if client.profiler is not None:
+            stack.enter_context(client.profiler.call(method.__name__))
+        yield
+
+
+def api_call(method):
+    """
+    Decorator for public SpotiScrape methods.
+
+    Starts the client's default per-call Deadline (SpotiScrape.call_timeout) unless the call
+    already runs inside one, so nested and composite calls share a single budget. With a
+    tracer set, the call also runs inside a span that parents the spans of its requests,
+    and while a Profiler is active its time is broken down by category.
+
+    Generator functions are rejected: the deadline and span would close as soon as the
+    generator is created, before any of its requests. Decorate the method fetching one
+    page instead, as iter_search does with search().
+    """
+    if method.__code__.co_flags & CO_GENERATOR:
+        raise TypeError("api_call cannot wrap the generator function {}".format(method.__qualname__))
+
+    if method.__code__.co_flags & CO_COROUTINE:
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            with traced(self, method):
+                if self.call_timeout is None or current_deadline() is not None:
+                    return await method(self, *args, **kwargs)
+                with Deadline(self.call_timeout):
+                    return await method(self, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with traced(self, method):
+            if self.call_timeout is None or current_deadline() is not None:
+                return method(self, *args, **kwargs)
+            with Deadline(self.call_timeout):
+                return method(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,240 @@
+import base64, gzip, hashlib, io, json, random, re, threading, time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from .errors import CassetteMissError
+
+
+REDACTED = 'REDACTED'
+
+# JSON fields holding credentials, e.g. in /get_access_token and /v1/clienttoken responses
+SECRET_FIELDS = re.compile(
+    rb'("(?:accessToken|access_token|clientToken|client_token|refresh_token|token|sp_dc|sp_key)"\s*:\s*")[^"]*(")')
+
+# signed CDN URLs returned by storage-resolve
+SECRET_PARAMS = re.compile(rb'((?:__token__|hmac|token)=)[^"&\s]+')
+
+# response headers worth keeping; cookies and tracing headers are dropped
+KEPT_HEADERS = ('content-type', 'retry-after', 'location')
+
+
+def request_key(method, url, body=None):
+    """
+    Identity of a request in a cassette: method, redacted URL with sorted query parameters, and a digest of the body.
+    """
+    parts = urlsplit(redact(url.encode('utf-8')).decode('utf-8'))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    key = '{} {}'.format(method.upper(), urlunsplit((parts.scheme, parts.netloc, parts.path, query, '')))
+    if body:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key += ' ' + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+def redact(content):
+    return SECRET_PARAMS.sub(rb'\1' + REDACTED.encode(), SECRET_FIELDS.sub(rb'\1' + REDACTED.encode() + rb'\2', content))
+
+
+def open_cassette(path, mode):
+    """
+    Opens a cassette file as text, compressed according to its extension: .zst (requires zstandard), .gz or none.
+    """
+    if path.endswith('.zst'):
+        import zstandard
+
+        if mode == 'r':
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        else:
+            raw = zstandard.ZstdCompressor(level=10).stream_writer(open(path, mode + 'b'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+
+    return open(path, mode, encoding='utf-8')
+
+
+class Cassette:
+    """
+    Recorded request/response pairs, stored as compressed NDJSON and indexed by request key.
+
+    One line is written per exchange: the request key, method and URL, then the response
+    status, a few headers and the body (text, or base64 for binary bodies). Credentials are
+    redacted before anything is written: tokens in JSON bodies, signed CDN URL parameters
+    and all cookies and request headers. A key recorded several times is replayed in order.
+
+    Args:
+        path (str): The file. The extension selects the compression: .zst (requires zstandard), .gz or plain.
+
+    Example:
+        cassette = Cassette("playlist-export.ndjson.zst")
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.positions = {}
+        self.writer = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        with open_cassette(self.path, 'r') as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry['key'], []).append(entry)
+        return self
+
+    def append(self, key, request, response, content):
+        """
+        Redacts and writes one exchange, truncating the file on the first call.
+        """
+        content = redact(content or b'')
+        try:
+            body, encoding = content.decode('utf-8'), None
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+
+        entry = {
+            'key': key,
+            'method': request.method,
+            'url': redact(request.url.encode('utf-8')).decode('utf-8'),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: value for name, value in response.headers.items() if name.lower() in KEPT_HEADERS},
+            'body': body,
+            'encoding': encoding,
+            'elapsed': round(response.elapsed.total_seconds(), 4),
+        }
+        line = json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n'
+
+        with self.lock:
+            if self.writer is None:
+                self.writer = open_cassette(self.path, 'w')
+            self.writer.write(line)
+            self.entries.setdefault(key, []).append(entry)
+
+    def next(self, key):
+        """
+        Returns the next recorded entry for key (the last one repeats), or None.
+        """
+        with self.lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+            return entries[min(position, len(entries) - 1)]
+
+    def rewind(self):
+        with self.lock:
+            self.positions.clear()
+
+    def close(self):
+        with self.lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries.values())
+
+
+def build_response(request, entry):
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = entry.get('reason')
+    response.headers = CaseInsensitiveDict(entry.get('headers') or {})
+    body = entry['body']
+    response._content = base64.b64decode(body) if entry.get('encoding') == 'base64' else body.encode('utf-8')
+    response.headers['Content-Length'] = str(len(response._content))
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.raw = io.BytesIO(response._content)
+    return response
+
+
+class RecordingTransport(HTTPAdapter):
+    """
+    A requests transport adapter that sends requests normally and writes every exchange to a cassette.
+
+    Args:
+        cassette (Cassette or str): The cassette, or the path of a new one (an existing file is overwritten).
+
+    Example:
+        spotify = SpotiScrape(sp_dc, transport=RecordingTransport("export.ndjson.zst"))
+        spotify.get_playlist_info(playlistURL)
+        spotify.session.close()    # closes the cassette
+    """
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # reading the body here also loads streamed responses; they are served from memory afterwards
+        content = response.content
+        self.cassette.append(request_key(request.method, request.url, request.body), request, response, content)
+        return response
+
+    def close(self):
+        self.cassette.close()
+        super().close()
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    A requests transport adapter that serves responses from a cassette without any network access.
+
+    Args:
+        cassette (Cassette or str): The cassette, or the path of one to load.
+        latency (float, optional): Seconds added to every response. Default is 0. Pass "recorded" to reuse the recorded latencies.
+        jitter (float, optional): Extra random delay of up to this many seconds. Default is 0.
+        seed (int, optional): Seed of the jitter, for reproducible runs. Default is None.
+
+    Raises:
+        CassetteMissError: From send(), for a request that was not recorded.
+
+    Example:
+        spotify = SpotiScrape(sp_dc, transport=ReplayTransport("export.ndjson.zst", latency=0.05, jitter=0.02, seed=1))
+    """
+
+    def __init__(self, cassette, latency=0.0, jitter=0.0, seed=None):
+        super().__init__()
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette).load()
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.misses = 0
+
+    def delay(self, entry):
+        delay = entry.get('elapsed', 0.0) if self.latency == 'recorded' else self.latency
+        if self.jitter:
+            with self.random_lock:
+                delay += self.random.uniform(0, self.jitter)
+        return delay
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request.method, request.url, request.body)
+        entry = self.cassette.next(key)
+        if entry is None:
+            self.misses += 1
+            raise CassetteMissError(key)
+
+        delay = self.delay(entry)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout('Simulated latency of {:.3f}s exceeds the read timeout'.format(delay), request=request)
+        if delay:
+            time.sleep(delay)
+
+        return build_response(request, entry)
+
+    def close(self):
+        pass
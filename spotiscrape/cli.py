@@ -0,0 +1,274 @@
+import argparse, json, os, sys, time
+
+
+# the read-only data methods a job may call; mutations, player controls and client plumbing
+# (setup_headers, query, profile, crawl...) are not reachable from a job file
+DATA_METHODS = frozenset([
+    'get_account_info', 'get_artist_discography_all', 'get_artist_info', 'get_cdnURL', 'get_connections',
+    'get_file_id', 'get_home_page_info', 'get_library', 'get_liked_songs', 'get_lyrics', 'get_playlist_info',
+    'get_poster_url', 'get_pssh', 'get_public_playlists', 'get_recently_played', 'get_recommended_tracks',
+    'get_streams', 'get_top', 'get_top_artists', 'get_top_tracks', 'get_track_credits', 'get_track_info',
+    'get_track_metadata', 'get_user_details', 'get_user_profile_details',
+    'iter_library', 'iter_liked_songs', 'iter_playlist_items', 'iter_search',
+    'search', 'search_top_results', 'are_artists_in_library', 'are_tracks_in_library',
+])
+
+
+def parse_job(line, method=None):
+    """
+    Parses one job line: a JSON object {"method": ..., "args": [...] or {...}, "id": ...},
+    or, when method is given, a plain URL or id passed as the only argument.
+    """
+    if method is not None:
+        return {'method': method, 'args': [line]}
+
+    job = json.loads(line)
+    if not isinstance(job, dict) or not isinstance(job.get('method'), str):
+        raise ValueError('a job must be an object with a "method" name')
+    return job
+
+
+def read_jobs(lines, method=None):
+    """
+    Yields (line number, job or the exception raised while parsing it) for every non-empty,
+    non-comment line.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            yield number, parse_job(line, method)
+        except ValueError as e:
+            yield number, e
+
+
+def count_jobs(path):
+    if path == '-':
+        return None
+    with open(path, encoding='utf-8') as fh:
+        return sum(1 for line in fh if line.strip() and not line.lstrip().startswith('#'))
+
+
+def check_method(cls, name):
+    """
+    Raises ValueError unless name is a data method of the client class cls.
+    """
+    if name not in DATA_METHODS or not callable(getattr(cls, name, None)):
+        raise ValueError('unknown method {!r}'.format(name))
+
+
+def resolve(client, name):
+    """
+    Returns the SpotiScrape data method called name.
+    """
+    check_method(type(client), name)
+    return getattr(client, name)
+
+
+def materialize(result):
+    # generators (iter_* methods) are drained in the worker, not while writing
+    if hasattr(result, '__next__'):
+        return list(result)
+    return result
+
+
+def to_json(value):
+    """
+    json.dumps default for results that are not plain JSON: models, GetStreams, DeviceInfo.
+    """
+    from .models import Model
+
+    if isinstance(value, Model):
+        return value.raw if value._raw is not None else {'uri': value.uri}
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    if hasattr(value, '__dict__'):
+        return vars(value)
+    return repr(value)
+
+
+def run_job(client, job):
+    started = time.perf_counter()
+    try:
+        args = job.get('args') or []
+        kwargs = dict(job.get('kwargs') or {})
+        if isinstance(args, dict):
+            args, kwargs = [], dict(args, **kwargs)
+        elif not isinstance(args, list):
+            args = [args]
+        result = {'ok': True, 'result': materialize(resolve(client, job['method'])(*args, **kwargs))}
+    except Exception as e:
+        result = {'ok': False, 'error': error_info(e)}
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def error_info(error):
+    info = {'type': type(error).__name__, 'message': str(error)}
+    status = getattr(error, 'status', None)
+    if status is not None:
+        info['status'] = status
+    return info
+
+
+class Progress:
+    """
+    Counts finished jobs and rewrites a one-line status on stderr every interval seconds.
+    """
+
+    def __init__(self, total=None, interval=1.0, stream=sys.stderr):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.shown = 0.0
+        self.width = 0
+
+    def update(self, ok):
+        self.done += 1
+        self.failed += not ok
+        now = time.monotonic()
+        if self.interval is not None and now - self.shown >= self.interval:
+            self.shown = now
+            self.show(self.line(now))
+
+    def line(self, now=None):
+        elapsed = (now or time.monotonic()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        done = '{}/{}'.format(self.done, self.total) if self.total is not None else str(self.done)
+        eta = ''
+        if self.total and rate:
+            eta = '  eta {:.0f}s'.format((self.total - self.done) / rate)
+        return '{} jobs  {} failed  {:.1f} jobs/s  {:.1f}s{}'.format(done, self.failed, rate, elapsed, eta)
+
+    def finish(self):
+        if self.interval is not None:
+            self.show(self.line() + '\n')
+
+    def show(self, line):
+        # pad over the previous, possibly longer, line
+        self.width = max(self.width, len(line))
+        self.stream.write('\r' + line.ljust(self.width))
+        self.stream.flush()
+
+
+def run(client, jobs, output, workers=8, progress=None):
+    """
+    Runs jobs, an iterable of (line number, job), on a pool of workers and writes one JSON line
+    to output per job as it completes. At most twice as many jobs as workers are read ahead.
+
+    Returns:
+        dict: Number of jobs, failures, elapsed seconds and jobs per second.
+    """
+    import concurrent.futures
+
+    progress = progress or Progress(interval=None)
+    pending = set()
+
+    def write(done):
+        for future in done:
+            record = dict(future.job_info, **future.result())
+            try:
+                line = json.dumps(record, default=to_json, ensure_ascii=False)
+            except Exception as e:
+                # a result that cannot be serialized fails its job, not the run
+                record = dict(future.job_info, ok=False, error=error_info(e), seconds=record['seconds'])
+                line = json.dumps(record, default=repr, ensure_ascii=False)
+            output.write(line + '\n')
+            progress.update(record['ok'])
+        output.flush()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='spotiscrape-job') as pool:
+        for number, job in jobs:
+            if isinstance(job, Exception):
+                output.write(json.dumps({'line': number, 'ok': False, 'error': error_info(job)}) + '\n')
+                progress.update(False)
+                continue
+
+            if len(pending) >= workers * 2:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                write(done)
+
+            future = pool.submit(run_job, client, job)
+            future.job_info = {'line': number, 'id': job.get('id'), 'method': job['method'], 'args': job.get('args')}
+            pending.add(future)
+
+        write(concurrent.futures.wait(pending).done)
+
+    elapsed = time.monotonic() - progress.started
+    return {
+        'jobs': progress.done,
+        'failed': progress.failed,
+        'seconds': round(elapsed, 3),
+        'jobs_per_second': round(progress.done / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='spotiscrape', description='Runs a file of jobs against the SpotiScrape methods and writes NDJSON results.',
+        epilog='Job lines look like {"method": "get_track_info", "args": ["<track url>"], "id": "optional"}; '
+               'args may also be an object of keyword arguments. With --method, every line is a URL or id instead.')
+    parser.add_argument('jobs', help='NDJSON job file, or a list of URLs with --method; "-" reads stdin')
+    parser.add_argument('-m', '--method', help='SpotiScrape method called with every line of a URL list')
+    parser.add_argument('-o', '--output', default='-', help='results file (NDJSON); default is stdout')
+    parser.add_argument('--sp-dc', default=os.environ.get('SPOTIFY_SP_DC'), help='sp_dc cookie; default is $SPOTIFY_SP_DC')
+    parser.add_argument('-w', '--workers', type=int, default=8, help='concurrent jobs; default is 8')
+    parser.add_argument('--rate', type=float, help='starting requests per second per host (adaptive); default is no limit')
+    parser.add_argument('--call-timeout', type=float, help='seconds allowed for each job, retries included')
+    parser.add_argument('--progress', type=float, default=1.0, help='seconds between progress updates on stderr; default is 1')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress or summary on stderr')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    if not options.sp_dc:
+        parser.error('an sp_dc cookie is required: pass --sp-dc or set SPOTIFY_SP_DC')
+
+    # the client (and requests) is only imported once the arguments are valid, so --help stays instant
+    from .api import SpotiScrape
+    from .ratelimit import RateLimiter
+
+    # checked on the class: building the client already authenticates
+    if options.method is not None:
+        try:
+            check_method(SpotiScrape, options.method)
+        except ValueError as e:
+            parser.error(str(e))
+
+    limiter = RateLimiter(rate=options.rate) if options.rate else None
+    client = SpotiScrape(options.sp_dc, rate_limiter=limiter, call_timeout=options.call_timeout)
+
+    source = sys.stdin if options.jobs == '-' else open(options.jobs, encoding='utf-8')
+    output = sys.stdout if options.output == '-' else open(options.output, 'w', encoding='utf-8')
+    progress = Progress(total=count_jobs(options.jobs), interval=None if options.quiet else options.progress)
+
+    try:
+        summary = run(client, read_jobs(source, options.method), output, options.workers, progress)
+    except KeyboardInterrupt:
+        summary = None
+    finally:
+        if not options.quiet:
+            progress.finish()
+        client.session.close()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if summary is None:
+        return 130
+    if not options.quiet:
+        sys.stderr.write('{jobs} jobs, {failed} failed in {seconds}s ({jobs_per_second} jobs/s)\n'.format(**summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import contextvars, threading, time
+from .errors import DeadlineExceededError, RequestCancelledError
+
+
+_current = contextvars.ContextVar('spotiscrape_deadline', default=None)
+
+
+def current_deadline():
+    """
+    Returns the Deadline active in the current thread or task, or None.
+    """
+    return _current.get()
+
+
+class Deadline:
+    """
+    A time budget shared by every request made while it is active, which can also be cancelled.
+
+    Deadlines are activated with a with-block and propagate to nested SpotiScrape calls, so a
+    composite call such as get_streams spends one budget across its metadata, seektable and
+    storage-resolve requests, including their retries. A nested deadline never outlives the
+    one it is nested in. cancel() may be called from any thread or task.
+
+    Args:
+        timeout (float, optional): Seconds until the deadline expires. Default is None (no time limit, cancellation only).
+
+    Example:
+        with spotify.deadline(2.5) as call:
+            spotify.get_streams(trackURL)
+
+        # from another thread
+        call.cancel()
+    """
+
+    def __init__(self, timeout=None):
+        self.parent = current_deadline()
+        self.expires = time.monotonic() + timeout if timeout is not None else None
+        if self.parent is not None and self.parent.expires is not None:
+            self.expires = self.parent.expires if self.expires is None else min(self.expires, self.parent.expires)
+        self.cancelled = False
+        self.waiters = set()
+        self.lock = threading.Lock()
+        self.tokens = []
+
+    def __enter__(self):
+        self.tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self.tokens.pop())
+        return False
+
+    def remaining(self):
+        """
+        Returns the seconds left, or None if the deadline has no time limit.
+        """
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def is_cancelled(self):
+        deadline = self
+        while deadline is not None:
+            if deadline.cancelled:
+                return True
+            deadline = deadline.parent
+        return False
+
+    def cancel(self):
+        """
+        Cancels every request made under this deadline. Blocked callers raise RequestCancelledError.
+        """
+        with self.lock:
+            self.cancelled = True
+            waiters = list(self.waiters)
+        for event in waiters:
+            event.set()
+
+    def check(self):
+        """
+        Raises RequestCancelledError or DeadlineExceededError if no more requests may be made.
+        """
+        if self.is_cancelled():
+            raise RequestCancelledError("Request cancelled")
+        if self.expires is not None and time.monotonic() >= self.expires:
+            raise DeadlineExceededError("Deadline exceeded")
+
+    def watch(self, event):
+        deadline = self
+        while deadline is not None:
+            with deadline.lock:
+                deadline.waiters.add(event)
+            deadline = deadline.parent
+
+    def unwatch(self, event):
+        deadline = self
+        while deadline is not None:
+            with deadline.lock:
+                deadline.waiters.discard(event)
+            deadline = deadline.parent
+
+    def wait(self, event, timeout=None):
+        """
+        Waits for event for at most timeout seconds, waking early if the deadline expires or is cancelled.
+
+        Returns:
+            bool: Whether the event is set.
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        self.watch(event)
+        try:
+            if self.is_cancelled():
+                event.set()
+            return event.wait(timeout)
+        finally:
+            self.unwatch(event)
+
+    def sleep(self, seconds):
+        self.wait(threading.Event(), seconds)
+        self.check()
+
+    def bound(self, timeout):
+        """
+        Shrinks a requests timeout (a number or a (connect, read) tuple) to the time left.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if value is None else min(value, remaining) for value in timeout)
+        return min(timeout, remaining)
@@ -0,0 +1,97 @@
+import json, time
+from .profiling import current_frame, DECODE
+
+
+# None until the first decode: importing orjson costs more than the rest of the package
+_loads = None
+
+
+def default_loads():
+    """
+    Returns orjson.loads when orjson is installed, json.loads otherwise.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def set_json_decoder(loads=None):
+    """
+    Replaces the function used to decode every JSON response body.
+
+    Args:
+        loads (callable, optional): Function taking the raw response bytes and returning Python objects.
+            Default is None, which restores the built-in decoder (orjson when installed, json otherwise).
+
+    Example:
+        import simdjson
+        set_json_decoder(lambda data: simdjson.Parser().parse(data).as_dict())
+    """
+    global _loads
+    _loads = loads
+
+
+def get_json_decoder():
+    """
+    Returns the function currently used to decode JSON bytes.
+    """
+    global _loads
+    if _loads is None:
+        _loads = default_loads()
+    return _loads
+
+
+def decode_json(response):
+    """
+    Decodes a response body straight from its bytes, skipping requests' text decoding.
+
+    Args:
+        response (requests.Response): The response to decode.
+
+    Returns:
+        The decoded JSON document.
+    """
+    loads = _loads or get_json_decoder()
+    frame = current_frame()
+    if frame is None:
+        return loads(response.content)
+
+    started = time.perf_counter()
+    try:
+        return loads(response.content)
+    finally:
+        frame.add(DECODE, time.perf_counter() - started)
+
+
+def extract(data, path):
+    """
+    Walks a decoded document along path, a sequence of dict keys and list indices.
+
+    Example:
+        extract(data, ('data', 'trackUnion', 'albumOfTrack', 'coverArt', 'sources', -1, 'url'))
+    """
+    for key in path:
+        data = data[key]
+    return data
+
+
+def decode_path(response, path):
+    """
+    Returns only the value found at path in a response, without decoding the rest of it.
+
+    The siblings of every key on the path are skipped in the raw bytes (see streaming.project),
+    so only the value at path is turned into Python objects.
+    """
+    from .streaming import project
+
+    frame = current_frame()
+    if frame is None:
+        return project(response.content, path)
+
+    started = time.perf_counter()
+    try:
+        return project(response.content, path)
+    finally:
+        frame.add(DECODE, time.perf_counter() - started)
@@ -1,2 +1,114 @@
 class SpotiScrapeError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenError(SpotiScrapeError):
+    """
+    Raised without sending a request while the circuit breaker for its host and operation is open.
+
+    Attributes:
+        host (str): Host the request was meant for.
+        operation (str): Operation the request was meant to perform.
+        retry_in (float): Seconds until the breaker lets a probe request through.
+    """
+
+    def __init__(self, host, operation, retry_in):
+        self.host = host
+        self.operation = operation
+        self.retry_in = retry_in
+        super().__init__("Circuit open for {} ({}). Retry in {:.1f}s".format(operation, host, retry_in))
+
+
+class DeadlineExceededError(SpotiScrapeError):
+    """
+    Raised when a call runs out of its time budget before or while waiting for a response.
+    """
+    pass
+
+
+class RequestCancelledError(SpotiScrapeError):
+    """
+    Raised when a call is cancelled through its Deadline from another thread or task.
+    """
+    pass
+
+class ResponseError(SpotiScrapeError):
+    """
+    Raised when a response is an error or lacks the expected data.
+
+    The body is kept as a truncated byte string and only decoded when read, so raising
+    is cheap even for large responses.
+
+    Attributes:
+        message (str): What the call was trying to do.
+        status (int): HTTP status code, or None if unknown.
+        operation (str): Pathfinder operationName or endpoint of the request, or None if unknown.
+        url (str): URL of the request, or None if unknown.
+        body (str): The first bytes of the response body, decoded.
+    """
+
+    def __init__(self, message, status=None, operation=None, url=None, body=b''):
+        self.message = message
+        self.status = status
+        self.operation = operation
+        self.url = url
+        self.raw_body = body
+        super().__init__(message)
+
+    @property
+    def body(self):
+        if isinstance(self.raw_body, bytes):
+            return self.raw_body.decode('utf-8', 'replace')
+        return self.raw_body
+
+    def __str__(self):
+        details = []
+        if self.status:
+            details.append('HTTP {}'.format(self.status))
+        if self.operation:
+            details.append(self.operation)
+        if not details:
+            return self.message
+        return '{} ({})'.format(self.message, ', '.join(details))
+
+
+class AuthenticationError(ResponseError):
+    """
+    Raised for 401 and 403 responses: the sp_dc cookie or access token is invalid or expired.
+    """
+    pass
+
+
+class NotFoundError(ResponseError):
+    """
+    Raised for 404 responses, usually a wrong or unavailable URL or id.
+    """
+    pass
+
+
+class RateLimitedError(ResponseError):
+    """
+    Raised for 429 responses that were not retried.
+    """
+    pass
+
+
+class ServerError(ResponseError):
+    """
+    Raised for 5xx responses that were not retried.
+    """
+    pass
+
+
+
+class CassetteMissError(SpotiScrapeError):
+    """
+    Raised by ReplayTransport for a request that is not in its cassette.
+
+    Attributes:
+        key (str): The request key that was looked up.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        super().__init__("Request not recorded in cassette: {}".format(key))
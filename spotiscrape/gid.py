@@ -0,0 +1,398 @@
+import array, bisect, math, sys
+
+
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+ID_LENGTH = 22
+GID_LENGTH = 16
+
+# ids are decoded and encoded two characters (one base-3844 digit) at a time
+PAIRS = [a + b for a in ALPHABET for b in ALPHABET]
+PAIR_VALUES = {pair: value for value, pair in enumerate(PAIRS)}
+PAIR_BASE = len(PAIRS)
+
+# translates id characters to their digit values, anything else to INVALID_DIGIT
+INVALID_DIGIT = 0xff
+DIGIT_TABLE = bytes(ALPHABET.index(char) if char in ALPHABET else INVALID_DIGIT for char in map(chr, range(256)))
+
+SLOT_LENGTH = 18
+BATCH_SIZE = 8192
+
+PREFIX_LENGTH = 4
+PREFIX_TYPECODE = 'I' if array.array('I').itemsize == PREFIX_LENGTH else 'L'
+
+
+def id_to_int(id):
+    """
+    Decodes a 22-character base62 Spotify id into its 128-bit integer.
+
+    Raises:
+        ValueError: If the id has the wrong length, contains characters outside the alphabet or exceeds 128 bits.
+    """
+    if len(id) != ID_LENGTH:
+        raise ValueError("Invalid Spotify id: {!r}".format(id))
+
+    v, b = PAIR_VALUES, PAIR_BASE
+    try:
+        n = v[id[0:2]]
+        n = n * b + v[id[2:4]]
+        n = n * b + v[id[4:6]]
+        n = n * b + v[id[6:8]]
+        n = n * b + v[id[8:10]]
+        n = n * b + v[id[10:12]]
+        n = n * b + v[id[12:14]]
+        n = n * b + v[id[14:16]]
+        n = n * b + v[id[16:18]]
+        n = n * b + v[id[18:20]]
+        n = n * b + v[id[20:22]]
+    except KeyError:
+        raise ValueError("Invalid Spotify id: {!r}".format(id)) from None
+
+    if n >> 128:
+        raise ValueError("Invalid Spotify id: {!r}".format(id))
+    return n
+
+
+def int_to_id(n):
+    """
+    Encodes a 128-bit integer as a 22-character base62 Spotify id.
+    """
+    p, b = PAIRS, PAIR_BASE
+    n, a = divmod(n, b)
+    n, c = divmod(n, b)
+    n, d = divmod(n, b)
+    n, e = divmod(n, b)
+    n, f = divmod(n, b)
+    n, g = divmod(n, b)
+    n, h = divmod(n, b)
+    n, i = divmod(n, b)
+    n, j = divmod(n, b)
+    n, k = divmod(n, b)
+    return p[n] + p[k] + p[j] + p[i] + p[h] + p[g] + p[f] + p[e] + p[d] + p[c] + p[a]
+
+
+def id_to_gid(id):
+    """
+    Converts a Spotify id to its 16-byte gid.
+
+    Example:
+        id_to_gid("4uLU6hMCjMI75M1A2tKUQC").hex()  # "93bc414a606747b2b612491ef83d5a3e"
+    """
+    return id_to_int(id).to_bytes(GID_LENGTH, 'big')
+
+
+def gid_to_id(gid):
+    """
+    Converts a 16-byte gid back to its Spotify id.
+    """
+    return int_to_id(int.from_bytes(gid, 'big'))
+
+
+def pack_batch(ids):
+    """
+    Converts a batch of valid ids with a handful of big-integer operations instead of per-id math.
+
+    Every id gets an 18-byte slot in one large integer. Horner's rule then runs once per
+    character position over all slots at the same time: the digits of that position are
+    written into the low byte of every slot, and the whole number is multiplied by 62 and
+    added to. Each slot ends up holding its id's value, which is at most 131 bits, so the
+    two spare bytes of a slot absorb any invalid id without spilling into its neighbour.
+
+    Returns None if any id is malformed, so the caller can report it.
+    """
+    count = len(ids)
+    try:
+        digits = ''.join(ids).encode('ascii').translate(DIGIT_TABLE)
+    except (TypeError, UnicodeEncodeError):
+        return None
+    if len(digits) != ID_LENGTH * count or set(map(len, ids)) != {ID_LENGTH} or INVALID_DIGIT in digits:
+        return None
+
+    column = bytearray(SLOT_LENGTH * count)
+    n = 0
+    for position in range(ID_LENGTH):
+        column[SLOT_LENGTH - 1::SLOT_LENGTH] = digits[position::ID_LENGTH]
+        n = n * 62 + int.from_bytes(column, 'big')
+
+    slots = n.to_bytes(SLOT_LENGTH * count, 'big')
+    if slots[0::SLOT_LENGTH].count(0) != count or slots[1::SLOT_LENGTH].count(0) != count:
+        return None
+
+    packed = bytearray(GID_LENGTH * count)
+    for index in range(GID_LENGTH):
+        packed[index::GID_LENGTH] = slots[SLOT_LENGTH - GID_LENGTH + index::SLOT_LENGTH]
+    return bytes(packed)
+
+
+def ids_to_gids(ids):
+    """
+    Converts many Spotify ids at once.
+
+    Args:
+        ids (iterable): Spotify ids.
+
+    Returns:
+        bytes: The gids packed back to back, 16 bytes each, in input order.
+
+    Raises:
+        ValueError: If any id is invalid.
+    """
+    ids = list(ids)
+    parts = []
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        packed = pack_batch(batch)
+        if packed is None:
+            # raises for the first invalid id
+            packed = b''.join([id_to_gid(id) for id in batch])
+        parts.append(packed)
+    return b''.join(parts)
+
+
+def iter_gids(gids):
+    """
+    Yields the 16-byte gids of a packed buffer (bytes, bytearray or memoryview) or an iterable of gids.
+    """
+    if isinstance(gids, (bytes, bytearray, memoryview)):
+        gids = bytes(gids)
+        if len(gids) % GID_LENGTH:
+            raise ValueError("Packed gids must be a multiple of {} bytes".format(GID_LENGTH))
+        for offset in range(0, len(gids), GID_LENGTH):
+            yield gids[offset:offset + GID_LENGTH]
+    else:
+        yield from gids
+
+
+def gids_to_ids(gids):
+    """
+    Converts many gids at once.
+
+    Args:
+        gids (bytes or iterable): Packed gids as returned by ids_to_gids(), or an iterable of 16-byte gids.
+
+    Returns:
+        list: The Spotify ids, in input order.
+    """
+    to_id = int_to_id
+    from_bytes = int.from_bytes
+    return [to_id(from_bytes(gid, 'big')) for gid in iter_gids(gids)]
+
+
+class GidSet:
+    """
+    A set of Spotify gids stored as one sorted, packed bytes buffer.
+
+    Each member costs 20 bytes (the gid plus a 4-byte search prefix) instead of the ~120
+    bytes of an id string in a set. New members are collected in a small pending set and
+    spliced into the buffer in batches. Lookups bisect the prefix array, which runs in C,
+    and then compare the few gids sharing that prefix.
+
+    Args:
+        ids (iterable, optional): Spotify ids or 16-byte gids to start with.
+        merge_threshold (int, optional): Minimum number of pending gids before a merge. Default is 65536.
+
+    Example:
+        seen = GidSet(trackIDs)
+        if "4uLU6hMCjMI75M1A2tKUQC" in seen:
+            ...
+        seen.to_bytes()  # persist, then GidSet.from_bytes(data)
+    """
+
+    def __init__(self, ids=(), merge_threshold=65536):
+        self.data = b''
+        self.prefixes = array.array(PREFIX_TYPECODE)
+        self.pending = set()
+        self.merge_threshold = merge_threshold
+        self.update(ids)
+
+    @classmethod
+    def from_gids(cls, gids):
+        """
+        Builds a set from packed gids or an iterable of 16-byte gids.
+        """
+        gid_set = cls()
+        gid_set.data = b''.join(sorted(set(iter_gids(gids))))
+        gid_set.index()
+        return gid_set
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Restores a set saved with to_bytes().
+        """
+        if len(data) % GID_LENGTH:
+            raise ValueError("Packed gids must be a multiple of {} bytes".format(GID_LENGTH))
+        gid_set = cls()
+        gid_set.data = bytes(data)
+        gid_set.index()
+        return gid_set
+
+    def to_bytes(self):
+        """
+        Returns the members as sorted, packed 16-byte gids.
+        """
+        self.merge()
+        return self.data
+
+    @staticmethod
+    def to_gid(value):
+        if isinstance(value, (bytes, bytearray)) and len(value) == GID_LENGTH:
+            return bytes(value)
+        return id_to_gid(value)
+
+    def add(self, value):
+        """
+        Adds a Spotify id or a 16-byte gid.
+        """
+        gid = self.to_gid(value)
+        if gid not in self.pending and not self.search(gid)[1]:
+            self.pending.add(gid)
+            if len(self.pending) >= max(self.merge_threshold, len(self.prefixes) // 4):
+                self.merge()
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self):
+        """
+        Splices the pending gids into the sorted buffer.
+        """
+        if not self.pending:
+            return
+
+        data = self.data
+        parts = []
+        start = 0
+        for gid in sorted(self.pending):
+            offset = self.search(gid)[0] * GID_LENGTH
+            parts.append(data[start:offset])
+            parts.append(gid)
+            start = offset
+        parts.append(data[start:])
+
+        self.data = b''.join(parts)
+        self.pending = set()
+        self.index()
+
+    def index(self):
+        """
+        Rebuilds the array of big-endian 4-byte gid prefixes used for bisecting.
+        """
+        count = len(self.data) // GID_LENGTH
+        prefixes = bytearray(PREFIX_LENGTH * count)
+        for index in range(PREFIX_LENGTH):
+            prefixes[index::PREFIX_LENGTH] = self.data[index::GID_LENGTH]
+
+        self.prefixes = array.array(PREFIX_TYPECODE, bytes(prefixes))
+        if sys.byteorder == 'little':
+            self.prefixes.byteswap()
+
+    def search(self, gid):
+        """
+        Looks gid up in the buffer. Returns (index, found), index being where it is or would be inserted.
+        """
+        prefix = int.from_bytes(gid[:PREFIX_LENGTH], 'big')
+        low = bisect.bisect_left(self.prefixes, prefix)
+        high = bisect.bisect_right(self.prefixes, prefix, low)
+
+        data = self.data
+        while low < high:
+            offset = low * GID_LENGTH
+            member = data[offset:offset + GID_LENGTH]
+            if member >= gid:
+                return low, member == gid
+            low += 1
+        return low, False
+
+    def __contains__(self, value):
+        try:
+            gid = self.to_gid(value)
+        except (TypeError, ValueError):
+            return False
+        return gid in self.pending or self.search(gid)[1]
+
+    def __len__(self):
+        return len(self.prefixes) + len(self.pending)
+
+    def __iter__(self):
+        self.merge()
+        return iter_gids(self.data)
+
+    def ids(self):
+        """
+        Yields the members as Spotify ids.
+        """
+        for gid in self:
+            yield gid_to_id(gid)
+
+    def __repr__(self):
+        return 'GidSet({} gids)'.format(len(self))
+
+
+class BloomFilter:
+    """
+    A fixed-size probabilistic set of Spotify gids: no false negatives, and false positives
+    at about error_rate once capacity members have been added.
+
+    Memory does not grow with the members: about 1.8 bytes per member of capacity at
+    error_rate=0.001, against 20 for a GidSet. Gids are uniformly distributed, so the bit
+    positions are taken from the gid itself (double hashing of its two halves) without a
+    hash function.
+
+    Args:
+        capacity (int): Expected number of members.
+        error_rate (float, optional): Target false positive rate at capacity. Default is 0.001.
+
+    Example:
+        seen = BloomFilter(50000000, error_rate=0.001)    # ~86 MiB
+        seen.add("4uLU6hMCjMI75M1A2tKUQC")
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = int(capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        gid = GidSet.to_gid(value)
+        first = int.from_bytes(gid[:8], 'big')
+        second = int.from_bytes(gid[8:], 'big') | 1
+        size = self.size
+        return [(first + index * second) % size for index in range(self.hashes)]
+
+    def add(self, value):
+        """
+        Adds a Spotify id or a 16-byte gid. Returns False if it was (probably) already a member.
+        """
+        bits = self.bits
+        added = False
+        for position in self.positions(value):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value):
+        try:
+            positions = self.positions(value)
+        except (TypeError, ValueError):
+            return False
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def __len__(self):
+        # members added, less the ones mistaken for existing members
+        return self.count
+
+    def __repr__(self):
+        return 'BloomFilter({} of {} gids, {:.1f} MiB)'.format(self.count, self.capacity, len(self.bits) / 2 ** 20)
\ No newline at end of file
@@ -0,0 +1,222 @@
+import collections, contextvars, os, shutil, tempfile, time
+from .gid import GidSet, BloomFilter, GID_LENGTH, iter_gids, gid_to_id, id_to_gid
+from .utils import extract_id
+
+
+RELATED, RECOMMENDED = 'related', 'recommended'
+
+Edge = collections.namedtuple('Edge', ['source', 'target', 'kind', 'depth'])
+Edge.__doc__ = """
+One edge of the artist graph.
+
+Attributes:
+    source (str): Id of the artist the edge was found on.
+    target (str): Id of the related or recommended artist.
+    kind (str): "related" (relatedContent.relatedArtists) or "recommended" (artists of get_recommended_tracks
+        for the source's top tracks).
+    depth (int): Depth of the source; seeds are at depth 0.
+"""
+
+# gids read from a frontier file at a time
+FRONTIER_CHUNK = 4096
+
+
+def artist_uris(items):
+    """
+    Yields the artist URIs of relatedArtists items, or of the artists of recommended track items.
+    """
+    for item in items or ():
+        item = item.get('data', item) if isinstance(item, dict) else None
+        if not item:
+            continue
+        uri = item.get('uri') or ''
+        if uri.startswith('spotify:artist:'):
+            yield uri
+            continue
+        for artist in (item.get('artists') or {}).get('items') or ():
+            if (artist.get('uri') or '').startswith('spotify:artist:'):
+                yield artist['uri']
+
+
+class Frontier:
+    """
+    The nodes of one BFS level, appended to and read back from a file of packed 16-byte gids.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = open(path, 'wb')
+        self.count = 0
+
+    def append(self, gid):
+        self.writer.write(gid)
+        self.count += 1
+
+    def chunks(self):
+        """
+        Yields the level's gids in lists of up to FRONTIER_CHUNK.
+        """
+        self.writer.close()
+        with open(self.path, 'rb') as fh:
+            while True:
+                data = fh.read(GID_LENGTH * FRONTIER_CHUNK)
+                if not data:
+                    return
+                yield list(iter_gids(data))
+
+    def remove(self):
+        self.writer.close()
+        os.remove(self.path)
+
+
+class ArtistGraphCrawler:
+    """
+    Breadth-first crawler of the artist similarity graph, streaming its edges.
+
+    Every artist is fetched once, with get_artist_info (one queryArtistOverview request).
+    Its edges are the artists of relatedContent and, with recommendations > 0, the artists
+    of get_recommended_tracks for its first top tracks. The edges are emitted to every
+    neighbour, and neighbours not seen yet join the next level while depth < max_depth.
+
+    Memory stays bounded whatever the size of the graph: BFS levels are kept on disk as
+    packed gids, only twice as many artists as workers are in flight, and the visited set
+    is a GidSet (20 bytes per artist, exact) or, given bloom_capacity, a fixed-size Bloom
+    filter (a few bytes per artist of capacity, skipping about bloom_error of them).
+
+    Args:
+        client (SpotiScrape): The client used for the requests.
+        max_depth (int, optional): Levels to expand; seeds are at depth 0. Default is 2.
+        recommendations (int, optional): Top tracks per artist whose recommendations add edges. Default is 0.
+        workers (int, optional): Artists fetched concurrently. Default is 8.
+        max_nodes (int, optional): Stop after fetching this many artists. Default is no limit.
+        bloom_capacity (int, optional): Use a Bloom filter sized for this many artists as visited set. Default is None (exact GidSet).
+        bloom_error (float, optional): False positive rate of the Bloom filter. Default is 0.001.
+        directory (str, optional): Directory of the frontier files. Default is a temporary directory, removed at the end.
+
+    Example:
+        crawler = spotify.artist_graph(max_depth=3, recommendations=1, workers=16)
+        with open("edges.tsv", "w") as fh:
+            for edge in crawler.crawl([artistURL]):
+                fh.write("{}\\t{}\\t{}\\n".format(edge.source, edge.target, edge.kind))
+        crawler.stats
+    """
+
+    def __init__(self, client, max_depth=2, recommendations=0, workers=8, max_nodes=None,
+                 bloom_capacity=None, bloom_error=0.001, directory=None):
+        self.client = client
+        self.max_depth = max_depth
+        self.recommendations = recommendations
+        self.workers = workers
+        self.max_nodes = max_nodes
+        self.directory = directory
+        if bloom_capacity is not None:
+            self.visited = BloomFilter(bloom_capacity, bloom_error)
+        else:
+            self.visited = GidSet()
+        self.stats = collections.Counter()
+        self.errors = collections.Counter()
+
+    def neighbours(self, artistID):
+        """
+        Fetches one artist and returns its (target id, kind) edges.
+        """
+        artist = self.client.get_artist_info(artistID)
+        related = self.client.filter_artist_info(artist, 'relatedContent')
+        edges = [(extract_id(uri), RELATED) for uri in artist_uris((related.get('relatedArtists') or {}).get('items'))]
+
+        if self.recommendations:
+            top_tracks = ((artist.get('discography') or {}).get('topTracks') or {}).get('items') or ()
+            for item in list(top_tracks)[:self.recommendations]:
+                uri = (item.get('track') or {}).get('uri')
+                if uri:
+                    recommended = self.client.get_recommended_tracks(uri)
+                    edges.extend((extract_id(other), RECOMMENDED) for other in artist_uris(recommended)
+                                 if extract_id(other) != artistID)
+        return edges
+
+    def crawl(self, seeds):
+        """
+        Crawls from seeds (artist URLs, URIs or ids) and yields Edges as artists are fetched.
+
+        An artist that cannot be fetched is counted in stats['failed'] and errors, and skipped.
+        """
+        import concurrent.futures
+
+        directory = self.directory or tempfile.mkdtemp(prefix='spotiscrape-graph-')
+        os.makedirs(directory, exist_ok=True)
+        started = time.monotonic()
+
+        level = Frontier(os.path.join(directory, 'level-0.gids'))
+        for seed in seeds:
+            gid = id_to_gid(extract_id(seed))
+            if gid not in self.visited:
+                self.visited.add(gid)
+                level.append(gid)
+        self.stats['discovered'] += level.count
+        following = None
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='spotiscrape-graph') as pool:
+                for depth in range(self.max_depth + 1):
+                    if not level.count:
+                        break
+                    expand = depth < self.max_depth
+                    following = Frontier(os.path.join(directory, 'level-{}.gids'.format(depth + 1))) if expand else None
+
+                    for edge in self.crawl_level(pool, level, following, depth):
+                        yield edge
+
+                    level.remove()
+                    level = following
+                    following = None
+                    if self.max_nodes is not None and self.stats['fetched'] + self.stats['failed'] >= self.max_nodes:
+                        break
+        finally:
+            for frontier in (level, following):
+                if frontier is not None:
+                    frontier.remove()
+            if self.directory is None:
+                shutil.rmtree(directory, ignore_errors=True)
+            self.stats['seconds'] = round(time.monotonic() - started, 3)
+
+    def crawl_level(self, pool, level, following, depth):
+        import concurrent.futures
+
+        pending = set()
+
+        def collect(done):
+            for future in done:
+                try:
+                    edges = future.result()
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    self.errors[type(e).__name__] += 1
+                    continue
+
+                self.stats['fetched'] += 1
+                for target, kind in edges:
+                    self.stats['edges'] += 1
+                    if following is not None:
+                        gid = id_to_gid(target)
+                        if gid not in self.visited:
+                            self.visited.add(gid)
+                            following.append(gid)
+                            self.stats['discovered'] += 1
+                    yield Edge(future.artistID, target, kind, depth)
+
+        remaining = float('inf') if self.max_nodes is None else self.max_nodes - self.stats['fetched'] - self.stats['failed']
+        for chunk in level.chunks():
+            if remaining <= 0:
+                break
+            for gid in chunk[:max(0, int(min(remaining, len(chunk))))]:
+                if len(pending) >= self.workers * 2:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    yield from collect(done)
+
+                artistID = gid_to_id(gid)
+                future = pool.submit(contextvars.copy_context().run, self.neighbours, artistID)
+                future.artistID = artistID
+                pending.add(future)
+            remaining -= len(chunk)
+
+        yield from collect(concurrent.futures.wait(pending).done)
@@ -0,0 +1,81 @@
+import collections, threading
+
+
+class HedgePolicy:
+    """
+    Decides when a slow idempotent read gets a duplicate request.
+
+    Latencies are tracked per operation. Once a request has been outstanding for longer
+    than the configured percentile of its operation's recent latencies, a second copy is
+    sent on another pooled connection and whichever answers first is used. Hedges are
+    capped at max_ratio of all requests so a slow upstream is not hit with twice the load.
+
+    Args:
+        percentile (float, optional): Latency percentile after which a hedge is sent. Default is 0.95.
+        max_ratio (float, optional): Maximum fraction of requests that may be hedged. Default is 0.05.
+        min_delay (float, optional): Never hedge sooner than this many seconds. Default is 0.05.
+        min_samples (int, optional): Latencies needed for an operation before it is hedged. Default is 20.
+        window (int, optional): Number of recent latencies kept per operation. Default is 200.
+        operations (iterable, optional): Operations eligible for hedging, e.g. ["searchDesktop", "getTrack", "tracks"]. Default is every idempotent read.
+
+    Example:
+        spotify = SpotiScrape(sp_dc, hedge_policy=HedgePolicy(percentile=0.9, operations=["searchDesktop", "getTrack"]))
+    """
+
+    def __init__(self, percentile=0.95, max_ratio=0.05, min_delay=0.05, min_samples=20, window=200, operations=None):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.operations = set(operations) if operations is not None else None
+        self.latencies = {}
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self.lock = threading.Lock()
+
+    def applies_to(self, operation):
+        return self.operations is None or operation in self.operations
+
+    def observe(self, operation, latency):
+        with self.lock:
+            samples = self.latencies.get(operation)
+            if samples is None:
+                samples = self.latencies[operation] = collections.deque(maxlen=self.window)
+            samples.append(latency)
+
+    def delay(self, operation):
+        """
+        Returns how long to wait before hedging a request, or None if it should not be hedged.
+        """
+        with self.lock:
+            self.requests += 1
+            samples = self.latencies.get(operation)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return max(self.min_delay, ordered[index])
+
+    def try_acquire(self):
+        """
+        Reserves one hedge from the budget, returning False when the budget is used up.
+        """
+        with self.lock:
+            if self.hedges + 1 > self.requests * self.max_ratio:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self.lock:
+            self.wins += 1
+
+    def stats(self):
+        """
+        Returns the number of requests seen, hedges sent and hedges that answered first.
+        """
+        with self.lock:
+            return {'requests': self.requests, 'hedges': self.hedges, 'wins': self.wins}
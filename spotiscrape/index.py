@@ -0,0 +1,198 @@
+import array, collections, json, os, re, tempfile, threading, unicodedata
+
+
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_text(text):
+    """
+    Lower-cases text, strips accents and reduces punctuation to single spaces.
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return NON_ALNUM.sub(' ', text).strip()
+
+
+def trigrams(text):
+    """
+    Returns the set of character trigrams of normalized text, with word boundaries marked by spaces.
+    """
+    text = ' {} '.format(normalize_text(text))
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def entity_name(data):
+    return data.get('name') or (data.get('profile') or {}).get('name')
+
+
+def artist_names(data):
+    artists = data.get('artists') or data.get('firstArtist') or []
+    if isinstance(artists, dict):
+        artists = artists.get('items') or []
+    return [name for name in (entity_name(artist) for artist in artists if isinstance(artist, dict)) if name]
+
+
+def entity_uri(data):
+    uri = data.get('uri')
+    if not uri and data.get('id') and data.get('type'):
+        uri = 'spotify:{}:{}'.format(data['type'], data['id'])
+    return uri
+
+
+def iter_entities(data):
+    """
+    Yields every track, artist, album and playlist object nested anywhere in a response.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            uri = entity_uri(value)
+            if isinstance(uri, str) and uri.split(':')[1:2] in (['track'], ['artist'], ['album'], ['playlist']) \
+                    and entity_name(value):
+                yield value
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+
+class SearchIndex:
+    """
+    A local trigram index over catalog entities (tracks, artists, albums, playlists) that were already fetched.
+
+    Each entity is indexed by its name followed by its artists' names, and queries are
+    ranked by how many of their trigrams an entity contains, then by Dice similarity.
+    Entries can be persisted to a JSON file and the index is rebuilt from it on load.
+
+    Args:
+        path (str, optional): File the index is loaded from (if it exists) and saved to. Default is None.
+
+    Example:
+        index = SearchIndex("catalog-index.json")
+        spotify = SpotiScrape(sp_dc, local_index=index)
+        spotify.search_local("shape of you ed sheeran")
+        index.save()
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = []
+        self.sizes = array.array('H')
+        self.postings = collections.defaultdict(lambda: array.array('I'))
+        self.by_uri = {}
+        self.lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def add(self, data):
+        """
+        Indexes one entity given as Web API or pathfinder JSON. Returns True if it was added or updated.
+        """
+        uri = entity_uri(data)
+        name = entity_name(data)
+        if not uri or not name:
+            return False
+
+        return self.add_entry({
+            'type': uri.split(':')[1],
+            'uri': uri,
+            'name': name,
+            'artists': artist_names(data),
+        })
+
+    def add_many(self, data):
+        """
+        Indexes every entity found in a response (see iter_entities). Returns how many were added or updated.
+        """
+        return sum(1 for entity in iter_entities(data) if self.add(entity))
+
+    def add_entry(self, entry):
+        grams = trigrams(' '.join([entry['name']] + entry['artists']))
+        if not grams:
+            return False
+
+        with self.lock:
+            previous = self.by_uri.get(entry['uri'])
+            if previous is not None:
+                current = self.entries[previous]
+                # nested copies of an entity often lack its artists; keep the richer entry
+                if current == entry or (current['name'] == entry['name'] and len(entry['artists']) < len(current['artists'])):
+                    return False
+                # stale postings of the old entry are skipped at query time
+                self.entries[previous] = None
+
+            doc = len(self.entries)
+            self.entries.append(entry)
+            self.sizes.append(min(len(grams), 0xffff))
+            self.by_uri[entry['uri']] = doc
+            for gram in grams:
+                self.postings[gram].append(doc)
+
+        return True
+
+    def search(self, query, filter=None, limit=10):
+        """
+        Ranks indexed entities against query.
+
+        Args:
+            query (str): The search query.
+            filter (str, optional): Only return entities of this type (track, artist, album, playlist). Default is None.
+            limit (int, optional): Maximum number of matches. Default is 10.
+
+        Returns:
+            list: Matches as dicts with type, uri, id, name, artists and score (0 to 1, the share of the query found).
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        with self.lock:
+            counts = collections.Counter()
+            for gram in grams:
+                postings = self.postings.get(gram)
+                if postings:
+                    counts.update(postings)
+
+            ranked = []
+            for doc, shared in counts.items():
+                entry = self.entries[doc]
+                if entry is None or (filter and entry['type'] != filter):
+                    continue
+                ranked.append((shared / len(grams), 2 * shared / (len(grams) + self.sizes[doc]), doc))
+
+            ranked.sort(reverse=True)
+            matches = []
+            for score, similarity, doc in ranked[:limit]:
+                entry = self.entries[doc]
+                matches.append(dict(entry, id=entry['uri'].rsplit(':', 1)[-1], score=round(score, 4)))
+            return matches
+
+    def __len__(self):
+        return len(self.by_uri)
+
+    def __contains__(self, uri):
+        return uri in self.by_uri
+
+    def save(self, path=None):
+        """
+        Writes the entries to path (default: the path given at construction), atomically.
+        """
+        path = path or self.path
+        with self.lock:
+            entries = [entry for entry in self.entries if entry is not None]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                json.dump(entries, fh, separators=(',', ':'), ensure_ascii=False)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as fh:
+            for entry in json.load(fh):
+                self.add_entry(entry)
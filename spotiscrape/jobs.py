@@ -0,0 +1,515 @@
+import json, sqlite3, threading, time
+from .errors import SpotiScrapeError
+from .utils import extract_id
+
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    job TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    key TEXT NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL,
+    PRIMARY KEY (job, stage, key)
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (job, state);
+CREATE TABLE IF NOT EXISTS items (
+    job TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    task TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job, stage, task, key)
+);
+CREATE TABLE IF NOT EXISTS stages (
+    job TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    pages INTEGER NOT NULL DEFAULT 0,
+    items INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (job, stage)
+);
+"""
+
+
+class Stage:
+    """
+    One kind of paginated crawl task, e.g. the playlists of a user.
+
+    A stage fetches one page of a task at a time, starting at the task's cursor, and returns
+    the page's items and the cursor of the next page (None once the task is complete). Each
+    item can enqueue tasks of other stages, e.g. the contents of every playlist found.
+
+    Attributes:
+        name (str): Name of the stage, stored with its tasks and items.
+        page_size (int): Items requested per page.
+    """
+
+    name = None
+    page_size = 50
+
+    def task_key(self, value):
+        """
+        Returns the key stored for a task given as a URL, URI or id.
+        """
+        return extract_id(value)
+
+    def fetch(self, client, key, cursor):
+        """
+        Returns (items, next cursor or None) for the page of task key starting at cursor.
+        """
+        raise NotImplementedError
+
+    def item_key(self, item, position):
+        """
+        Returns the key identifying item within its task; position is its offset in the task.
+        """
+        return str(position)
+
+    def children(self, item):
+        """
+        Returns (stage name, key) of the tasks item leads to. Only stages of the job are enqueued.
+        """
+        return ()
+
+
+def next_offset(cursor, items, total):
+    cursor += len(items)
+    return cursor if items and (total is None or cursor < total) else None
+
+
+class PublicPlaylists(Stage):
+    """
+    The public playlists of a user (get_public_playlists); the key is the user URI.
+    Every playlist enqueues a playlist_items task.
+    """
+
+    name = 'public_playlists'
+    page_size = 200
+
+    def task_key(self, value):
+        # user ids are not base62 ids, so the key is kept as a URI get_public_playlists accepts
+        try:
+            return 'spotify:user:' + extract_id(value)
+        except SpotiScrapeError:
+            return 'spotify:user:' + value
+
+    def fetch(self, client, key, cursor):
+        data = client.get_public_playlists(key, offset=cursor, limit=self.page_size)
+        items = data.get('public_playlists') or []
+        total = data.get('total_public_playlists_count')
+        # without a total, a short page is the last one
+        if total is None and len(items) < self.page_size:
+            return items, None
+        return items, next_offset(cursor, items, total)
+
+    def item_key(self, item, position):
+        return item.get('uri') or str(position)
+
+    def children(self, item):
+        uri = item.get('uri') or ''
+        if uri.startswith('spotify:playlist:'):
+            return [(PlaylistItems.name, extract_id(uri))]
+        return ()
+
+
+class PlaylistItems(Stage):
+    """
+    The items of a playlist (get_playlist_info); the key is the playlist id.
+    """
+
+    name = 'playlist_items'
+    page_size = 100
+
+    def fetch(self, client, key, cursor):
+        content = client.get_playlist_info(key, offset=cursor, limit=self.page_size)['content']
+        return content['items'], next_offset(cursor, content['items'], content.get('totalCount'))
+
+    def item_key(self, item, position):
+        # the same track can be in a playlist twice; uid identifies the entry
+        return item.get('uid') or str(position)
+
+
+class Discography(Stage):
+    """
+    The releases of an artist (get_artist_discography_all); the key is the artist id.
+    """
+
+    name = 'discography'
+    page_size = 50
+
+    def fetch(self, client, key, cursor):
+        releases = client.get_artist_discography_all(key, limit=self.page_size, offset=cursor)['all']
+        return releases['items'], next_offset(cursor, releases['items'], releases.get('totalCount'))
+
+    def item_key(self, item, position):
+        try:
+            return item['releases']['items'][0]['id']
+        except (KeyError, IndexError, TypeError):
+            return str(position)
+
+
+STAGES = {stage.name: stage for stage in (PublicPlaylists, PlaylistItems, Discography)}
+
+
+class JobStore:
+    """
+    SQLite (WAL) storage of crawl tasks, their cursors, completed items and per-stage counters.
+
+    Every page is saved in one transaction: its items, the tasks it leads to, the task's new
+    cursor and the stage counters, so after a crash nothing is lost or counted twice.
+
+    Args:
+        path (str): The database file; several jobs can share one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def add(self, job, stage, keys):
+        """
+        Enqueues tasks; tasks already known (pending, done or failed) are left as they are.
+
+        Returns:
+            int: The number of new tasks.
+        """
+        now = time.time()
+        with self.lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                'INSERT OR IGNORE INTO tasks (job, stage, key, updated) VALUES (?, ?, ?, ?)',
+                [(job, stage, key, now) for key in keys])
+            return self.db.total_changes - before
+
+    def recover(self, job):
+        """
+        Returns the tasks left running by an interrupted run to the queue, at their last cursor.
+        """
+        with self.lock, self.db:
+            return self.db.execute(
+                'UPDATE tasks SET state = ? WHERE job = ? AND state = ?', (PENDING, job, RUNNING)).rowcount
+
+    def recover_task(self, job, stage, key):
+        with self.lock, self.db:
+            self.db.execute('UPDATE tasks SET state = ? WHERE job = ? AND stage = ? AND key = ? AND state = ?',
+                            (PENDING, job, stage, key, RUNNING))
+
+    def claim(self, job, stages):
+        """
+        Marks the first queued pending task of stages as running and returns (stage, key, cursor), or None.
+        """
+        marks = ','.join('?' * len(stages))
+        with self.lock, self.db:
+            row = self.db.execute(
+                'SELECT stage, key, cursor FROM tasks WHERE job = ? AND state = ? AND stage IN ({}) '
+                'ORDER BY rowid LIMIT 1'.format(marks), (job, PENDING) + tuple(stages)).fetchone()
+            if row is not None:
+                self.db.execute('UPDATE tasks SET state = ? WHERE job = ? AND stage = ? AND key = ?',
+                                (RUNNING, job, row[0], row[1]))
+            return row
+
+    def save_page(self, job, stage, key, items, cursor, children, seconds):
+        """
+        Saves one fetched page: items as (key, data), the next cursor (None marks the task done),
+        child tasks as (stage, key) and the time the page took.
+        """
+        now = time.time()
+        with self.lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                'INSERT OR IGNORE INTO items (job, stage, task, key, data) VALUES (?, ?, ?, ?, ?)',
+                [(job, stage, key, item_key, data) for item_key, data in items])
+            added = self.db.total_changes - before
+            self.db.executemany(
+                'INSERT OR IGNORE INTO tasks (job, stage, key, updated) VALUES (?, ?, ?, ?)',
+                [(job, child_stage, child_key, now) for child_stage, child_key in children])
+            if cursor is None:
+                self.db.execute('UPDATE tasks SET state = ?, attempts = 0, error = NULL, updated = ? '
+                                'WHERE job = ? AND stage = ? AND key = ?', (DONE, now, job, stage, key))
+            else:
+                self.db.execute('UPDATE tasks SET cursor = ?, attempts = 0, error = NULL, updated = ? '
+                                'WHERE job = ? AND stage = ? AND key = ?', (cursor, now, job, stage, key))
+            self.db.execute(
+                'INSERT INTO stages (job, stage, pages, items, seconds) VALUES (?, ?, 1, ?, ?) '
+                'ON CONFLICT (job, stage) DO UPDATE SET pages = pages + 1, items = items + excluded.items, '
+                'seconds = seconds + excluded.seconds', (job, stage, added, seconds))
+            return added
+
+    def fail(self, job, stage, key, error, max_attempts):
+        """
+        Records a failed page: the task goes back to the queue, or is marked failed after max_attempts
+        consecutive failures.
+        """
+        with self.lock, self.db:
+            self.db.execute(
+                'UPDATE tasks SET attempts = attempts + 1, state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, '
+                'error = ?, updated = ? WHERE job = ? AND stage = ? AND key = ?',
+                (max_attempts, FAILED, PENDING, error, time.time(), job, stage, key))
+
+    def retry_failed(self, job):
+        with self.lock, self.db:
+            return self.db.execute('UPDATE tasks SET state = ?, attempts = 0 WHERE job = ? AND state = ?',
+                                   (PENDING, job, FAILED)).rowcount
+
+    def counts(self, job):
+        """
+        Returns {stage: {state: tasks}}.
+        """
+        counts = {}
+        with self.lock:
+            for stage, state, count in self.db.execute(
+                    'SELECT stage, state, COUNT(*) FROM tasks WHERE job = ? GROUP BY stage, state', (job,)):
+                counts.setdefault(stage, {})[state] = count
+        return counts
+
+    def totals(self, job):
+        """
+        Returns {stage: (pages, items, seconds)} over all runs of job.
+        """
+        with self.lock:
+            return {stage: (pages, items, seconds) for stage, pages, items, seconds in self.db.execute(
+                'SELECT stage, pages, items, seconds FROM stages WHERE job = ?', (job,))}
+
+    def failures(self, job):
+        with self.lock:
+            return self.db.execute('SELECT stage, key, cursor, error FROM tasks WHERE job = ? AND state = ?',
+                                   (job, FAILED)).fetchall()
+
+    def items(self, job, stage, task=None):
+        """
+        Yields (task, key, data) of the completed items of stage, in insertion order.
+
+        Items are read through a connection of their own, so they can be streamed while a run is writing.
+        """
+        query = 'SELECT task, key, data FROM items WHERE job = ? AND stage = ?'
+        params = (job, stage)
+        if task is not None:
+            query += ' AND task = ?'
+            params += (task,)
+
+        db = sqlite3.connect(self.path)
+        try:
+            for task, key, data in db.execute(query + ' ORDER BY rowid', params):
+                yield task, key, json.loads(data)
+        finally:
+            db.close()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class CrawlJob:
+    """
+    A resumable bulk crawl: a durable queue of paginated tasks, checkpointed after every page.
+
+    Tasks are (stage, key) pairs, e.g. the playlists of a user or the contents of a playlist,
+    stored with their pagination cursor in a SQLite database (WAL mode). Each worker claims a
+    task and pages through it, saving every page's items, the tasks it leads to and the next
+    cursor in a single transaction. After a crash or Ctrl-C, running the same job again
+    resumes every task at its last saved page and skips the ones already done. A page that
+    fails is retried up to max_attempts times, then the task is marked failed and the rest
+    of the job carries on.
+
+    Args:
+        client (SpotiScrape): The client used to fetch pages.
+        path (str): The SQLite database holding the queue, cursors and items.
+        name (str, optional): Name of the job, so one database can hold several. Default is "crawl".
+        stages (iterable, optional): Stage instances of the job. Default is public playlists,
+            playlist items and discography.
+        max_attempts (int, optional): Attempts per page before its task is marked failed. Default is 3.
+
+    Example:
+        job = CrawlJob(spotify, "export.db")
+        job.add("public_playlists", userIDs)      # also crawls every playlist found
+        job.add("discography", artistIDs)
+        job.run(workers=8)
+        job.print_stats()
+        for playlistID, uid, item in job.items("playlist_items"):
+            ...
+    """
+
+    def __init__(self, client, path, name='crawl', stages=None, max_attempts=3):
+        self.client = client
+        self.name = name
+        self.stages = {stage.name: stage for stage in (stages if stages is not None else (cls() for cls in STAGES.values()))}
+        self.max_attempts = max_attempts
+        self.store = JobStore(path)
+        self.lock = threading.Lock()
+        self.run_stats = {}
+        self.started = None
+        self.stopping = threading.Event()
+
+    def add(self, stage, keys):
+        """
+        Enqueues tasks of stage for keys (URLs or ids). Tasks already done are not redone.
+
+        Returns:
+            int: The number of new tasks.
+        """
+        if stage not in self.stages:
+            raise ValueError('unknown stage {!r}; this job has {}'.format(stage, ', '.join(self.stages)))
+        if isinstance(keys, str):
+            keys = [keys]
+        return self.store.add(self.name, stage, [self.stages[stage].task_key(key) for key in keys])
+
+    def run(self, workers=4, progress=None):
+        """
+        Runs until no task is pending, or stop() is called.
+
+        Args:
+            workers (int, optional): Tasks fetched concurrently. Default is 4.
+            progress (callable, optional): Called with stats() after every saved page. Default is None.
+
+        Returns:
+            dict: stats() at the end of the run.
+        """
+        self.store.recover(self.name)
+        self.started = time.monotonic()
+        self.run_stats = {}
+        self.stopping.clear()
+        idle = threading.Condition()
+        active = [0]
+
+        def work():
+            while not self.stopping.is_set():
+                with idle:
+                    task = self.store.claim(self.name, tuple(self.stages))
+                    if task is None:
+                        if not active[0]:
+                            idle.notify_all()
+                            return
+                        # a running task may still enqueue children
+                        idle.wait(0.5)
+                        continue
+                    active[0] += 1
+                try:
+                    stage, key, cursor = task
+                    # a task is paged through by the worker that claimed it, one checkpoint per page
+                    while cursor is not None and not self.stopping.is_set():
+                        cursor = self.step(stage, key, cursor)
+                        if progress is not None:
+                            progress(self.stats())
+                    if cursor is not None:
+                        self.store.recover_task(self.name, stage, key)
+                finally:
+                    with idle:
+                        active[0] -= 1
+                        idle.notify_all()
+
+        threads = [threading.Thread(target=work, name='spotiscrape-crawl-{}'.format(index), daemon=True)
+                   for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            # pages in flight are not saved; their tasks resume at the last checkpoint
+            self.stopping.set()
+            raise
+        return self.stats()
+
+    def stop(self):
+        """
+        Lets the workers finish their current page, then ends run().
+        """
+        self.stopping.set()
+
+    def step(self, stage_name, key, cursor):
+        """
+        Fetches and saves one page of a task.
+
+        Returns:
+            int: The cursor of the next page, or None when the task is done or the page failed.
+        """
+        stage = self.stages[stage_name]
+        started = time.perf_counter()
+        try:
+            items, next_cursor = stage.fetch(self.client, key, cursor)
+        except Exception as e:
+            self.store.fail(self.name, stage_name, key, '{}: {}'.format(type(e).__name__, e), self.max_attempts)
+            return None
+
+        seconds = time.perf_counter() - started
+        rows, children = [], []
+        for position, item in enumerate(items, cursor):
+            rows.append((stage.item_key(item, position), json.dumps(item, separators=(',', ':'), ensure_ascii=False)))
+            children.extend(child for child in stage.children(item) if child[0] in self.stages)
+
+        added = self.store.save_page(self.name, stage_name, key, rows, next_cursor, children, seconds)
+
+        with self.lock:
+            pages, count = self.run_stats.get(stage_name, (0, 0))
+            self.run_stats[stage_name] = (pages + 1, count + added)
+
+        return next_cursor
+
+    def retry_failed(self):
+        """
+        Returns failed tasks to the queue for the next run().
+        """
+        return self.store.retry_failed(self.name)
+
+    def failures(self):
+        """
+        Returns (stage, key, cursor, error) of the failed tasks.
+        """
+        return self.store.failures(self.name)
+
+    def items(self, stage, task=None):
+        """
+        Yields (task key, item key, item) of the items saved by stage, optionally of one task only.
+        """
+        return self.store.items(self.name, stage, task)
+
+    def stats(self):
+        """
+        Returns one dict per stage: tasks by state, pages and items over all runs, items and
+        pages of this run and its throughput, and the mean seconds per page.
+        """
+        counts = self.store.counts(self.name)
+        totals = self.store.totals(self.name)
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        with self.lock:
+            run_stats = dict(self.run_stats)
+
+        stats = {}
+        for stage in self.stages:
+            states = counts.get(stage, {})
+            pages, items, seconds = totals.get(stage, (0, 0, 0.0))
+            run_pages, run_items = run_stats.get(stage, (0, 0))
+            stats[stage] = {
+                PENDING: states.get(PENDING, 0),
+                RUNNING: states.get(RUNNING, 0),
+                DONE: states.get(DONE, 0),
+                FAILED: states.get(FAILED, 0),
+                'pages': pages,
+                'items': items,
+                'run_pages': run_pages,
+                'run_items': run_items,
+                'items_per_second': round(run_items / elapsed, 2) if elapsed > 0 else 0.0,
+                'seconds_per_page': round(seconds / pages, 4) if pages else None,
+            }
+        return stats
+
+    def print_stats(self):
+        print("{:<18} {:>8} {:>8} {:>8} {:>7} {:>8} {:>10} {:>10} {:>8}".format(
+            'stage', 'pending', 'running', 'done', 'failed', 'pages', 'items', 'items/s', 's/page'))
+        for stage, row in self.stats().items():
+            print("{:<18} {pending:>8} {running:>8} {done:>8} {failed:>7} {pages:>8} {items:>10} {items_per_second:>10.1f} {page:>8}".format(
+                stage, page='-' if row['seconds_per_page'] is None else '{:.3f}'.format(row['seconds_per_page']), **row))
+
+    def close(self):
+        self.store.close()
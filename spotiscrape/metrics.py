@@ -0,0 +1,300 @@
+import bisect, collections, contextlib, contextvars, threading
+from .reporting import logger
+
+
+# seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# what the cache in front of a request did; requests of calls without a cache are "bypass"
+HIT, MISS, BYPASS = 'hit', 'miss', 'bypass'
+
+_cache = contextvars.ContextVar('spotiscrape_cache', default=BYPASS)
+
+
+def current_cache():
+    """
+    Returns the cache result (HIT, MISS or BYPASS) of requests sent in the current context.
+    """
+    return _cache.get()
+
+
+@contextlib.contextmanager
+def cache_result(result):
+    """
+    Labels the requests sent inside the with-block with the cache result, e.g. MISS.
+    """
+    token = _cache.set(result)
+    try:
+        yield
+    finally:
+        _cache.reset(token)
+
+
+RequestSample = collections.namedtuple('RequestSample', [
+    'host', 'operation', 'method', 'status', 'latency', 'request_bytes', 'response_bytes', 'retries', 'error',
+    'cache'], defaults=(BYPASS,))
+RequestSample.__doc__ = """
+One logical request, as seen by the caller (retries and throttled re-sends included).
+
+Attributes:
+    host (str): Host of the request.
+    operation (str): The pathfinder operationName, or the first path segment for other endpoints.
+    method (str): HTTP method.
+    status (int): Status of the final response, or 0 if no response was received.
+    latency (float): Seconds from the first attempt to the final response or error.
+    request_bytes (int): Length of the URL and body of the final attempt.
+    response_bytes (int): Length of the response body (Content-Length for streamed responses).
+    retries (int): Attempts made after the first one.
+    error (str): Name of the exception raised instead of a response, or None.
+    cache (str): "hit" when a cache answered without sending anything, "miss" when the request
+        was sent because the cache had no entry, "bypass" for calls that do not use a cache.
+"""
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram, as exposed by Prometheus.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """
+        Estimates the q-quantile by interpolating inside the bucket it falls in.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            if index < len(self.buckets):
+                lower = self.buckets[index]
+        return self.buckets[-1]
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(**values):
+    return '{' + ','.join('{}="{}"'.format(name, escape_label(value)) for name, value in values.items()) + '}'
+
+
+class Metrics:
+    """
+    In-process request metrics: latency and size histograms, status, retry and cache counters.
+
+    Every request sent by the client's session is recorded per host and operation (the
+    pathfinder operationName, e.g. fetchPlaylist, or the endpoint, e.g. metadata), so slow
+    or failing endpoints stand out. Each sample is also passed to the sinks, callables
+    receiving a RequestSample, for forwarding to another metrics system.
+
+    Args:
+        sinks (iterable, optional): Callables invoked with every RequestSample; exceptions they raise are logged. Default is none.
+        latency_buckets (iterable, optional): Upper bounds of the latency buckets in seconds.
+        size_buckets (iterable, optional): Upper bounds of the response size buckets in bytes.
+
+    Example:
+        metrics = Metrics(sinks=[lambda sample: statsd.timing(sample.operation, sample.latency)])
+        spotify = SpotiScrape(sp_dc, metrics=metrics)
+        metrics.serve(9464)        # Prometheus scrape endpoint at http://localhost:9464/metrics
+        metrics.summary()[:5]      # the operations that took the most time
+    """
+
+    def __init__(self, sinks=(), latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        self.sinks = list(sinks)
+        self.latency_buckets = tuple(latency_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.lock = threading.Lock()
+        self.server = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = collections.Counter()
+            self.retries = collections.Counter()
+            self.request_bytes = collections.Counter()
+            self.response_bytes = collections.Counter()
+            self.latency = {}
+            self.response_size = {}
+            self.cache = collections.Counter()
+            self.hits = collections.Counter()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def record_request(self, sample):
+        key = (sample.host, sample.operation)
+        with self.lock:
+            self.requests[key + (sample.error or sample.status, sample.cache)] += 1
+
+            # a hit sent nothing, so it is kept out of the latency and size histograms
+            if sample.cache == HIT:
+                self.hits[key] += 1
+            else:
+                self.retries[key] += sample.retries
+                self.request_bytes[key] += sample.request_bytes
+                self.response_bytes[key] += sample.response_bytes
+
+                latency = self.latency.get(key)
+                if latency is None:
+                    latency = self.latency[key] = Histogram(self.latency_buckets)
+                    self.response_size[key] = Histogram(self.size_buckets)
+                latency.observe(sample.latency)
+                if sample.error is None:
+                    self.response_size[key].observe(sample.response_bytes)
+
+        # sinks run inside the request, so a broken one must not replace its response or error
+        for sink in self.sinks:
+            try:
+                sink(sample)
+            except Exception:
+                logger.exception("Metrics sink %r failed", sink)
+
+    def record_cache(self, cache, hit):
+        with self.lock:
+            self.cache[(cache, 'hit' if hit else 'miss')] += 1
+
+    def summary(self):
+        """
+        Returns one dict per host and operation, the ones with the most total time first.
+
+        Returns:
+            list: Dicts with host, operation, requests, errors (responses >= 400 and exceptions),
+                retries, total, mean, p50 and p99 (seconds, estimated from the histogram),
+                request_bytes, response_bytes and cache_hits (calls answered by a cache, not
+                counted in requests).
+        """
+        with self.lock:
+            errors = collections.Counter()
+            for (host, operation, status, cache), count in self.requests.items():
+                if isinstance(status, str) or status == 0 or status >= 400:
+                    errors[(host, operation)] += count
+
+            rows = []
+            for key, latency in self.latency.items():
+                rows.append({
+                    'host': key[0],
+                    'operation': key[1],
+                    'requests': latency.count,
+                    'errors': errors[key],
+                    'retries': self.retries[key],
+                    'total': round(latency.sum, 6),
+                    'mean': round(latency.sum / latency.count, 6),
+                    'p50': round(latency.quantile(0.5), 6),
+                    'p99': round(latency.quantile(0.99), 6),
+                    'request_bytes': self.request_bytes[key],
+                    'response_bytes': self.response_bytes[key],
+                    'cache_hits': self.hits[key],
+                })
+
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows
+
+    def cache_stats(self):
+        with self.lock:
+            return {'{}_{}'.format(cache, result): count for (cache, result), count in self.cache.items()}
+
+    def prometheus(self, prefix='spotiscrape'):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+
+        def header(name, kind, text):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, text))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+        def histogram(name, histograms):
+            for (host, operation), values in sorted(histograms.items()):
+                for bound, count in values.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append('{}_{}_bucket{} {}'.format(prefix, name, labels(host=host, operation=operation, le=le), count))
+                lines.append('{}_{}_sum{} {!r}'.format(prefix, name, labels(host=host, operation=operation), values.sum))
+                lines.append('{}_{}_count{} {}'.format(prefix, name, labels(host=host, operation=operation), values.count))
+
+        def counter(name, values):
+            for (host, operation), count in sorted(values.items()):
+                lines.append('{}_{}{} {}'.format(prefix, name, labels(host=host, operation=operation), count))
+
+        with self.lock:
+            header('requests_total', 'counter', 'Requests by host, operation, final status (or exception name) and cache result.')
+            for (host, operation, status, cache), count in sorted(self.requests.items(), key=lambda item: tuple(map(str, item[0]))):
+                lines.append('{}_requests_total{} {}'.format(prefix, labels(host=host, operation=operation, status=status, cache=cache), count))
+
+            header('request_duration_seconds', 'histogram', 'Request latency including retries.')
+            histogram('request_duration_seconds', self.latency)
+
+            header('response_size_bytes', 'histogram', 'Response body size.')
+            histogram('response_size_bytes', self.response_size)
+
+            header('request_retries_total', 'counter', 'Attempts made after the first one.')
+            counter('request_retries_total', self.retries)
+
+            header('request_bytes_total', 'counter', 'Bytes of request URLs and bodies.')
+            counter('request_bytes_total', self.request_bytes)
+
+            header('response_bytes_total', 'counter', 'Bytes of response bodies.')
+            counter('response_bytes_total', self.response_bytes)
+
+            header('cache_requests_total', 'counter', 'Cache lookups by cache and result.')
+            for (cache, result), count in sorted(self.cache.items()):
+                lines.append('{}_cache_requests_total{} {}'.format(prefix, labels(cache=cache, result=result), count))
+
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, address=''):
+        """
+        Serves prometheus() at /metrics from a daemon thread.
+
+        Returns:
+            ThreadingHTTPServer: The server; call its shutdown() method to stop it.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((address, port), Handler)
+        threading.Thread(target=self.server.serve_forever, name='spotiscrape-metrics', daemon=True).start()
+        return self.server
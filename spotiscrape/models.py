@@ -0,0 +1,248 @@
+import json, sys
+from .decoder import get_json_decoder
+from .gid import id_to_gid, gid_to_id
+
+
+# resolved on the first model built, like the decoder
+_dumps = None
+
+
+def compact_dumps(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def dump_raw(data):
+    global _dumps
+    if _dumps is None:
+        try:
+            import orjson
+            _dumps = orjson.dumps
+        except ImportError:
+            _dumps = compact_dumps
+    return _dumps(data)
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def id_from_uri(uri):
+    return uri.rsplit(':', 1)[-1] if uri else None
+
+
+def gid_from(data):
+    """
+    Returns the 16-byte gid of an entity given as Web API (id) or pathfinder (uri) JSON.
+    """
+    entity_id = data.get('id') or id_from_uri(data.get('uri'))
+    return id_to_gid(entity_id) if entity_id else None
+
+
+class Model:
+    """
+    Base class of the compact result models.
+
+    Models keep a handful of typed fields in __slots__, store ids as 16-byte gids and intern
+    repeated strings such as artist names and image URLs. With keep_raw, the full JSON they were
+    built from is also kept as compact bytes and only decoded when raw is accessed.
+    """
+
+    __slots__ = ('gid', '_raw')
+
+    TYPE = None
+
+    @property
+    def id(self):
+        return gid_to_id(self.gid) if self.gid is not None else None
+
+    @property
+    def uri(self):
+        return 'spotify:{}:{}'.format(self.TYPE, self.id) if self.gid is not None else None
+
+    @property
+    def raw(self):
+        """
+        The JSON the model was built from, decoded on access. None if it was not kept.
+        """
+        return get_json_decoder()(self._raw) if self._raw is not None else None
+
+    def keep(self, data, keep_raw):
+        self._raw = dump_raw(data) if keep_raw else None
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.gid == other.gid
+
+    def __hash__(self):
+        return hash(self.gid)
+
+    def __repr__(self):
+        return '{}(id={!r}, name={!r})'.format(type(self).__name__, self.id, getattr(self, 'name', None))
+
+
+class Artist(Model):
+    """
+    An artist.
+
+    Attributes:
+        gid (bytes): The 16-byte Spotify gid.
+        name (str): The artist name.
+        image_url (str): URL of the largest avatar image, if present.
+    """
+
+    __slots__ = ('name', 'image_url')
+
+    TYPE = 'artist'
+
+    @classmethod
+    def parse(cls, data, keep_raw=False):
+        """
+        Builds an Artist from Web API or pathfinder (queryArtistOverview, track artists) JSON.
+        """
+        artist = cls.__new__(cls)
+        artist.gid = gid_from(data)
+        artist.name = intern(data.get('name') or (data.get('profile') or {}).get('name'))
+
+        images = data.get('images') or ((data.get('visuals') or {}).get('avatarImage') or {}).get('sources') or []
+        artist.image_url = intern(images[0]['url']) if images else None
+
+        artist.keep(data, keep_raw)
+        return artist
+
+
+class Album(Model):
+    """
+    An album.
+
+    Attributes:
+        gid (bytes): The 16-byte Spotify gid.
+        name (str): The album name.
+        image_url (str): URL of the largest cover image.
+        artists (tuple): The album's Artist models.
+    """
+
+    __slots__ = ('name', 'image_url', 'artists')
+
+    TYPE = 'album'
+
+    @classmethod
+    def parse(cls, data, keep_raw=False):
+        """
+        Builds an Album from Web API (album) or pathfinder (albumOfTrack) JSON.
+        """
+        album = cls.__new__(cls)
+        album.gid = gid_from(data)
+        album.name = intern(data.get('name'))
+
+        images = data.get('images')
+        if images:
+            album.image_url = intern(max(images, key=lambda image: image.get('width') or 0)['url'])
+        else:
+            sources = (data.get('coverArt') or {}).get('sources') or []
+            album.image_url = intern(sources[-1]['url']) if sources else None
+
+        album.artists = parse_artists(data.get('artists'))
+        album.keep(data, keep_raw)
+        return album
+
+
+class Track(Model):
+    """
+    A track.
+
+    Attributes:
+        gid (bytes): The 16-byte Spotify gid.
+        name (str): The track name.
+        duration_ms (int): Duration in milliseconds.
+        explicit (bool): Whether the track is marked explicit.
+        artists (tuple): The track's Artist models.
+        album (Album): The track's album, if present.
+    """
+
+    __slots__ = ('name', 'duration_ms', 'explicit', 'artists', 'album')
+
+    TYPE = 'track'
+
+    @classmethod
+    def parse(cls, data, keep_raw=False):
+        """
+        Builds a Track from Web API (get_track_info) or pathfinder (getTrack, playlist itemV2.data) JSON.
+        """
+        track = cls.__new__(cls)
+        track.gid = gid_from(data)
+        track.name = data.get('name')
+
+        if 'duration_ms' in data:
+            track.duration_ms = data['duration_ms']
+            track.explicit = bool(data.get('explicit'))
+        else:
+            duration = data.get('trackDuration') or data.get('duration') or {}
+            track.duration_ms = duration.get('totalMilliseconds')
+            track.explicit = (data.get('contentRating') or {}).get('label') == 'EXPLICIT'
+
+        track.artists = parse_artists(data.get('artists') or data.get('firstArtist'))
+
+        album = data.get('album') or data.get('albumOfTrack')
+        track.album = Album.parse(album, keep_raw=False) if album else None
+
+        track.keep(data, keep_raw)
+        return track
+
+
+class PlaylistItem(Model):
+    """
+    An entry of a playlist (fetchPlaylist content.items).
+
+    Attributes:
+        uid (str): The playlist-specific uid of the entry, used by move/remove operations.
+        added_at (str): ISO timestamp of when the entry was added.
+        added_by (str): Username of the user who added the entry.
+        track (Track): The track, or None for non-track entries such as episodes.
+    """
+
+    __slots__ = ('uid', 'added_at', 'added_by', 'track')
+
+    @property
+    def id(self):
+        return self.track.id if self.track is not None else None
+
+    @property
+    def uri(self):
+        return self.track.uri if self.track is not None else None
+
+    @classmethod
+    def parse(cls, data, keep_raw=False):
+        item = cls.__new__(cls)
+        item.gid = None
+        item.uid = data.get('uid')
+        item.added_at = (data.get('addedAt') or {}).get('isoString')
+
+        added_by = (data.get('addedBy') or {}).get('data') or {}
+        item.added_by = intern(added_by.get('username'))
+
+        entity = (data.get('itemV2') or {}).get('data') or {}
+        item.track = Track.parse(entity, keep_raw=False) if entity.get('__typename', 'Track') == 'Track' and entity.get('uri') else None
+        if item.track is not None:
+            item.gid = item.track.gid
+
+        item.keep(data, keep_raw)
+        return item
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.uid == other.uid
+
+    def __hash__(self):
+        return hash(self.uid)
+
+    def __repr__(self):
+        return 'PlaylistItem(uid={!r}, track={!r})'.format(self.uid, self.track)
+
+
+def parse_artists(artists):
+    """
+    Parses a Web API artist list or a pathfinder {"items": [...]} artist container into a tuple of Artist models.
+    """
+    if not artists:
+        return ()
+    if isinstance(artists, dict):
+        artists = artists.get('items') or []
+    return tuple(Artist.parse(artist, keep_raw=False) for artist in artists)
@@ -0,0 +1,204 @@
+import json, os
+from .reporting import logger
+
+
+PATHFINDER_HOST = 'api-partner.spotify.com'
+PATHFINDER_URL = 'https://' + PATHFINDER_HOST + '/pathfinder/v1/query'
+
+# environment variable naming a JSON file of {"operationName": "sha256Hash"} overrides
+HASHES_ENV = 'SPOTISCRAPE_OPERATION_HASHES'
+
+
+def encode(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+class Operation:
+    """
+    A persisted pathfinder query or mutation.
+
+    The extensions string is serialized once per hash, and the fixed variables once per
+    operation, so building a request only encodes the variables that change.
+
+    Args:
+        name (str): The operationName.
+        sha256 (str): The persisted query hash.
+        variables (dict, optional): Variables sent with every request unless overridden. Default is None.
+        path (tuple, optional): Keys leading to the useful part of the response. Default is None.
+    """
+
+    def __init__(self, name, sha256, variables=None, path=None):
+        self.name = name
+        self.variables = variables or {}
+        self.path = path
+        self.fixed = {key: encode(key) + ':' + encode(value) for key, value in self.variables.items()}
+        self.fixed_json = '{' + ','.join(self.fixed.values()) + '}'
+        self.sha256 = sha256
+
+    @property
+    def sha256(self):
+        return self._sha256
+
+    @sha256.setter
+    def sha256(self, value):
+        self._sha256 = value
+        self.extensions = '{"persistedQuery":{"version":1,"sha256Hash":' + encode(value) + '}}'
+        self.extensions_dict = {'persistedQuery': {'version': 1, 'sha256Hash': value}}
+
+    def encode_variables(self, variables):
+        """
+        Returns the variables JSON: the given variables merged over the pre-encoded fixed ones.
+        """
+        if not variables:
+            return self.fixed_json
+
+        parts = [encode(key) + ':' + encode(value) for key, value in variables.items()]
+        parts.extend(pair for key, pair in self.fixed.items() if key not in variables)
+        return '{' + ','.join(parts) + '}'
+
+    def params(self, **variables):
+        """
+        Returns the query string parameters of a GET request.
+        """
+        return {
+            'operationName': self.name,
+            'variables': self.encode_variables(variables),
+            'extensions': self.extensions,
+        }
+
+    def body(self, **variables):
+        """
+        Returns the JSON body of a POST request.
+        """
+        return {
+            'variables': dict(self.variables, **variables),
+            'operationName': self.name,
+            'extensions': self.extensions_dict,
+        }
+
+    def __repr__(self):
+        return 'Operation({!r}, {!r})'.format(self.name, self.sha256)
+
+
+class OperationRegistry:
+    """
+    The persisted pathfinder operations, by name.
+
+    Spotify occasionally rotates the hash of an operation. Hashes can be replaced at
+    runtime with set_hash() / update_hashes(), per client with SpotiScrape(operation_hashes=...),
+    or for every client by pointing the SPOTISCRAPE_OPERATION_HASHES environment variable
+    at a JSON file of {"operationName": "sha256Hash"}.
+
+    Example:
+        OPERATIONS.set_hash("searchDesktop", "<new hash>")
+        OPERATIONS["fetchPlaylist"].params(uri="spotify:playlist:37i9dQZF1DXcBWIGoYBM5M", offset=0, limit=25)
+    """
+
+    def __init__(self, operations=()):
+        self.operations = {operation.name: operation for operation in operations}
+
+    def register(self, name, sha256, variables=None, path=None):
+        operation = self.operations[name] = Operation(name, sha256, variables, path)
+        return operation
+
+    def __getitem__(self, name):
+        try:
+            return self.operations[name]
+        except KeyError:
+            raise KeyError("Unknown pathfinder operation: {}".format(name)) from None
+
+    def __contains__(self, name):
+        return name in self.operations
+
+    def __iter__(self):
+        return iter(self.operations.values())
+
+    def set_hash(self, name, sha256):
+        self[name].sha256 = sha256
+
+    def update_hashes(self, hashes):
+        """
+        Replaces the hashes of several operations from a {name: sha256} mapping.
+
+        Raises KeyError, leaving every hash unchanged, if one of the names is unknown.
+        """
+        for name in hashes:
+            self[name]
+        for name, sha256 in hashes.items():
+            self.set_hash(name, sha256)
+
+    def load_hashes(self, path):
+        """
+        Replaces hashes from a JSON file of {name: sha256}.
+        """
+        with open(path, 'r', encoding='utf-8') as fh:
+            self.update_hashes(json.load(fh))
+
+    def hashes(self):
+        return {operation.name: operation.sha256 for operation in self}
+
+    def copy(self):
+        return OperationRegistry(
+            Operation(operation.name, operation.sha256, operation.variables, operation.path) for operation in self)
+
+
+OPERATIONS = OperationRegistry()
+
+# queries
+OPERATIONS.register(
+    'searchDesktop', '130115162add6f3499d2f88ead8a37a7cad1d4d2314f3a206377035e7d26b74c',
+    {'offset': 0, 'limit': 10, 'numberOfTopResults': 5, 'includeAudiobooks': True},
+    ('data', 'searchV2'))
+OPERATIONS.register(
+    'getTrack', 'e101aead6d78faa11d75bec5e36385a07b2f1c4a0420932d374d89ee17c70dd6',
+    path=('data', 'trackUnion'))
+OPERATIONS.register(
+    'internalLinkRecommenderTrack', '97f52864d50ba62ab761a7bff47f1a9921d9e357316f7d60ad84ae3788eea4cf',
+    {'strategy': 'ORGANIC_TRAFFIC'},
+    ('data', 'seoRecommended', 'items'))
+OPERATIONS.register(
+    'queryArtistOverview', '35648a112beb1794e39ab931365f6ae4a8d45e65396d641eeda94e4003d41497',
+    {'locale': '', 'includePrerelease': False},
+    ('data', 'artistUnion'))
+OPERATIONS.register(
+    'queryArtistDiscographyAll', '35a699e12a728c1a02f5bf67121a50f87341e65054e13126c03b7697fbd26692',
+    {'offset': 0, 'limit': 50},
+    ('data', 'artistUnion', 'discography'))
+OPERATIONS.register(
+    'home', '3099d0901548aa93509318763519c57acd1a0bb533a9793ff57732fe8b91504a',
+    path=('data', 'home'))
+OPERATIONS.register(
+    'fetchLibraryTracks', '8474ec383b530ce3e54611fca2d8e3da57ef5612877838b8dbf00bd9fc692dfb',
+    {'offset': 0, 'limit': 25},
+    ('data', 'me', 'library', 'tracks'))
+OPERATIONS.register(
+    'fetchPlaylist', '5534e86cc2181b9e70be86ae26d514abd8d828be2ee56e5f8b7882dd70204c62',
+    {'offset': 0, 'limit': 25},
+    ('data', 'playlistV2'))
+OPERATIONS.register(
+    'libraryV2', '93662a816ebf38ab32f6028512e584c53c4b71d6aad920ce6039a4a62236574e',
+    {'filters': [], 'order': 'Creator', 'textFilter': '', 'features': ['LIKED_SONGS', 'YOUR_EPISODES'], 'limit': 50,
+     'offset': 0, 'flatten': False, 'expandedFolders': [], 'folderUri': None, 'includeFoldersWhenFlattening': True},
+    ('data', 'me', 'libraryV2'))
+OPERATIONS.register(
+    'areArtistsInLibrary', 'bb7f6d46598f5a2d0148a6418ff148d8613112af87a55c4cb6df33d69acc3038',
+    path=('data', 'artists'))
+OPERATIONS.register(
+    'areTracksInLibrary', '2b51d510cac8d1262d8ed3d44af70e45a41b3c4d94c454483e779dcae6dc890e',
+    path=('data', 'tracks'))
+
+# mutations
+OPERATIONS.register('addToLibrary', '656c491c3f65d9d08d259be6632f4ef1931540ebcf766488ed17f76bb9156d15')
+OPERATIONS.register('removeFromLibrary', '1103bfd4b9d80275950bff95ef6d41a02cec3357e8f7ecd8974528043739677c')
+OPERATIONS.register('moveItemsInPlaylist', '06f8c6722ac42c1669ba2cf19e44e9bc2caf303255a3ceeed758d4366c76742f')
+OPERATIONS.register('removeFromPlaylist', 'c0202852f3743f013eb453bfa15637c9da2d52a437c528960f4d10a15f6dfb49')
+OPERATIONS.register('addToPlaylist', '200b7618afd05364c4aafb95e2070249ed87ee3f08fc4d2f1d5d04fdf1a516d9')
+OPERATIONS.register('pinLibraryItem', 'b90ca9015c5e9928a5a14d74fb5fd528255905c8aa607db449097332725caa8b')
+OPERATIONS.register('unpinLibraryItem', 'bb5cefe831e624d7d5daa76cf9c2d3bfebb2998a329ce595003cf59740ebd0d4')
+
+if os.environ.get(HASHES_ENV):
+    # a bad override file must not make the package unimportable; the built-in hashes stay in use
+    try:
+        OPERATIONS.load_hashes(os.environ[HASHES_ENV])
+    except Exception as e:
+        logger.warning("Ignoring %s=%r: %s", HASHES_ENV, os.environ[HASHES_ENV], e)
@@ -0,0 +1,204 @@
+import contextvars, threading, time
+
+
+_current = contextvars.ContextVar('spotiscrape_profile_frame', default=None)
+
+NETWORK, DECODE, CALLBACKS = 'network', 'decode', 'callbacks'
+
+COLUMNS = ('calls', 'total', NETWORK, DECODE, CALLBACKS, 'processing', 'retained')
+
+
+def current_frame():
+    """
+    Returns the CallFrame of the profiled call running in the current thread or task, or None.
+    """
+    return _current.get()
+
+
+class CallFrame:
+    """
+    Time spent by one profiled call, by category. Time of nested public calls is kept apart.
+    """
+
+    def __init__(self, profiler, name, parent):
+        self.profiler = profiler
+        self.name = name
+        self.parent = parent
+        self.times = {NETWORK: 0.0, DECODE: 0.0, CALLBACKS: 0.0}
+        self.children = 0.0
+
+    def add(self, category, seconds):
+        with self.profiler.lock:
+            self.times[category] += seconds
+
+
+class Profiler:
+    """
+    Breaks down where the time of every public SpotiScrape call goes.
+
+    Each call is split into network (waiting for responses, including retries, backoff and
+    rate limiting), decode (JSON decoding of whole responses), callbacks (metrics sinks and
+    tracing exporters) and processing (everything else in the method itself, e.g. the lrc
+    rewrite of get_lyrics). Time of a nested public call counts for that call only. Items of
+    generators such as iter_playlist_items are read after the call returns and are not included.
+    A mostly-network profile means I/O bound; a large processing or decode share means CPU bound.
+
+    Args:
+        client (SpotiScrape): The client to profile.
+        cprofile (bool, optional): Also run cProfile in the thread that enters the profiler. Default is False.
+        memory (bool, optional): Trace memory with tracemalloc: bytes still held when each method returns, and a snapshot at exit. Default is False.
+
+    Example:
+        with spotify.profile(memory=True) as profiler:
+            spotify.get_lyrics(trackURL)
+            spotify.are_tracks_in_library(trackURLs)
+
+        profiler.print_summary()
+        profiler.print_allocations()
+    """
+
+    def __init__(self, client, cprofile=False, memory=False):
+        self.client = client
+        self.cprofile = cprofile
+        self.memory = memory
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.profile = None
+        self.snapshot = None
+        self.started_tracing = False
+        self.tracemalloc = None
+        self.previous = None
+
+    def __enter__(self):
+        if self.memory:
+            import tracemalloc
+
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+
+        if self.cprofile:
+            import cProfile
+
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+        self.previous = self.client.profiler
+        self.client.profiler = self
+        return self
+
+    def __exit__(self, *exc):
+        self.client.profiler = self.previous
+
+        if self.profile is not None:
+            self.profile.disable()
+
+        if self.memory:
+            self.snapshot = self.tracemalloc.take_snapshot()
+            if self.started_tracing:
+                self.tracemalloc.stop()
+
+        return False
+
+    def call(self, name):
+        """
+        Returns a context manager profiling one call of the public method name.
+        """
+        return ProfiledCall(self, name)
+
+    def record(self, frame, total, retained):
+        with self.lock:
+            row = self.stats.get(frame.name)
+            if row is None:
+                row = self.stats[frame.name] = dict.fromkeys(COLUMNS, 0)
+
+            times = frame.times
+            row['calls'] += 1
+            row['total'] += total
+            row[NETWORK] += times[NETWORK]
+            row[DECODE] += times[DECODE]
+            row[CALLBACKS] += times[CALLBACKS]
+            row['processing'] += max(0.0, total - frame.children - times[NETWORK] - times[DECODE] - times[CALLBACKS])
+            row['retained'] += retained
+            if frame.parent is not None:
+                frame.parent.children += total
+
+    def summary(self):
+        """
+        Returns one dict per method, the slowest (by total time) first.
+
+        Returns:
+            list: Dicts with method, calls, total (inclusive of nested calls), network, decode,
+                callbacks and processing (seconds, exclusive) and retained (bytes, with memory=True): how much
+                traced memory grew over the call, not how much it allocated along the way.
+        """
+        with self.lock:
+            rows = [dict(row, method=name) for name, row in self.stats.items()]
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows
+
+    def print_summary(self, limit=20):
+        print("{:<36} {:>6} {:>9} {:>9} {:>9} {:>9} {:>10} {:>10}".format(
+            'method', 'calls', 'total s', 'network', 'decode', 'callback', 'processing', 'kept KiB'))
+        for row in self.summary()[:limit]:
+            print("{method:<36} {calls:>6} {total:>9.4f} {network:>9.4f} {decode:>9.4f} {callbacks:>9.4f} {processing:>10.4f} {kib:>10.1f}".format(
+                kib=row['retained'] / 1024, **row))
+
+    def dump_stats(self, path):
+        """
+        Writes the cProfile statistics (cprofile=True) to path, for pstats or snakeviz.
+        """
+        if self.profile is None:
+            raise ValueError("dump_stats() needs Profiler(cprofile=True)")
+        self.profile.dump_stats(path)
+
+    def print_stats(self, sort='cumulative', limit=30):
+        """
+        Prints the cProfile statistics (cprofile=True), sorted by sort.
+        """
+        import pstats
+
+        if self.profile is None:
+            raise ValueError("print_stats() needs Profiler(cprofile=True)")
+        pstats.Stats(self.profile).sort_stats(sort).print_stats(limit)
+
+    def top_allocations(self, limit=10, key_type='lineno'):
+        """
+        Returns the tracemalloc statistics (memory=True) of the largest allocation sites still alive at exit.
+        """
+        if self.snapshot is None:
+            raise ValueError("top_allocations() needs Profiler(memory=True) and an exited with-block")
+        return self.snapshot.statistics(key_type)[:limit]
+
+    def print_allocations(self, limit=10):
+        for statistic in self.top_allocations(limit):
+            print(statistic)
+
+
+class ProfiledCall:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.frame = None
+        self.token = None
+        self.started = None
+        self.memory = None
+
+    def __enter__(self):
+        self.frame = CallFrame(self.profiler, self.name, current_frame())
+        self.token = _current.set(self.frame)
+        if self.profiler.memory:
+            self.memory = self.profiler.tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter()
+        return self.frame
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.started
+        retained = 0
+        if self.memory is not None:
+            retained = max(0, self.profiler.tracemalloc.get_traced_memory()[0] - self.memory)
+        _current.reset(self.token)
+        self.profiler.record(self.frame, total, retained)
+        return False
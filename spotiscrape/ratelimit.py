@@ -0,0 +1,195 @@
+import threading, time
+
+
+# minimum seconds between two decreases of a bucket's rate
+HOLD = 1.0
+# share of the recovery target kept at each decrease that starts below it
+TARGET_DECAY = 0.9
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket whose refill rate adapts to server feedback.
+
+    The rate grows additively on every successful response and shrinks
+    multiplicatively on throttling (AIMD), so a long crawl settles just under
+    the rate the server is willing to accept. Like TCP's congestion window, it
+    shrinks once per congestion event: a 429 for a request sent before the last
+    decrease was caused by the old rate and does not shrink it again, and
+    neither does one within HOLD seconds (or Retry-After) of it. After a
+    decrease, successes win back the gap to the rate it was cut from quickly
+    (a quarter of the gap per success), so isolated 429s do not ratchet the rate
+    down; only repeated throttling lowers it for good.
+
+    Attributes:
+        rate (float): Current refill rate in requests per second.
+        burst (float): Maximum number of tokens that can be saved up.
+        min_rate (float): Lower bound for the rate after repeated throttling.
+        max_rate (float): Upper bound for the rate after repeated successes.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=0.5, max_rate=None, increase=0.5, decrease=0.5):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate * 4)
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.decreased = None
+        # the rate before the last decrease, recovered quickly
+        self.target = None
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes one token and returns how long the caller has to wait before using it.
+
+        Returns:
+            float: Seconds to sleep before sending the request.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now > self.updated:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+            self.tokens -= 1
+            # updated is in the future while a Retry-After window is open
+            wait = self.updated - now
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+
+            return wait
+
+    def on_success(self):
+        with self.lock:
+            step = self.increase
+            if self.target is not None and self.rate < self.target:
+                step = max(step, (self.target - self.rate) / 4)
+            self.rate = min(self.max_rate, self.rate + step)
+
+    def on_throttle(self, retry_after=None, sent=None):
+        """
+        Shrinks the rate, unless this 429 belongs to the congestion event that last shrank it,
+        and, if given, blocks the bucket until Retry-After has passed.
+
+        Args:
+            retry_after (float, optional): Seconds the server asked us to wait.
+            sent (float, optional): time.monotonic() when the throttled request was sent.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if retry_after:
+                self.updated = max(self.updated, now + retry_after)
+            self.tokens = min(self.tokens, 0.0)
+
+            if self.decreased is not None:
+                if now - self.decreased < max(retry_after or 0.0, HOLD):
+                    return
+                if sent is not None and sent <= self.decreased:
+                    return
+            # the target only drifts down, so random 429s do not drag it with the rate
+            self.target = max(self.rate, self.target * TARGET_DECAY) if self.target is not None else self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.decreased = now
+
+
+class RateLimiter:
+    """
+    Adaptive rate limiter keeping one token bucket per host and one per account.
+
+    A single RateLimiter can be shared between several SpotiScrape instances:
+    host buckets are then shared by all of them while every sp_dc account keeps
+    its own bucket.
+
+    Args:
+        rate (float, optional): Starting requests per second for each host. Default is 10.
+        burst (float, optional): Bucket size for each host. Defaults to the rate.
+        account_rate (float, optional): Starting requests per second for each account. Default is no account limit.
+        host_rates (dict, optional): Per-host starting rates overriding rate, e.g. {"api-partner.spotify.com": 5}.
+        min_rate (float, optional): Lowest rate a bucket can shrink to. Default is 0.5.
+        max_rate (float, optional): Highest rate a bucket can grow to. Defaults to four times its starting rate.
+        increase (float, optional): Requests per second added after each success. Default is 0.5.
+        decrease (float, optional): Factor applied to the rate on each congestion event (429). Default is 0.5.
+        max_retry_after (float, optional): Upper bound for honoured Retry-After values in seconds. Default is 60.
+
+    Example:
+        limiter = RateLimiter(rate=20, host_rates={"spclient.wg.spotify.com": 5})
+        spotiscrape = SpotiScrape(sp_dc, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate=10.0, burst=None, account_rate=None, host_rates=None, min_rate=0.5,
+                 max_rate=None, increase=0.5, decrease=0.5, max_retry_after=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.account_rate = account_rate
+        self.host_rates = dict(host_rates or {})
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retry_after = max_retry_after
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, key, rate):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(rate, burst=self.burst, min_rate=self.min_rate, max_rate=self.max_rate,
+                                         increase=self.increase, decrease=self.decrease)
+                    self.buckets[key] = bucket
+        return bucket
+
+    def buckets_for(self, host, account=None):
+        buckets = [self.bucket(("host", host), self.host_rates.get(host, self.rate))]
+        if account is not None and self.account_rate:
+            buckets.append(self.bucket(("account", account), self.account_rate))
+        return buckets
+
+    def acquire(self, host, account=None):
+        """
+        Blocks until both the host and the account bucket allow another request.
+
+        Args:
+            host (str): Hostname the request is sent to.
+            account (str, optional): Key identifying the authenticated account.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        wait = max(bucket.reserve() for bucket in self.buckets_for(host, account))
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def feedback(self, host, account, status_code, retry_after=None, sent=None):
+        """
+        Adjusts the buckets used for a request after its response arrived.
+
+        Args:
+            host (str): Hostname the request was sent to.
+            account (str): Key identifying the authenticated account.
+            status_code (int): HTTP status code of the response.
+            retry_after (float, optional): Parsed Retry-After header in seconds.
+            sent (float, optional): time.monotonic() when the request was sent, so a burst of 429s
+                for requests already in flight shrinks the rate only once.
+        """
+        if retry_after is not None:
+            retry_after = min(retry_after, self.max_retry_after)
+
+        for bucket in self.buckets_for(host, account):
+            if status_code == 429:
+                bucket.on_throttle(retry_after, sent)
+            elif status_code < 500:
+                bucket.on_success()
+
+    def rates(self):
+        """
+        Returns the current rate of every bucket, keyed by ("host", name) or ("account", key).
+        """
+        return {key: bucket.rate for key, bucket in list(self.buckets.items())}
@@ -0,0 +1,134 @@
+import logging, re, reprlib, threading, time
+from .errors import ResponseError, AuthenticationError, NotFoundError, RateLimitedError, ServerError
+
+
+logger = logging.getLogger('spotiscrape')
+logger.addHandler(logging.NullHandler())
+
+OPERATION_NAME = re.compile(rb'operationName["=:\s]+"?([A-Za-z0-9_]+)')
+
+# how many distinct failures are tracked for duplicate suppression
+MAX_TRACKED = 1024
+
+
+def error_class(status):
+    if status in (401, 403):
+        return AuthenticationError
+    if status == 404:
+        return NotFoundError
+    if status == 429:
+        return RateLimitedError
+    if status is not None and status >= 500:
+        return ServerError
+    return ResponseError
+
+
+def request_operation(request):
+    """
+    Finds the pathfinder operationName in a request's URL or body, else names the endpoint.
+    """
+    for part in (request.url.encode(), request.body if isinstance(request.body, bytes) else (request.body or '').encode()):
+        match = OPERATION_NAME.search(part)
+        if match:
+            return match.group(1).decode()
+
+    # same naming as session.operation_name, which cannot be imported here (session imports utils, which imports this module)
+    segments = [segment for segment in request.path_url.split('?')[0].split('/') if segment and not re.match(r'v\d+$', segment)]
+    return segments[0] if segments else None
+
+
+class ErrorReporter:
+    """
+    Turns failed calls into typed exceptions and logs them without flooding the log.
+
+    The first failure of a kind (exception type, message, status and operation) is logged
+    at WARNING on the "spotiscrape" logger; identical failures within interval seconds are
+    only counted, and the count is reported with the next one logged. Nothing is written
+    to stdout, and message formatting is left to logging, so it is skipped entirely when
+    the logger is disabled.
+
+    Args:
+        interval (float, optional): Seconds during which duplicates are suppressed. Default is 60.
+        body_limit (int, optional): Bytes of the response body kept on the exception and logged. Default is 512.
+    """
+
+    def __init__(self, interval=60.0, body_limit=512):
+        self.interval = interval
+        self.body_limit = body_limit
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def error(self, response, message):
+        """
+        Builds the exception for a failed call from its response (or the value decoded from it).
+        """
+        request = getattr(response, 'request', None)
+        status = getattr(response, 'status_code', None)
+
+        if request is not None:
+            try:
+                # reads at most body_limit bytes of a streamed body
+                body = next(response.iter_content(self.body_limit), b'')
+            except Exception:
+                body = b''
+            return error_class(status)(message, status, request_operation(request), request.url.split('?')[0], body)
+
+        # a call site that had already decoded the body
+        body = reprlib.repr(response) if response is not None else ''
+        return ResponseError(message, body=body[:self.body_limit])
+
+    def report(self, exception, cause=None):
+        """
+        Logs exception unless an identical one was logged less than interval seconds ago.
+        """
+        key = (type(exception), getattr(exception, 'message', None), getattr(exception, 'status', None),
+               getattr(exception, 'operation', None))
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return
+
+            suppressed = entry[1] if entry is not None else 0
+            if len(self.seen) >= MAX_TRACKED:
+                self.seen = {known: value for known, value in self.seen.items() if now - value[0] < self.interval}
+            self.seen[key] = [now, 0]
+
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning('%s: %s%s; body: %s', type(exception).__name__, exception,
+                           ' ({} similar suppressed)'.format(suppressed) if suppressed else '',
+                           getattr(exception, 'body', '') or '<empty>',
+                           exc_info=(type(cause), cause, cause.__traceback__) if cause is not None else None)
+
+    def suppressed(self):
+        """
+        Returns how many failures are currently being suppressed, by (type name, message, status, operation).
+        """
+        with self.lock:
+            return {(key[0].__name__,) + key[1:]: entry[1] for key, entry in self.seen.items() if entry[1]}
+
+
+_reporter = ErrorReporter()
+
+
+def set_error_reporting(interval=60.0, body_limit=512):
+    """
+    Configures how failed calls are reported.
+
+    Args:
+        interval (float, optional): Seconds during which identical failures are logged only once. Default is 60.
+        body_limit (int, optional): Bytes of the response body kept on exceptions and logged. Default is 512.
+
+    Example:
+        import logging
+        logging.basicConfig(level=logging.WARNING)
+        set_error_reporting(interval=300, body_limit=2048)
+    """
+    global _reporter
+    _reporter = ErrorReporter(interval, body_limit)
+
+
+def get_error_reporter():
+    return _reporter
@@ -0,0 +1,80 @@
+import random, threading, time
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are re-sent and how long to wait in between.
+
+    Reads (GET, HEAD, OPTIONS) are retried automatically. Anything else, such as the
+    pathfinder mutations addToPlaylist or moveItemsInPlaylist, is only retried when its
+    operation name is listed in safe_operations. Delays grow exponentially with full
+    jitter and never push a request past the total deadline.
+
+    Args:
+        max_attempts (int, optional): Total attempts per request, including the first one. Default is 4.
+        backoff (float, optional): Base delay in seconds for the first retry. Default is 0.5.
+        max_backoff (float, optional): Upper bound for a single delay in seconds. Default is 30.
+        deadline (float, optional): Total seconds a request may spend across all attempts. Default is 120.
+        retry_statuses (iterable, optional): HTTP status codes worth retrying. Default is 429, 500, 502, 503, 504.
+        safe_operations (iterable, optional): Non-GET operations that may be retried, e.g. ["addToLibrary"].
+        jitter (bool, optional): Randomise delays to avoid synchronised retries. Default is True.
+
+    Example:
+        policy = RetryPolicy(max_attempts=6, deadline=300, safe_operations=["moveItemsInPlaylist"])
+        spotify = SpotiScrape(sp_dc, retry_policy=policy)
+        policy.stats()  # {'fetchPlaylist': 2, 'metadata': 1}
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30.0, deadline=120.0,
+                 retry_statuses=(429, 500, 502, 503, 504), safe_operations=("clienttoken",), jitter=True):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.safe_operations = set(safe_operations)
+        self.jitter = jitter
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def is_idempotent(self, method, operation):
+        return method.upper() in self.IDEMPOTENT_METHODS or operation in self.safe_operations
+
+    def next_delay(self, attempt, started, retry_after=None, remaining=None):
+        """
+        Returns how long to sleep before the next attempt, or None if the request should not be retried.
+
+        Args:
+            attempt (int): Number of attempts already made minus one.
+            started (float): time.monotonic() of the first attempt.
+            retry_after (float, optional): Delay requested by the server.
+            remaining (float, optional): Time left on the caller's deadline.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            return None
+        if remaining is not None and delay >= remaining:
+            return None
+
+        return delay
+
+    def record(self, operation):
+        with self.lock:
+            self.counts[operation] = self.counts.get(operation, 0) + 1
+
+    def stats(self):
+        """
+        Returns the number of retries made so far, keyed by operation name.
+        """
+        with self.lock:
+            return dict(self.counts)
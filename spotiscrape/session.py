@@ -0,0 +1,354 @@
+import concurrent.futures, requests, re, threading, time
+from urllib.parse import urlsplit
+from .deadline import current_deadline
+from .errors import CassetteMissError, RequestCancelledError
+from .metrics import RequestSample, current_cache
+from .profiling import current_frame, NETWORK, CALLBACKS
+from .utils import parse_retry_after
+
+
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+DEFAULT_TIMEOUT = (10, 30)
+
+
+def discard_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def operation_name(url, params=None, json=None):
+    """
+    Returns a short, stable name for the operation a request performs.
+
+    Pathfinder requests are named after their operationName, every other request after
+    the first non-version segment of its path (e.g. "metadata", "color-lyrics", "tracks").
+    """
+    for payload in (params, json):
+        if isinstance(payload, dict) and payload.get('operationName'):
+            return payload['operationName']
+
+    for segment in urlsplit(url).path.split('/'):
+        if segment and not re.match(r'v\d+$', segment):
+            return segment
+
+    return urlsplit(url).hostname
+
+
+class Session(requests.Session):
+    """
+    A requests.Session that every SpotiScrape HTTP call goes through.
+
+    Args:
+        rate_limiter (RateLimiter, optional): Limiter consulted before every request. Default is None (no limiting).
+        retry_policy (RetryPolicy, optional): Policy deciding which failures are re-sent. Default is None (no retries).
+        hedge_policy (HedgePolicy, optional): Policy for duplicating slow idempotent reads. Default is None (no hedging).
+        circuit_breakers (CircuitBreakers, optional): Per host/operation breakers failing fast during upstream degradation. Default is None.
+        account (str, optional): Key of the authenticated account, used for per-account rate limits.
+        timeout (float or tuple, optional): Default requests timeout applied to every request. Default is (10, 30).
+        max_throttle_retries (int, optional): How many times a 429 response is re-sent after its Retry-After window when a rate limiter is set; after that the retry policy decides, without adding its own backoff. Default is 5.
+        max_workers (int, optional): Threads used for hedged and deadline-bound requests. Default is 32.
+        metrics (Metrics, optional): Receives a RequestSample for every request. Default is None.
+        tracer (Tracer, optional): Records a client span for every request, as a child of the active call's span. Default is None.
+    """
+
+    def __init__(self, rate_limiter=None, retry_policy=None, hedge_policy=None, circuit_breakers=None, account=None,
+                 timeout=DEFAULT_TIMEOUT, max_throttle_retries=5, max_workers=32, metrics=None,
+                 tracer=None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        self.circuit_breakers = circuit_breakers
+        self.account = account
+        self.timeout = timeout
+        self.max_throttle_retries = max_throttle_retries
+        self.max_workers = max_workers
+        self.metrics = metrics
+        self.tracer = tracer
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+    def request(self, method, url, anonymous=False, idempotent=None, **kwargs):
+        """
+        Sends a request through the rate limiter and retry policy, within the active Deadline if there is one.
+
+        Args:
+            method (str): HTTP method.
+            url (str): URL of the request.
+            anonymous (bool, optional): Send without the session's headers and cookies. Default is False.
+            idempotent (bool, optional): Override whether the request may be retried after a failure. Default is None (decided by the retry policy).
+            **kwargs: Any keyword accepted by requests.Session.request.
+
+        Returns:
+            requests.Response: The final response.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker for the request's host and operation is open.
+            DeadlineExceededError: If the active Deadline expires before a response arrives.
+            RequestCancelledError: If the active Deadline is cancelled.
+        """
+        host = urlsplit(url).hostname
+        operation = operation_name(url, kwargs.get('params'), kwargs.get('json'))
+        policy = self.retry_policy
+        breaker = self.circuit_breakers.get(host, operation) if self.circuit_breakers is not None else None
+        deadline = current_deadline()
+        timeout = kwargs.pop('timeout', self.timeout)
+        if idempotent is None:
+            idempotent = policy.is_idempotent(method, operation) if policy is not None else method.upper() == 'GET'
+
+        started = time.monotonic()
+        attempt = 0
+        throttles = 0
+        response = None
+        failure = None
+        # the breaker allowed a request whose outcome it has not been told yet
+        owed = False
+        sending = False
+        span = None
+        if self.tracer is not None:
+            span = self.tracer.start_span('HTTP {} {}'.format(method.upper(), operation), 'client', {
+                'http.method': method.upper(),
+                'http.host': host,
+                'http.path': urlsplit(url).path,
+                'spotiscrape.operation': operation,
+            })
+
+        try:
+            while True:
+                if deadline is not None:
+                    deadline.check()
+
+                if breaker is not None:
+                    breaker.allow()
+                    owed = True
+
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(host, self.account)
+
+                if deadline is not None:
+                    deadline.check()
+                    attempt_kwargs = dict(kwargs, timeout=deadline.bound(timeout))
+                else:
+                    attempt_kwargs = dict(kwargs, timeout=timeout)
+
+                try:
+                    sending = True
+                    sent = time.monotonic()
+                    response = self.send_request(method, url, anonymous, attempt_kwargs, operation, idempotent, deadline, host)
+
+                except RETRYABLE_ERRORS as error:
+                    sending = False
+                    if breaker is not None:
+                        breaker.record(False)
+                        owed = False
+
+                    # the socket timeout was shrunk to the deadline, so a timeout may just mean it ran out
+                    if deadline is not None and isinstance(error, requests.Timeout):
+                        deadline.check()
+
+                    # A failed connect never reached the server, so even mutations are safe to re-send
+                    delay = None
+                    if policy is not None and (idempotent or isinstance(error, requests.ConnectTimeout)):
+                        delay = policy.next_delay(attempt, started, remaining=deadline.remaining() if deadline is not None else None)
+                    if delay is None:
+                        raise
+
+                else:
+                    sending = False
+                    if breaker is not None:
+                        breaker.record(response.status_code < 500)
+                        owed = False
+
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.feedback(host, self.account, response.status_code, retry_after, sent)
+
+                        if response.status_code == 429 and throttles < self.max_throttle_retries:
+                            # the limiter already blocks the host until Retry-After has passed
+                            throttles += 1
+                            if policy is not None:
+                                policy.record(operation)
+                            response.close()
+                            continue
+
+                    delay = None
+                    # a 429 was rejected before being processed, so it is safe to re-send any method
+                    throttled = response.status_code == 429
+                    if policy is not None and response.status_code in policy.retry_statuses and (idempotent or throttled):
+                        delay = policy.next_delay(attempt, started, retry_after, deadline.remaining() if deadline is not None else None)
+                        if delay is not None and throttled and self.rate_limiter is not None:
+                            # the limiter already holds the host for Retry-After; backing off on top would double the wait
+                            delay = 0.0
+                    if delay is None:
+                        return response
+
+                    response.close()
+
+                policy.record(operation)
+                attempt += 1
+                if deadline is not None:
+                    deadline.sleep(delay)
+                else:
+                    time.sleep(delay)
+
+        except BaseException as e:
+            failure = e
+            if owed:
+                # a request that was sent and did not come back counts as failed; one that never
+                # reached the server (cancelled, a cassette miss, or stopped before sending) gives
+                # its half-open probe back
+                if sending and not isinstance(e, (RequestCancelledError, CassetteMissError)):
+                    breaker.record(False)
+                else:
+                    breaker.release()
+            raise
+
+        finally:
+            frame = current_frame()
+            if frame is not None:
+                finished = time.monotonic()
+                frame.add(NETWORK, finished - started)
+
+            if self.metrics is not None:
+                self.record(method, host, operation, started, attempt + throttles, response, failure, kwargs.get('stream'))
+            if span is not None:
+                if failure is None:
+                    span.set_attribute('http.status_code', response.status_code)
+                span.set_attribute('spotiscrape.retries', attempt + throttles)
+                self.tracer.end_span(span, failure)
+
+            if frame is not None:
+                frame.add(CALLBACKS, time.monotonic() - finished)
+
+    def record(self, method, host, operation, started, retries, response, failure, stream):
+        latency = time.monotonic() - started
+        status = request_bytes = response_bytes = 0
+
+        if failure is None and response is not None:
+            status = response.status_code
+            request_bytes = len(response.request.url) + len(response.request.body or b'')
+            # a streamed body has not been read yet
+            if stream:
+                response_bytes = int(response.headers.get('Content-Length') or 0)
+            else:
+                response_bytes = len(response.content or b'')
+
+        self.metrics.record_request(RequestSample(
+            host, operation, method.upper(), status, latency, request_bytes, response_bytes, retries,
+            type(failure).__name__ if failure is not None else None, current_cache()))
+
+    def send_request(self, method, url, anonymous, kwargs, operation=None, idempotent=False, deadline=None, host=None):
+        policy = self.hedge_policy
+        hedge_delay = None
+        if policy is not None and idempotent and policy.applies_to(operation):
+            hedge_delay = policy.delay(operation)
+
+        started = time.monotonic()
+        # under a deadline the caller waits on a worker so cancel() can stop the wait mid-request
+        if deadline is None and hedge_delay is None:
+            response = self.send_once(method, url, anonymous, kwargs)
+        else:
+            response = self.send_pooled(method, url, anonymous, kwargs, deadline, hedge_delay, host)
+
+        if policy is not None and idempotent and policy.applies_to(operation):
+            policy.observe(operation, time.monotonic() - started)
+        return response
+
+    def send_pooled(self, method, url, anonymous, kwargs, deadline=None, hedge_delay=None, host=None):
+        """
+        Sends a request on a worker thread so the caller can stop waiting for it.
+
+        The caller returns as soon as a response arrives or the active Deadline expires or is
+        cancelled. If hedge_delay is given and the request has been running on its worker for that
+        many seconds, a duplicate is sent, through the rate limiter like any other request, and
+        the first successful response wins. Losing or abandoned copies are cancelled if they have
+        not started yet, otherwise their responses are closed as soon as they arrive. A copy that
+        only starts after the deadline expired or was cancelled is not sent at all.
+        """
+        pool = self.executor()
+        wake = threading.Event()
+        futures = []
+        starts = []
+        winner = None
+
+        def send():
+            if deadline is not None:
+                deadline.check()
+            starts.append(time.monotonic())
+            return self.send_once(method, url, anonymous, kwargs)
+
+        def submit():
+            future = pool.submit(send)
+            future.add_done_callback(lambda future: wake.set())
+            futures.append(future)
+
+        submit()
+
+        try:
+            while True:
+                timeout = None
+                if len(futures) == 1 and hedge_delay is not None:
+                    # measured from when the primary started, not from when it was queued
+                    timeout = max(0.0, starts[0] + hedge_delay - time.monotonic()) if starts else hedge_delay
+                if deadline is not None:
+                    deadline.wait(wake, timeout)
+                else:
+                    wake.wait(timeout)
+                wake.clear()
+
+                finished = [future for future in futures if future.done()]
+                succeeded = [future for future in finished if future.exception() is None]
+                if succeeded:
+                    winner = succeeded[0]
+                    break
+                if len(finished) == len(futures):
+                    raise finished[0].exception()
+
+                if deadline is not None:
+                    deadline.check()
+
+                if len(futures) == 1 and hedge_delay is not None:
+                    # a primary still queued behind busy workers is not slow, only waiting
+                    if not futures[0].running() or not starts or time.monotonic() - starts[0] < hedge_delay:
+                        continue
+                    if not self.hedge_policy.try_acquire():
+                        hedge_delay = None
+                        continue
+                    if self.rate_limiter is not None and host is not None:
+                        self.rate_limiter.acquire(host, self.account)
+                    if not futures[0].done():
+                        submit()
+        finally:
+            for future in futures:
+                if future is not winner and not future.cancel():
+                    future.add_done_callback(discard_response)
+
+        if winner is not futures[0]:
+            self.hedge_policy.record_win()
+        return winner.result()
+
+    def executor(self):
+        if self.pool is None:
+            with self.pool_lock:
+                if self.pool is None:
+                    self.pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='spotiscrape')
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+        super().close()
+
+    def send_once(self, method, url, anonymous, kwargs):
+        if not anonymous:
+            return super().request(method, url, **kwargs)
+
+        # Third-party hosts (e.g. seektables) must not see the sp_dc cookie or bearer token
+        kwargs = dict(kwargs)
+        send_kwargs = {key: kwargs.pop(key) for key in ('timeout', 'allow_redirects', 'stream', 'verify', 'cert', 'proxies') if key in kwargs}
+        prepared = requests.Request(method.upper(), url, **kwargs).prepare()
+        send_kwargs.setdefault('allow_redirects', True)
+        return self.send(prepared, **send_kwargs)
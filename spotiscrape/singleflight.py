@@ -0,0 +1,114 @@
+import concurrent.futures, contextvars, copy, threading
+from .deadline import current_deadline
+from .errors import DeadlineExceededError
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+
+    While a call for a key is in flight, every other caller asking for the same key waits
+    for it and receives the same result (or exception) instead of issuing its own request.
+    Threads and asyncio tasks share the same flights. A waiting caller still honours its own
+    Deadline, raising DeadlineExceededError or RequestCancelledError without affecting the
+    call it waits for.
+
+    When a call was shared, every caller receives its own deep copy of the result, so one
+    caller mutating it cannot affect the others.
+
+    Example:
+        flights = SingleFlight()
+        flights.do(("queryArtistOverview", artistID), fetch, artistID)
+        await flights.do_async(("queryArtistOverview", artistID), fetch, artistID)
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def join(self, key):
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                future.followers += 1
+                return future, False
+
+            future = self.calls[key] = concurrent.futures.Future()
+            # final once the call is removed from self.calls, before its result is set
+            future.followers = 0
+            return future, True
+
+    def result(self, future):
+        result = future.result()
+        return copy.deepcopy(result) if future.followers else result
+
+    def wait(self, future):
+        """
+        Waits for a call another caller is running, within the active Deadline if there is one.
+        """
+        deadline = current_deadline()
+        if deadline is not None and not future.done():
+            done = threading.Event()
+            future.add_done_callback(lambda future: done.set())
+            while not future.done():
+                deadline.check()
+                deadline.wait(done)
+        return self.result(future)
+
+    def run(self, key, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            with self.lock:
+                self.calls.pop(key, None)
+            future.set_exception(e)
+        else:
+            with self.lock:
+                self.calls.pop(key, None)
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) unless a call for key is already in flight, in which case its result is shared.
+
+        Args:
+            key (hashable): Canonical identity of the request.
+            fn (callable): Function performing the request.
+
+        Returns:
+            The result of the (shared) call.
+        """
+        future, leader = self.join(key)
+        if not leader:
+            return self.wait(future)
+
+        self.run(key, future, fn, args, kwargs)
+        return self.result(future)
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Async counterpart of do(). The blocking fn runs in the loop's default executor;
+        waiting tasks do not hold a thread.
+        """
+        import asyncio
+
+        future, leader = self.join(key)
+        if leader:
+            # run in a copy of the caller's context so an active Deadline carries over
+            context = contextvars.copy_context()
+            asyncio.get_running_loop().run_in_executor(None, context.run, self.run, key, future, fn, args, kwargs)
+            await asyncio.shield(asyncio.wrap_future(future))
+            return self.result(future)
+
+        deadline = current_deadline()
+        remaining = deadline.remaining() if deadline is not None else None
+        try:
+            # shielded, like the leader's await, so a caller giving up never cancels the shared call
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("Deadline exceeded") from None
+        return self.result(future)
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
@@ -0,0 +1,342 @@
+import json, re
+from .decoder import extract, get_json_decoder
+from .errors import SpotiScrapeError
+
+
+TOKEN = re.compile(
+    rb'[ \t\r\n]*(?:([{}\[\]:,])|("[^"\\]*(?:\\.[^"\\]*)*")|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))',
+    re.S,
+)
+
+# a number is only complete once something other than a number character follows it
+NUMBER_TAIL = re.compile(rb'[0-9.eE+\-]*\Z')
+
+WHITESPACE = re.compile(rb'[ \t\r\n]*')
+
+STRUCTURE = re.compile(rb'[{}\[\]"]')
+
+STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+LITERALS = {b'true': True, b'false': False, b'null': None}
+
+KEY, VALUE, ARRAY = 0, 1, 2
+
+# stands for "any element" of an array in a path
+ITEM = object()
+
+
+class Lexer:
+    """
+    Reads a JSON document arriving as byte chunks, keeping only its unconsumed tail in memory.
+
+    Args:
+        chunks (iterable): Byte chunks, e.g. response.iter_content(65536).
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = b''
+        self.position = 0
+        self.finished = False
+
+    def read_more(self):
+        """
+        Appends the next chunk to the buffer, dropping what was consumed. Returns False at the end of the input.
+        """
+        if self.finished:
+            return False
+
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer = self.buffer[self.position:] + chunk
+                self.position = 0
+                return True
+
+        self.finished = True
+        return False
+
+    def next_token(self):
+        """
+        Returns the next (kind, value) token, or None at the end of the input.
+
+        kind is one of the punctuation characters '{', '}', '[', ']', ':', ',' or 'string',
+        'number', 'literal'.
+        """
+        while True:
+            match = TOKEN.match(self.buffer, self.position)
+
+            # a token touching the end of the buffer may continue in the next chunk
+            if match is None or match.end() == len(self.buffer) or (
+                    match.group(3) is not None and NUMBER_TAIL.match(self.buffer, match.end())):
+                if self.read_more():
+                    continue
+
+            if match is None:
+                if self.buffer[self.position:].strip():
+                    raise SpotiScrapeError("Invalid JSON near: {!r}".format(self.buffer[self.position:self.position + 40]))
+                return None
+
+            self.position = match.end()
+            punctuation, string, number, literal = match.groups()
+
+            if punctuation is not None:
+                return punctuation.decode(), None
+            elif string is not None:
+                return 'string', json.loads(string)
+            elif number is not None:
+                return 'number', float(number) if b'.' in number or b'e' in number or b'E' in number else int(number)
+            else:
+                return 'literal', LITERALS[literal]
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next byte without consuming it, or None at the end of the input.
+        """
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position:self.position + 1]
+            if not self.read_more():
+                return None
+
+    def capture(self):
+        """
+        Consumes the next object or array and returns its raw bytes without decoding them.
+
+        The value is delimited by only looking at brackets and strings, which is much
+        cheaper than tokenizing it.
+        """
+        return self.scan(True)
+
+    def skip(self):
+        """
+        Consumes the next value without decoding it.
+        """
+        if self.peek() in (b'{', b'['):
+            self.scan(False)
+        else:
+            self.next_token()
+
+    def scan(self, keep):
+        offset = 0
+        depth = 0
+
+        while True:
+            match = STRUCTURE.search(self.buffer, self.position + offset)
+            if match is None:
+                if not self.read_more():
+                    raise SpotiScrapeError("Unexpected end of JSON document")
+                continue
+
+            # offsets are relative to position, which read_more() moves when it trims the buffer
+            index = match.start() - self.position
+            char = self.buffer[match.start()]
+
+            if char == 0x22:  # '"'
+                rest = STRING_REST.match(self.buffer, match.end())
+                if rest is None:
+                    offset = index
+                    if not self.read_more():
+                        raise SpotiScrapeError("Unexpected end of JSON document")
+                    continue
+                offset = rest.end() - self.position
+            elif char in (0x7b, 0x5b):  # '{' '['
+                depth += 1
+                offset = index + 1
+            else:
+                depth -= 1
+                offset = index + 1
+                if depth == 0:
+                    start = self.position
+                    self.position += offset
+                    return self.buffer[start:self.position] if keep else None
+
+
+def parse_events(lexer):
+    """
+    Turns a Lexer (or byte chunks) into ijson-style events: ('start_map', None), ('map_key', key),
+    ('end_map', None), ('start_array', None), ('end_array', None) and ('string' | 'number' |
+    'boolean' | 'null', value).
+    """
+    if not isinstance(lexer, Lexer):
+        lexer = Lexer(lexer)
+
+    stack = []
+
+    while True:
+        token = lexer.next_token()
+        if token is None:
+            return
+
+        kind, value = token
+
+        if kind == '{':
+            stack.append(KEY)
+            yield 'start_map', None
+        elif kind == '}':
+            stack.pop()
+            yield 'end_map', None
+        elif kind == '[':
+            stack.append(ARRAY)
+            yield 'start_array', None
+        elif kind == ']':
+            stack.pop()
+            yield 'end_array', None
+        elif kind == ':':
+            stack[-1] = VALUE
+        elif kind == ',':
+            if stack[-1] == VALUE:
+                stack[-1] = KEY
+        elif kind == 'string':
+            if stack and stack[-1] == KEY:
+                yield 'map_key', value
+            else:
+                yield 'string', value
+        elif kind == 'number':
+            yield 'number', value
+        elif value is None:
+            yield 'null', None
+        else:
+            yield 'boolean', value
+
+
+def project(data, path):
+    """
+    Decodes only the value found at path in a JSON document, a sequence of dict keys and list indices.
+
+    The bytes are walked along path and every value off the path is skipped by scanning its
+    brackets and strings, without being decoded; only the value at the end is handed to the
+    configured JSON decoder. A negative index decodes the array holding it.
+
+    Raises:
+        KeyError, IndexError or TypeError: Like indexing the decoded document, if path is not found.
+    """
+    lexer = Lexer([data])
+    closers = []
+
+    for depth, key in enumerate(path):
+        char = lexer.peek()
+
+        if isinstance(key, int) and key < 0:
+            if char != b'[':
+                raise TypeError("No list at {!r}".format(path[:depth]))
+            return extract(decode_value(lexer, closers, path[:depth]), path[depth:])
+
+        if isinstance(key, int):
+            if char != b'[':
+                raise TypeError("No list at {!r}".format(path[:depth]))
+            closers.append(b']')
+            lexer.position += 1
+            for _ in range(key):
+                if lexer.peek() == b']':
+                    raise IndexError(key)
+                lexer.skip()
+                if lexer.peek() == b',':
+                    lexer.position += 1
+            if lexer.peek() == b']':
+                raise IndexError(key)
+            continue
+
+        if char != b'{':
+            raise TypeError("No object at {!r}".format(path[:depth]))
+        closers.append(b'}')
+        lexer.position += 1
+        while True:
+            token = lexer.next_token()
+            if token is None or token[0] == '}':
+                raise KeyError(key)
+            if token[0] == ',':
+                continue
+            lexer.next_token()  # ':'
+            if token[1] == key:
+                break
+            lexer.skip()
+
+    return decode_value(lexer, closers, path)
+
+
+def decode_value(lexer, closers, path):
+    """
+    Decodes the value found at path, where a Lexer holding the whole document stopped.
+
+    The bytes are handed to the decoder without being scanned in Python: up to the closing
+    brackets of its containers (listed by closers, outermost first) when it is the last value in
+    them, or else up to the position where the decoder reports extra data. A slice that is not
+    exactly one value cannot decode, so Lexer.capture() is only needed when both fail.
+    """
+    if lexer.peek() not in (b'{', b'['):
+        return lexer.next_token()[1]
+
+    loads = get_json_decoder()
+    data, start, end = lexer.buffer, lexer.position, len(lexer.buffer)
+    for closer in closers:
+        while data[end - 1] in b' \t\r\n':
+            end -= 1
+        if data[end - 1:end] != closer:
+            end = len(data)
+            break
+        end -= 1
+    else:
+        # nothing worth skipping: decoding the document saves copying nearly all of it into a slice
+        if (end - start) * 10 >= len(data) * 9:
+            return extract(loads(data), path)
+
+    for attempt in range(2):
+        try:
+            return loads(data[start:end])
+        except ValueError as e:
+            # json and orjson both stop right after the value when something follows it
+            pos = getattr(e, 'pos', None)
+            if pos is None or attempt:
+                break
+            end = start + pos
+    return loads(lexer.capture())
+
+
+def iter_items(chunks, path):
+    """
+    Yields the elements of the array found at path one at a time, while the document is still being read.
+
+    The document is walked event by event until the array starts. Each element is then cut
+    out of the byte stream and decoded on its own with the configured JSON decoder, and
+    reading stops as soon as the array ends. Only one element and one chunk are held in
+    memory at a time, so peak memory stays bounded by the size of one item rather than the
+    whole response.
+
+    Args:
+        chunks (iterable): Byte chunks of a JSON document, e.g. response.iter_content(65536).
+        path (tuple): Keys leading to the array, e.g. ('data', 'playlistV2', 'content', 'items').
+
+    Yields:
+        The decoded array elements.
+    """
+    lexer = Lexer(chunks)
+    target = list(path)
+    keys = []
+
+    for event, value in parse_events(lexer):
+        if event == 'map_key':
+            keys[-1] = value
+        elif event in ('end_map', 'end_array'):
+            keys.pop()
+        elif event == 'start_map':
+            keys.append(None)
+        elif event == 'start_array':
+            if keys == target:
+                break
+            keys.append(ITEM)
+    else:
+        return
+
+    loads = get_json_decoder()
+
+    while True:
+        char = lexer.peek()
+        if char == b']' or char is None:
+            return
+        if char == b',':
+            lexer.position += 1
+        elif char in (b'{', b'['):
+            yield loads(lexer.capture())
+        else:
+            yield lexer.next_token()[1]
@@ -0,0 +1,261 @@
+import collections, contextvars, json, random, threading, time
+from .reporting import logger
+
+
+_current = contextvars.ContextVar('spotiscrape_span', default=None)
+
+
+def current_span():
+    """
+    Returns the Span active in the current thread or task, or None.
+    """
+    return _current.get()
+
+
+class Span:
+    """
+    One timed unit of work: a public SpotiScrape call, or an HTTP request made by one.
+
+    Attributes:
+        name (str): The method name (e.g. get_streams) or "HTTP <method> <operation>".
+        kind (str): "internal" for calls, "client" for HTTP requests.
+        trace_id (str): 32 hex digits shared by every span of one top-level call.
+        span_id (str): 16 hex digits.
+        parent_id (str): span_id of the enclosing span, or None.
+        start (int): Start time in nanoseconds since the epoch.
+        end (int): End time in nanoseconds since the epoch, or None while running.
+        attributes (dict): Details such as http.method, http.host, http.status_code and spotiscrape.operation.
+        error (str): Name and message of the exception that ended the span, or None.
+    """
+
+    def __init__(self, name, kind, parent=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent is not None else '{:032x}'.format(random.getrandbits(128))
+        self.span_id = '{:016x}'.format(random.getrandbits(64))
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start = time.time_ns()
+        self.started = time.perf_counter_ns()
+        self.end = None
+        self.thread = threading.current_thread().name
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        self.end = self.start + time.perf_counter_ns() - self.started
+        if error is not None:
+            self.error = '{}: {}'.format(type(error).__name__, error)
+
+    @property
+    def duration(self):
+        """
+        Seconds the span lasted, or None while it is running.
+        """
+        return (self.end - self.start) / 1e9 if self.end is not None else None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'thread': self.thread,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+    def __repr__(self):
+        return 'Span({!r}, {!r}, duration={})'.format(self.name, self.span_id, self.duration)
+
+
+class Tracer:
+    """
+    Creates a span for every public SpotiScrape call and a child span for every HTTP request it makes.
+
+    Spans nest through contextvars, so a composite call such as get_streams gets one parent
+    span with the metadata, seektable and storage-resolve requests as children, including
+    calls made from worker threads that run in a copy of the caller's context
+    (search_many, the async methods). Finished spans are passed to the exporters.
+
+    Args:
+        exporters (iterable, optional): Objects with an export(span) method, and optionally a start(span) method
+            called when a span begins, e.g. JSONFileExporter or OpenTelemetryExporter.
+
+    Example:
+        tracer = Tracer([JSONFileExporter("spans.ndjson")])
+        spotify = SpotiScrape(sp_dc, tracer=tracer)
+        spotify.get_streams(trackURL)
+    """
+
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def start_span(self, name, kind='internal', attributes=None):
+        span = Span(name, kind, current_span(), attributes)
+        for exporter in self.exporters:
+            start = getattr(exporter, 'start', None)
+            if start is not None:
+                try:
+                    start(span)
+                except Exception:
+                    logger.exception("Span exporter %r failed", exporter)
+        return span
+
+    def end_span(self, span, error=None):
+        span.finish(error)
+        # spans end inside the traced call, so a broken exporter must not replace its result or error
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception:
+                logger.exception("Span exporter %r failed", exporter)
+
+    def span(self, name, kind='internal', attributes=None):
+        """
+        Returns a context manager running its block inside a new span.
+
+        Example:
+            with tracer.span("export-playlist", attributes={"playlist": playlistID}) as span:
+                ...
+        """
+        return SpanContext(self, name, kind, attributes)
+
+    def shutdown(self):
+        for exporter in self.exporters:
+            close = getattr(exporter, 'close', None)
+            if close is not None:
+                close()
+
+
+class SpanContext:
+
+    def __init__(self, tracer, name, kind, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.span = None
+        self.token = None
+
+    def __enter__(self):
+        self.span = self.tracer.start_span(self.name, self.kind, self.attributes)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current.reset(self.token)
+        self.tracer.end_span(self.span, exc)
+        return False
+
+
+class JSONFileExporter:
+    """
+    Appends every finished span to a file as one JSON object per line.
+
+    Args:
+        path (str): File to append to.
+
+    Example:
+        tracer = Tracer([JSONFileExporter("spans.ndjson")])
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), separators=(',', ':'), default=str) + '\n'
+        with self.lock:
+            self.fh.write(line)
+            # flush whole traces so the file is readable while the client runs
+            if span.parent_id is None:
+                self.fh.flush()
+
+    def close(self):
+        with self.lock:
+            self.fh.close()
+
+
+class MemoryExporter:
+    """
+    Keeps the most recent finished spans in memory.
+
+    Args:
+        maxlen (int, optional): Number of spans kept. Default is 10000.
+    """
+
+    def __init__(self, maxlen=10000):
+        self.spans = collections.deque(maxlen=maxlen)
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def traces(self):
+        """
+        Returns the kept spans grouped by trace_id, each trace in start order.
+        """
+        with self.lock:
+            spans = list(self.spans)
+
+        traces = {}
+        for span in sorted(spans, key=lambda span: span.start):
+            traces.setdefault(span.trace_id, []).append(span)
+        return traces
+
+
+class OpenTelemetryExporter:
+    """
+    Mirrors spans into OpenTelemetry, keeping their parent/child structure and timestamps.
+
+    Requires the opentelemetry-api package; spans go to whatever TracerProvider and span
+    processors the application configured (OTLP, Jaeger, Zipkin, console, ...).
+
+    Args:
+        tracer (opentelemetry.trace.Tracer, optional): Tracer to create spans with. Default is trace.get_tracer("spotiscrape").
+
+    Example:
+        tracer = Tracer([OpenTelemetryExporter()])
+    """
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+
+        self.trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer('spotiscrape')
+        self.spans = {}
+        self.lock = threading.Lock()
+
+    def start(self, span):
+        with self.lock:
+            parent = self.spans.get(span.parent_id)
+        context = self.trace.set_span_in_context(parent) if parent is not None else None
+        kind = self.trace.SpanKind.CLIENT if span.kind == 'client' else self.trace.SpanKind.INTERNAL
+        otel_span = self.tracer.start_span(span.name, context=context, kind=kind, start_time=span.start)
+        with self.lock:
+            self.spans[span.span_id] = otel_span
+
+    def export(self, span):
+        with self.lock:
+            otel_span = self.spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+
+        for key, value in span.attributes.items():
+            if value is not None:
+                otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+        if span.error is not None:
+            otel_span.set_status(self.trace.Status(self.trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end)
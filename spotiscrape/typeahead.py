@@ -0,0 +1,254 @@
+import collections, concurrent.futures, threading, time
+from .deadline import Deadline
+from .errors import RequestCancelledError
+from .index import normalize_text, entity_name, artist_names
+from .utils import normalize_query
+
+
+class PrefixTrie:
+    """
+    Maps query strings to cached results and finds the longest cached prefix of a query.
+
+    Args:
+        ttl (float): Seconds a cached entry stays fresh.
+        max_entries (int): Maximum number of cached queries; the oldest are evicted first.
+
+    Not thread-safe; Typeahead only uses it under its lock.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.root = {}
+        self.order = collections.OrderedDict()
+
+    def node(self, key, create=False):
+        node = self.root
+        for char in key:
+            child = node.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node[char] = {}
+            node = child
+        return node
+
+    def set(self, key, results):
+        self.node(key, create=True)[None] = (time.monotonic() + self.ttl, results)
+        self.order[key] = True
+        self.order.move_to_end(key)
+
+        while len(self.order) > self.max_entries:
+            oldest, _ = self.order.popitem(last=False)
+            self.remove(oldest)
+
+    def remove(self, key):
+        """
+        Drops the entry of key and prunes the nodes left without entries or children.
+        """
+        path = []
+        node = self.root
+        for char in key:
+            child = node.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child
+
+        node.pop(None, None)
+        while path and not node:
+            node, char = path.pop()
+            del node[char]
+
+    def longest_prefix(self, key):
+        """
+        Returns (prefix, results, fresh) for the longest cached prefix of key (key itself included), or None.
+        """
+        now = time.monotonic()
+        found = None
+        node = self.root
+        if None in node:
+            found = ('', node[None])
+
+        for index, char in enumerate(key):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                found = (key[:index + 1], node[None])
+
+        if found is None:
+            return None
+
+        prefix, (expires, results) = found
+        return prefix, results, expires > now
+
+
+def item_text(item):
+    data = (item.get('item') or item).get('data') or item
+    return normalize_text(' '.join([entity_name(data) or ''] + artist_names(data)))
+
+
+def matches(item, words):
+    """
+    True if every query word is the prefix of a word of the item's name or artists.
+    """
+    text_words = item_text(item).split()
+    return all(any(text_word.startswith(word) for text_word in text_words) for word in words)
+
+
+class Typeahead:
+    """
+    Autocomplete on top of search_top_results() with a prefix cache, debouncing and cancellation.
+
+    Results are kept in a prefix trie. A query whose exact text is cached and fresh is
+    answered from it. A query extending a cached prefix is answered at once by filtering
+    the prefix's results, and the exact query is refreshed in the background. Otherwise
+    the request is sent after the debounce interval, unless a newer query arrived in the
+    meantime. A newer query also cancels the request still in flight for an older one.
+
+    Args:
+        spotify (SpotiScrape): The client.
+        limit (int, optional): Number of top results per query. Default is 5.
+        debounce (float, optional): Seconds to wait for further keystrokes before sending a request. Default is 0.15.
+        ttl (float, optional): Seconds cached results stay fresh. Default is 300.
+        max_entries (int, optional): Maximum number of cached queries. Default is 2048.
+        min_length (int, optional): Queries shorter than this are not sent. Default is 2.
+
+    Example:
+        typeahead = spotify.typeahead()
+        typeahead.suggest("ed sh")                      # blocks for the debounce interval and the request
+        typeahead.suggest("ed shee", callback=render)   # returns cached / filtered results at once
+    """
+
+    def __init__(self, spotify, limit=5, debounce=0.15, ttl=300, max_entries=2048, min_length=2):
+        self.spotify = spotify
+        self.limit = limit
+        self.debounce = debounce
+        self.min_length = min_length
+        self.trie = PrefixTrie(ttl, max_entries)
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.generation = 0
+        self.in_flight = None
+        self.refreshing = set()
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self.counters = collections.Counter()
+
+    def suggest(self, query, callback=None):
+        """
+        Returns suggestions for the text typed so far.
+
+        Args:
+            query (str): The current text of the search box.
+            callback (callable, optional): If given, suggest() never blocks: it returns what the
+                cache can answer (or None) and later calls callback(query, results) with fresh results.
+
+        Returns:
+            list or None: topResults items, or None if the query was superseded before it could be answered.
+        """
+        key = normalize_query(query)
+
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            self.changed.notify_all()
+
+            if self.in_flight is not None and self.in_flight[0] != key:
+                self.in_flight[1].cancel()
+
+            cached = self.trie.longest_prefix(key)
+
+        if len(key) < self.min_length:
+            return []
+
+        if cached is not None:
+            prefix, results, fresh = cached
+            if prefix == key and fresh:
+                self.count('hits')
+                return results
+
+            self.count('prefix_hits')
+            self.refresh(key, generation, callback, query)
+            if prefix == key:
+                return results
+            words = key.split()
+            return [item for item in results if matches(item, words)]
+
+        if callback is not None:
+            self.refresh(key, generation, callback, query)
+            return None
+
+        return self.fetch(key, generation, query)
+
+    def refresh(self, key, generation, callback=None, query=None):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                results = self.fetch(key, generation, query)
+            except Exception:
+                self.count('errors')
+                return
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+            if results is not None and callback is not None:
+                callback(query if query is not None else key, results)
+
+        self.pool.submit(run)
+
+    def fetch(self, key, generation, query=None):
+        """
+        Waits out the debounce interval, then fetches key unless a newer query superseded it.
+
+        The query is sent as typed; its normalized form, key, is only used for caching.
+        """
+        deadline = time.monotonic() + self.debounce
+        with self.lock:
+            while self.generation == generation:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.changed.wait(remaining)
+
+            if self.generation != generation:
+                self.counters['superseded'] += 1
+                return None
+
+            call = Deadline()
+            self.in_flight = (key, call)
+            self.counters['requests'] += 1
+
+        try:
+            with call:
+                results = self.spotify.search_top_results(query or key, self.limit)
+        except RequestCancelledError:
+            # counted here, not at cancel(): a request that already completed was not cancelled
+            self.count('cancelled')
+            return None
+        finally:
+            with self.lock:
+                if self.in_flight is not None and self.in_flight[1] is call:
+                    self.in_flight = None
+
+        with self.lock:
+            self.trie.set(key, results)
+        return results
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """
+        Returns counters: requests sent, exact and prefix cache hits, superseded and cancelled queries, errors.
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
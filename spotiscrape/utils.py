@@ -1,16 +1,22 @@
-import base62, re, datetime, pytz
+import re, functools, unicodedata
 from .errors import SpotiScrapeError
-from termcolor import colored
+from .gid import id_to_gid
+from .reporting import get_error_reporter
 
 
 def handle_exception(response, error, custom_message):
-    separator = "-" * 60
-    print(colored(separator, 'yellow'))
-    print(colored(" [+] Response:", 'cyan'), "No Response" if response.text.strip() == "" else response.text.strip())
-    print(colored(" [+] Error:", 'red'), error)
-    print(colored(" [+] Status Code:", 'green'), response.status_code)
-    print(colored(separator, 'yellow'))
-    raise SpotiScrapeError(custom_message)
+    """
+    Raises the typed exception (see errors.ResponseError) for a failed call, logging it on the way.
+
+    Args:
+        response (requests.Response): The response, or the value already decoded from it.
+        error (Exception): The exception that made the call fail; chained as the cause.
+        custom_message (str): What the call was trying to do.
+    """
+    reporter = get_error_reporter()
+    exception = reporter.error(response, custom_message)
+    reporter.report(exception, error)
+    raise exception from error
 
 
 def time_to_seconds(time_str):
@@ -29,40 +35,107 @@ def find_device_id(devices_data, device_type):
     return device_ids
 
 def uri_to_gid(uri):
+        import base62
         return hex(base62.decode(uri, base62.CHARSET_INVERTED))[2:].zfill(32)
 
 def gid_to_uri(gid):
+        import base62
         return base62.encode(int(gid, 16), charset=base62.CHARSET_INVERTED).zfill(22)
 
 
+# pytz.country_timezones["US"][0], the zone the home query has always been sent with
+HOME_TIMEZONE = "America/New_York"
+
+
 def get_current_timezone():
-    
-    utc_now = datetime.datetime.utcnow()
+    """
+    Returns the timezone name sent with the home query, "America/NewYork".
+    """
+    return HOME_TIMEZONE.replace("_", "")
 
-    local_timezone = pytz.timezone(pytz.country_timezones["US"][0])
+ENTITY_TYPES = "track|artist|album|playlist|user|episode|show"
+
+SPOTIFY_ID = re.compile(r"""
+    \s*(?:
+        (?:https?://)?(?:open|play)\.spotify\.com/(?:intl-[\w-]+/)?(?:embed/)?(?:user/[^/?#\s]+/)?
+            (?P<url_type>""" + ENTITY_TYPES + r""")/(?P<url_id>[^/?#&\s]+)
+      | spotify:(?:user:[^:\s]+:)?(?P<uri_type>""" + ENTITY_TYPES + r"""):(?P<uri_id>[^:/?#\s]+)
+      | (?P<bare_id>[0-9A-Za-z]{22})\s*$
+    )""", re.X)
+
+
+def invalid_id(value):
+    return SpotiScrapeError("[+] Error: Not a Spotify URL, URI or id: {!r}".format(value))
+
+
+def normalize_id(value):
+    """
+    Parses a Spotify URL, URI or bare id in a single regex pass.
+
+    Accepts open.spotify.com URLs (with or without an intl-xx/ prefix), spotify:type:id
+    URIs and bare 22-character ids. Results are cached, so repeated inputs are free.
+
+    Args:
+        value (str): The URL, URI or id.
+
+    Returns:
+        tuple: (type, id, gid). type is None for bare ids; gid is the 16-byte gid, or None for users.
+
+    Raises:
+        SpotiScrapeError: If the value is not a valid Spotify URL, URI or id.
+
+    Example:
+        normalize_id("https://open.spotify.com/intl-de/track/4uLU6hMCjMI75M1A2tKUQC?si=abc")
+        # ('track', '4uLU6hMCjMI75M1A2tKUQC', b'\x93\xbcAJ...')
+    """
+    # checked before the cache, which would raise TypeError for unhashable values such as lists
+    if not isinstance(value, str):
+        raise invalid_id(value)
+    return parse_id(value)
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_id(value):
+    match = SPOTIFY_ID.match(value)
+    if match is None:
+        raise invalid_id(value)
+
+    entity_type = match.group('url_type') or match.group('uri_type')
+    entity_id = match.group('url_id') or match.group('uri_id') or match.group('bare_id')
+
+    if entity_type == 'user':
+        return entity_type, entity_id, None
+
+    try:
+        return entity_type, entity_id, id_to_gid(entity_id)
+    except ValueError:
+        raise SpotiScrapeError("[+] Error: Invalid Spotify id: {!r}".format(value)) from None
+
+
+def normalize_ids(values):
+    """
+    Normalizes many URLs, URIs or ids at once, parsing each distinct input only once.
+
+    Returns:
+        list: (type, id, gid) tuples in input order.
+    """
+    values = list(values)
+    for value in values:
+        if not isinstance(value, str):
+            raise invalid_id(value)
+    parsed = {value: parse_id(value) for value in dict.fromkeys(values)}
+    return [parsed[value] for value in values]
+
+
+def normalize_query(query):
+    """
+    Canonical form of a search query: NFKC-normalized, case-folded, with whitespace collapsed.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
 
-    local_time = utc_now.replace(tzinfo=pytz.utc).astimezone(local_timezone)
-    
-    return str(local_time.tzinfo).replace("_" , "")
 
 def extract_id(url):
-    if "spotify.com" not in url:
-         raise SpotiScrapeError("[+] Error: Please Provide a Spotify URL")
-    
-    patterns = [
-        (r"/track/([^/?]+)", "trackID"),
-        (r"/artist/([^/?]+)", "artistID"),
-        (r"/playlist/([^/?]+)", "playlistID"),
-        (r"/album/([^/?]+)", "albumID"),
-        (r"/user/([^/?]+)", "userID")
-    ]
-
-    for pattern, id_type in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    
-    return url
+    return normalize_id(url)[1]
 
 
 def get_timeTag(milliseconds):
@@ -73,3 +146,32 @@ def get_timeTag(milliseconds):
 
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
+
+
+def parse_retry_after(value):
+    """
+    Converts a Retry-After header (delta seconds or HTTP date) to seconds.
+
+    Returns None when the header is missing or cannot be parsed.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    import datetime
+    from email.utils import parsedate_to_datetime
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at is None:
+        return None
+
+    now = datetime.datetime.now(retry_at.tzinfo)
+    return max(0.0, (retry_at - now).total_seconds())
@@ -0,0 +1,64 @@
+import http.server, threading, time
+import pytest
+from spotiscrape.deadline import Deadline
+from spotiscrape.errors import DeadlineExceededError, RequestCancelledError
+from spotiscrape.session import Session
+
+
+class SlowHandler(http.server.BaseHTTPRequestHandler):
+    latency = 2.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        try:
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_url():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:{}/slow'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_cancel_stops_a_request_in_flight(slow_url):
+    session = Session()
+    started = time.monotonic()
+    with Deadline() as call:
+        threading.Timer(0.2, call.cancel).start()
+        with pytest.raises(RequestCancelledError):
+            session.request('GET', slow_url)
+    assert time.monotonic() - started < 1.0
+    session.close()
+
+
+def test_deadline_expires_during_a_request(slow_url):
+    session = Session()
+    started = time.monotonic()
+    with Deadline(0.3):
+        with pytest.raises(DeadlineExceededError):
+            session.request('GET', slow_url)
+    assert time.monotonic() - started < 1.0
+    session.close()
+
+
+def test_request_without_deadline_is_sent_inline(slow_url):
+    SlowHandler.latency = 0.0
+    try:
+        session = Session()
+        assert session.request('GET', slow_url).status_code == 200
+        assert session.pool is None
+        session.close()
+    finally:
+        SlowHandler.latency = 2.0
@@ -0,0 +1,47 @@
+import http.server, threading
+import pytest
+from spotiscrape.metrics import HIT, MISS, Metrics, RequestSample, cache_result
+from spotiscrape.session import Session
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:{}/v1/search'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_are_labelled_with_the_cache_result(url):
+    samples = []
+    metrics = Metrics(sinks=[samples.append])
+    session = Session(metrics=metrics)
+    session.get(url)
+    with cache_result(MISS):
+        session.get(url)
+    session.close()
+
+    assert [sample.cache for sample in samples] == ['bypass', 'miss']
+    assert 'cache="miss"' in metrics.prometheus()
+
+
+def test_cache_hits_stay_out_of_the_latency_histograms():
+    metrics = Metrics()
+    metrics.record_request(RequestSample('host', 'search', 'GET', 200, 0.5, 10, 100, 0, None, MISS))
+    metrics.record_request(RequestSample('host', 'search', 'GET', 200, 0.0, 0, 0, 0, None, HIT))
+
+    row, = metrics.summary()
+    assert (row['requests'], row['cache_hits'], row['total']) == (1, 1, 0.5)
+    assert 'status="200",cache="hit"} 1' in metrics.prometheus()
@@ -0,0 +1,18 @@
+import time
+from spotiscrape.ratelimit import RateLimiter
+
+
+def test_burst_of_429s_halves_the_rate_once():
+    limiter = RateLimiter(rate=20)
+    sent = time.monotonic()
+    for _ in range(8):
+        limiter.feedback('host', None, 429, None, sent)
+    assert limiter.rates()[('host', 'host')] == 10
+
+
+def test_rate_recovers_towards_the_rate_before_the_decrease():
+    limiter = RateLimiter(rate=20)
+    limiter.feedback('host', None, 429, None, time.monotonic())
+    for _ in range(10):
+        limiter.feedback('host', None, 200)
+    assert limiter.rates()[('host', 'host')] > 19
@@ -0,0 +1,40 @@
+import json
+import pytest
+from spotiscrape.decoder import extract
+from spotiscrape.streaming import project
+
+
+DOCUMENT = {
+    'data': {'trackUnion': {
+        'name': 'a "quoted" ]} name',
+        'albumOfTrack': {'coverArt': {'sources': [{'url': 'small'}, {'url': 'large'}]}},
+        'firstArtist': {'items': [{'profile': {'name': 'Artist'}}, {'profile': None}]},
+    }},
+    'extensions': {'cacheControl': []},
+}
+
+PATHS = [
+    ('data', 'trackUnion'),
+    ('data', 'trackUnion', 'albumOfTrack', 'coverArt', 'sources', -1, 'url'),
+    ('data', 'trackUnion', 'firstArtist', 'items', 1, 'profile'),
+    ('data', 'trackUnion', 'firstArtist', 'items', 0),
+    ('extensions',),
+    (),
+]
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+@pytest.mark.parametrize('path', PATHS)
+def test_project_matches_the_decoded_document(path, indent):
+    data = json.dumps(DOCUMENT, indent=indent).encode()
+    assert project(data, path) == extract(DOCUMENT, path)
+
+
+@pytest.mark.parametrize('path, error', [
+    (('data', 'missing'), KeyError),
+    (('data', 'trackUnion', 'firstArtist', 'items', 2), IndexError),
+    (('data', 'trackUnion', 'name', 'x'), TypeError),
+])
+def test_project_raises_like_indexing(path, error):
+    with pytest.raises(error):
+        project(json.dumps(DOCUMENT).encode(), path)